@@ -14,6 +14,20 @@ from .forms import LoginForm, RegistrationForm, BudgetForm, ExpenseForm, Investm
 
 from .mongoModels import Investment, User, Budget, Expense, Goal, UserProfile, Asset, RetirementPlan
 from .operations import mongoDBClient, deserializeDoc
+from .cache import configure_quote_cache
+from .breaker import configure_breakers
+from .httpclient import configure_http_client
+from .ratelimit import configure_rate_limiter
+from .providers import configure_quote_providers
+from .profiles import configure_profile_store
+from .fx import configure_fx_service
+from .refresher import configure_price_refresher
+from .ingest import configure_trade_ingestor
+from .pricestream import configure_stream_slots
+from .candles import configure_candle_store
+from .closecache import configure_close_cache
+from .indexes import configure_indexes
+from .unitofwork import close_unit_of_work
 
 from .routes.advice import advice_bp
 from .routes.auth import auth_bp
@@ -30,6 +44,22 @@ def create_app(config_name='default'):
     
     dbClient = mongoDBClient(app.config["MONGO_URI"])
     app.mongo = dbClient
+    app.quote_cache = configure_quote_cache(app.config)
+    app.breakers = configure_breakers(app.config)
+    app.http_client = configure_http_client(app.config)
+    app.finnhub_limiter = configure_rate_limiter(app.config, dbClient)
+    app.quote_providers = configure_quote_providers(app.config)
+    app.profile_store = configure_profile_store(app.config, dbClient)
+    app.fx = configure_fx_service(app.config, dbClient)
+    app.price_refresher = configure_price_refresher(app.config, dbClient)
+    app.trade_ingestor = configure_trade_ingestor(app.config, dbClient)
+    app.stream_slots = configure_stream_slots(app.config)
+    app.candle_store = configure_candle_store(app.config, dbClient)
+    app.close_cache = configure_close_cache(app.config)
+    # After the candle store, which has to create its time-series collection first
+    app.indexes = configure_indexes(app.config, dbClient)
+    # Flushes any writes a route queued on its unit of work but did not commit
+    app.teardown_appcontext(close_unit_of_work)
     
     # Initialize Flask-Login
     login_manager = LoginManager()
@@ -0,0 +1,113 @@
+import threading
+import time
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Per-upstream breaker: trips after consecutive failures, then lets a few probes through after a cool-down"""
+    def __init__(self, name, failure_threshold=5, reset_timeout=30, half_open_probes=1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0
+        self._probes = 0
+        self._rejected = 0
+        self._trips = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        now = time.time()
+        if self._state == OPEN and now - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probes = 0
+            self._opened_at = now
+        elif self._state == HALF_OPEN and now - self._opened_at >= self.reset_timeout:
+            # Probes whose outcome was never recorded must not wedge the breaker half-open
+            self._probes = 0
+            self._opened_at = now
+        return self._state
+
+    def allow(self):
+        """True if a call may go upstream now"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            self._rejected += 1
+            return False
+
+    def release_probe(self):
+        """Hand back a slot from allow() for a call that never went upstream, recording neither outcome"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_success(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            state = self._current_state()
+            self._failures += 1
+            # A failed probe re-opens immediately; otherwise trip on the threshold
+            if state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if state != OPEN:
+                    self._trips += 1
+                    print(f"DEBUG: Circuit for {self.name} opened after {self._failures} failures")
+                self._state = OPEN
+                self._opened_at = time.time()
+
+    def call(self, fn, *args, **kwargs):
+        """Run fn through the breaker; exceptions count as failures and CircuitOpenError means it was not attempted"""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self._current_state(),
+                'consecutive_failures': self._failures,
+                'trips': self._trips,
+                'rejected': self._rejected
+            }
+
+
+breakers = {
+    'finnhub': CircuitBreaker('finnhub'),
+    'yfinance': CircuitBreaker('yfinance'),
+    'exchangerate': CircuitBreaker('exchangerate')
+}
+
+
+def configure_breakers(app_config):
+    for breaker in breakers.values():
+        breaker.failure_threshold = app_config.get('CIRCUIT_FAILURE_THRESHOLD', 5)
+        breaker.reset_timeout = app_config.get('CIRCUIT_RESET_TIMEOUT', 30)
+    return breakers
@@ -0,0 +1,260 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class CacheStats:
+    """Thread-safe hit/miss/eviction counters for a single process"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.sets = 0
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'sets': self.sets
+            }
+
+
+class MemoryBackend:
+    """In-process LRU store with per-entry expiry"""
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.stats = CacheStats()
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.stats.incr('misses')
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                self.stats.incr('misses')
+                return None
+            self._data.move_to_end(key)
+            self.stats.incr('hits')
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            self.stats.incr('sets')
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.stats.incr('evictions')
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def size(self):
+        with self._lock:
+            return len(self._data)
+
+    def get_stats(self):
+        stats = self.stats.as_dict()
+        stats['size'] = self.size()
+        stats['maxsize'] = self.maxsize
+        stats['backend'] = 'memory'
+        return stats
+
+
+class RedisBackend:
+    """Redis-protocol store shared by every worker, LRU-bounded through a recency sorted set"""
+    def __init__(self, client=None, url=None, maxsize=1024, namespace='cashline:cache'):
+        if client is None:
+            if redis is None:
+                raise RuntimeError("The redis package is required for RedisBackend")
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.maxsize = maxsize
+        self.namespace = namespace
+        self._recency_key = f"{namespace}:__recency__"
+        self._stats_key = f"{namespace}:__stats__"
+
+    def _key(self, key):
+        return f"{self.namespace}:{key}"
+
+    def _incr(self, name, amount=1):
+        self.client.hincrby(self._stats_key, name, amount)
+
+    def get(self, key):
+        raw = self.client.get(self._key(key))
+        if raw is None:
+            self.client.zrem(self._recency_key, key)
+            self._incr('misses')
+            return None
+        self.client.zadd(self._recency_key, {key: time.time()})
+        self._incr('hits')
+        return json.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        pipe = self.client.pipeline()
+        if ttl:
+            pipe.set(self._key(key), json.dumps(value), ex=max(1, int(ttl)))
+        else:
+            pipe.set(self._key(key), json.dumps(value))
+        pipe.zadd(self._recency_key, {key: time.time()})
+        pipe.hincrby(self._stats_key, 'sets', 1)
+        pipe.zcard(self._recency_key)
+        size = pipe.execute()[-1]
+
+        overflow = size - self.maxsize
+        if overflow > 0:
+            evicted = self.client.zpopmin(self._recency_key, overflow)
+            if evicted:
+                keys = [k.decode() if isinstance(k, bytes) else k for k, _ in evicted]
+                self.client.delete(*[self._key(k) for k in keys])
+                self._incr('evictions', len(keys))
+
+    def delete(self, key):
+        self.client.delete(self._key(key))
+        self.client.zrem(self._recency_key, key)
+
+    def clear(self):
+        keys = [k.decode() if isinstance(k, bytes) else k for k in self.client.zrange(self._recency_key, 0, -1)]
+        if keys:
+            self.client.delete(*[self._key(k) for k in keys])
+        self.client.delete(self._recency_key)
+
+    def size(self):
+        return self.client.zcard(self._recency_key)
+
+    def get_stats(self):
+        raw = self.client.hgetall(self._stats_key)
+        stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'sets': 0}
+        for name, value in raw.items():
+            name = name.decode() if isinstance(name, bytes) else name
+            stats[name] = int(value)
+        stats['size'] = self.size()
+        stats['maxsize'] = self.maxsize
+        stats['backend'] = 'redis'
+        return stats
+
+
+class QuoteCache:
+    """Symbol-keyed quote cache with a default TTL on top of a pluggable backend
+
+    Entries outlive their TTL by stale_ttl seconds so an expired quote can still
+    be served, flagged as stale, while a fresh one is fetched. A backend that
+    errors (e.g. Redis going away) is treated as a miss on reads and skipped on writes.
+    """
+    def __init__(self, backend, ttl=60, stale_ttl=0):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.stale_served = 0
+        self.backend_errors = 0
+
+    def _backend_failed(self, action, e):
+        self.backend_errors += 1
+        print(f"DEBUG: Quote cache {action} failed, continuing without cache: {e}")
+
+    def _entry(self, symbol):
+        try:
+            entry = self.backend.get(f"quote:{symbol.upper()}")
+        except Exception as e:
+            self._backend_failed('read', e)
+            return None, False
+        if entry is None:
+            return None, False
+        entry = dict(entry)
+        fresh_until = entry.pop('fresh_until', None)
+        return entry, fresh_until is not None and time.time() >= fresh_until
+
+    def get(self, symbol):
+        """The cached quote while it is within its TTL"""
+        quote, stale = self._entry(symbol)
+        return None if stale else quote
+
+    def get_stale(self, symbol):
+        """The cached quote even past its TTL, with 'stale': True once it has expired"""
+        quote, stale = self._entry(symbol)
+        if quote is not None and stale:
+            self.stale_served += 1
+            quote['stale'] = True
+        return quote
+
+    def set(self, symbol, quote, ttl=None):
+        ttl = ttl if ttl is not None else self.ttl
+        entry = dict(quote, fresh_until=time.time() + ttl)
+        entry.pop('stale', None)
+        try:
+            self.backend.set(f"quote:{symbol.upper()}", entry, ttl + self.stale_ttl)
+        except Exception as e:
+            self._backend_failed('write', e)
+
+    def delete(self, symbol):
+        try:
+            self.backend.delete(f"quote:{symbol.upper()}")
+        except Exception as e:
+            self._backend_failed('delete', e)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        try:
+            stats = self.backend.get_stats()
+        except Exception as e:
+            self._backend_failed('stats', e)
+            stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'sets': 0, 'backend': 'unavailable'}
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0
+        stats['ttl'] = self.ttl
+        stats['stale_ttl'] = self.stale_ttl
+        stats['stale_served'] = self.stale_served
+        stats['backend_errors'] = self.backend_errors
+        return stats
+
+
+def build_backend(app_config):
+    """Pick the shared Redis backend when REDIS_URL is configured, otherwise stay in-process"""
+    maxsize = app_config.get('QUOTE_CACHE_MAXSIZE', 1024)
+    redis_url = app_config.get('REDIS_URL')
+    if redis_url:
+        try:
+            backend = RedisBackend(url=redis_url, maxsize=maxsize)
+            # from_url connects lazily, so check the server is actually reachable before relying on it
+            backend.client.ping()
+            return backend
+        except Exception as e:
+            print(f"DEBUG: Redis cache unavailable ({e}), falling back to in-process cache")
+    return MemoryBackend(maxsize=maxsize)
+
+
+quote_cache = QuoteCache(MemoryBackend())
+
+
+def configure_quote_cache(app_config):
+    """Point the shared quote cache at the backend and TTL from the app config"""
+    quote_cache.backend = build_backend(app_config)
+    quote_cache.ttl = app_config.get('QUOTE_CACHE_TTL', 60)
+    quote_cache.stale_ttl = app_config.get('QUOTE_STALE_TTL', 24 * 3600)
+    return quote_cache
@@ -0,0 +1,184 @@
+from datetime import date, datetime, timedelta
+
+from pymongo.errors import CollectionInvalid
+
+from .markethours import market_calendar
+from .providers import quote_providers
+from .refresher import LeaderLease, price_refresher
+
+
+def _as_datetime(day):
+    # Time-series collections need a BSON date in the time field
+    return datetime(day.year, day.month, day.day)
+
+
+class CandleStore:
+    """Daily OHLCV candles per symbol in a Mongo time-series collection, filled from the quote providers"""
+    def __init__(self, collection=None, providers=None, history_days=5 * 365, max_gap_days=7):
+        self.collection = collection
+        self.providers = providers or quote_providers
+        self.history_days = history_days
+        self.max_gap_days = max_gap_days
+        self.appended = 0
+        self.reads = 0
+
+    def ensure_collection(self, database, name='Candle'):
+        """Create the time-series collection on first use; an existing one is left as it is"""
+        try:
+            database.create_collection(name, timeseries={
+                'timeField': 'date',
+                'metaField': 'symbol',
+                'granularity': 'hours'
+            })
+        except CollectionInvalid:
+            pass
+        # Its (symbol, date) index is declared with the others in app/indexes.py
+        self.collection = database[name]
+
+    def latest_day(self, symbol):
+        doc = self.collection.find_one({'symbol': symbol}, {'date': 1, '_id': 0}, sort=[('date', -1)])
+        return doc['date'].date() if doc else None
+
+    def append(self, symbol, candles, after=None):
+        """Insert candles newer than after; returns how many were written"""
+        docs = [
+            {
+                'symbol': symbol,
+                'date': _as_datetime(c['date']),
+                'open': c['open'],
+                'high': c['high'],
+                'low': c['low'],
+                'close': c['close'],
+                'volume': c['volume']
+            }
+            for c in candles
+            if after is None or c['date'] > after
+        ]
+        if docs:
+            self.collection.insert_many(docs, ordered=False)
+            self.appended += len(docs)
+        return len(docs)
+
+    def sync(self, symbol, end=None):
+        """Fetch the days missing since the last stored candle; None means the upstream could not be reached"""
+        symbol = symbol.upper()
+        end = end or market_calendar.last_closed_day()
+        return self._sync_from(symbol, self.latest_day(symbol), end)
+
+    def _sync_from(self, symbol, latest, end):
+        start = latest + timedelta(days=1) if latest else end - timedelta(days=self.history_days)
+        if start > end:
+            return 0
+        candles = self.providers.candles(symbol, start, end, lane='background')
+        if candles is None:
+            return None
+        # Time-series collections have no unique indexes, so only strictly newer days are written
+        return self.append(symbol, candles, after=latest)
+
+    def backfill(self, symbols, end=None):
+        """Bring every symbol up to the last closed session, continuing past individual failures"""
+        written = 0
+        failed = []
+        for symbol in symbols:
+            try:
+                count = self.sync(symbol, end)
+            except Exception as e:
+                print(f"DEBUG: Candle sync failed for {symbol}: {e}")
+                count = None
+            if count is None:
+                failed.append(symbol)
+            else:
+                written += count
+        print(f"DEBUG: Appended {written} candles for {len(symbols) - len(failed)} of {len(symbols)} symbols")
+        return {'symbols': len(symbols), 'candles': written, 'failed': failed}
+
+    def append_closed_day(self, symbols, day, should_continue=None):
+        """The after-close job: append the newly closed session for symbols that are already loaded
+
+        Symbols with no candles, or further behind than max_gap_days, would need years of history
+        fetched through the background lane; they are reported and left to scripts/backfill_candles.py.
+        """
+        written = 0
+        failed = []
+        needs_backfill = []
+        for symbol in symbols:
+            # Lets the caller renew its lease between symbols and stop when it loses it
+            if should_continue is not None and not should_continue():
+                print("DEBUG: Candle append stopped before finishing")
+                break
+            symbol = symbol.upper()
+            try:
+                latest = self.latest_day(symbol)
+                if latest is None or (day - latest).days > self.max_gap_days:
+                    needs_backfill.append(symbol)
+                    continue
+                count = self._sync_from(symbol, latest, day)
+            except Exception as e:
+                print(f"DEBUG: Candle append failed for {symbol}: {e}")
+                count = None
+            if count is None:
+                failed.append(symbol)
+            else:
+                written += count
+        if needs_backfill:
+            print(f"DEBUG: {len(needs_backfill)} symbols need scripts/backfill_candles.py: {', '.join(needs_backfill)}")
+        print(f"DEBUG: Appended {written} candles for {day}")
+        return {'symbols': len(symbols), 'candles': written, 'failed': failed, 'needs_backfill': needs_backfill}
+
+    def get_candles(self, symbol, start, end=None):
+        """Stored candles for start..end inclusive, oldest first; never goes upstream"""
+        end = end or date.today()
+        self.reads += 1
+        cursor = self.collection.find(
+            {'symbol': symbol.upper(), 'date': {'$gte': _as_datetime(start), '$lte': _as_datetime(end)}},
+            {'_id': 0, 'symbol': 0}
+        ).sort('date', 1)
+        candles = {}
+        for doc in cursor:
+            day = doc['date'].date().isoformat()
+            # A backfill racing the daily append can write a day twice; the last write wins
+            candles[day] = {
+                'date': day,
+                'open': doc['open'],
+                'high': doc['high'],
+                'low': doc['low'],
+                'close': doc['close'],
+                'volume': doc['volume']
+            }
+        return list(candles.values())
+
+    def closes(self, start, end, symbols=None):
+        """(symbol, date, close) for every stored candle in range, streamed with only those fields"""
+        query = {'date': {'$gte': _as_datetime(start), '$lte': _as_datetime(end)}}
+        if symbols:
+            query['symbol'] = {'$in': [s.upper() for s in symbols]}
+        cursor = self.collection.find(query, {'_id': 0, 'symbol': 1, 'date': 1, 'close': 1}, batch_size=10000)
+        for doc in cursor:
+            yield doc['symbol'], doc['date'].date(), doc['close']
+
+    def stats(self):
+        return {'appended': self.appended, 'reads': self.reads, 'history_days': self.history_days, 'max_gap_days': self.max_gap_days}
+
+
+candle_store = CandleStore()
+
+
+def configure_candle_store(app_config, mongo_client):
+    """Attach the time-series collection and have the price refresher append each closed session"""
+    candle_store.history_days = app_config.get('CANDLE_HISTORY_DAYS', 5 * 365)
+    candle_store.max_gap_days = app_config.get('CANDLE_APPEND_MAX_GAP_DAYS', 7)
+    collection = mongo_client.getCollectionEndpoint('Candle')
+    candle_store.collection = collection
+    try:
+        candle_store.ensure_collection(collection.database)
+    except Exception as e:
+        print(f"DEBUG: Could not create Candle time-series collection: {e}")
+    if app_config.get('CANDLE_DAILY_APPEND', True):
+        price_refresher.after_close = candle_store.append_closed_day
+        # Separate from the refresher's lease: the append runs on its own thread and can take longer than a cycle
+        price_refresher.after_close_lease = LeaderLease(
+            mongo_client.getCollectionEndpoint('Lease'),
+            'candle-append',
+            ttl=app_config.get('CANDLE_APPEND_LEASE_TTL', 600)
+        )
+    return candle_store
@@ -0,0 +1,235 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .candles import candle_store
+from .markethours import market_calendar
+
+EPOCH = date(1970, 1, 1)
+
+
+class CloseSnapshot:
+    """One built generation: a shared date index and one float64 row of closes per symbol, memory-mapped read-only"""
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'manifest.json'), encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.symbols = self.manifest['symbols']
+        self._rows = {symbol: i for i, symbol in enumerate(self.symbols)}
+        days = self.manifest['days']
+        if days and self.symbols:
+            # mode='r' maps the files from the page cache, so every worker shares the same physical pages
+            self.dates = np.memmap(os.path.join(path, 'dates.i8'), dtype='datetime64[D]', mode='r', shape=(days,))
+            self.closes = np.memmap(os.path.join(path, 'closes.f8'), dtype='<f8', mode='r', shape=(len(self.symbols), days))
+        else:
+            self.dates = np.empty(0, dtype='datetime64[D]')
+            self.closes = np.empty((len(self.symbols), 0), dtype='<f8')
+
+    @property
+    def end(self):
+        return date.fromisoformat(self.manifest['end']) if self.manifest.get('end') else None
+
+    def _bounds(self, start, end):
+        lo = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(start, 'D'), side='left'))
+        hi = len(self.dates) if end is None else int(np.searchsorted(self.dates, np.datetime64(end, 'D'), side='right'))
+        return lo, hi
+
+    def series(self, symbol, start=None, end=None):
+        """(dates, closes) views for one symbol without copying; days with no candle are NaN"""
+        row = self._rows.get(symbol.upper())
+        if row is None:
+            return None
+        lo, hi = self._bounds(start, end)
+        return self.dates[lo:hi], self.closes[row, lo:hi]
+
+    def window(self, symbols, start=None, end=None):
+        """The shared date slice and a view of each known symbol's closes over it"""
+        lo, hi = self._bounds(start, end)
+        closes = {}
+        for symbol in symbols:
+            row = self._rows.get(symbol.upper())
+            if row is not None:
+                closes[symbol.upper()] = self.closes[row, lo:hi]
+        return self.dates[lo:hi], closes
+
+
+class ClosePriceCache:
+    """On-disk columnar cache of daily closes built from the candle store and swapped in atomically"""
+    def __init__(self, directory=None, store=None, years=10, check_interval=5, retry_interval=3600):
+        self.directory = directory or os.path.join(tempfile.gettempdir(), 'close_cache')
+        self.store = store or candle_store
+        self.years = years
+        self.check_interval = check_interval
+        self.retry_interval = retry_interval
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._target = None
+        self._checked_at = 0
+        self._build_attempted_at = 0
+        self._builds = 0
+
+    @property
+    def _current(self):
+        return os.path.join(self.directory, 'current')
+
+    def snapshot(self):
+        """The newest built generation, re-checked at most every check_interval seconds; None if never built"""
+        if np is None:
+            return None
+        now = time.time()
+        with self._lock:
+            if self._snapshot is not None and now - self._checked_at < self.check_interval:
+                return self._snapshot
+            self._checked_at = now
+            try:
+                target = os.readlink(self._current)
+            except OSError:
+                return self._snapshot
+            if target != self._target:
+                # Mappings of the previous generation stay valid for anyone still holding them
+                self._snapshot = CloseSnapshot(os.path.join(self.directory, target))
+                self._target = target
+            return self._snapshot
+
+    def series(self, symbol, start=None, end=None):
+        self.refresh_if_stale()
+        snapshot = self.snapshot()
+        return snapshot.series(symbol, start, end) if snapshot is not None else None
+
+    def window(self, symbols, start=None, end=None):
+        self.refresh_if_stale()
+        snapshot = self.snapshot()
+        if snapshot is None:
+            return None
+        return snapshot.window(symbols, start, end)
+
+    def build(self, end=None, symbols=None):
+        """Read closes from the candle store into a new generation and point 'current' at it"""
+        if np is None:
+            raise RuntimeError("numpy is required to build the close price cache")
+        end = end or market_calendar.last_closed_day()
+        start = end - timedelta(days=int(self.years * 365.25))
+        started = time.time()
+        self._build_attempted_at = started
+
+        rows = {}
+        for symbol, day, close in self.store.closes(start, end, symbols):
+            rows.setdefault(symbol, ([], []))
+            rows[symbol][0].append((day - EPOCH).days)
+            rows[symbol][1].append(close)
+        ordered = sorted(rows)
+        days = np.unique(np.concatenate([np.array(rows[s][0], dtype='<i8') for s in ordered])) if ordered else np.empty(0, dtype='<i8')
+
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"gen-{end.isoformat()}-{uuid.uuid4().hex[:8]}"
+        path = os.path.join(self.directory, name)
+        os.makedirs(path)
+        if len(days) and ordered:
+            days.tofile(os.path.join(path, 'dates.i8'))
+            closes = np.memmap(os.path.join(path, 'closes.f8'), dtype='<f8', mode='w+', shape=(len(ordered), len(days)))
+            closes[:] = np.nan
+            for i, symbol in enumerate(ordered):
+                offsets, values = rows[symbol]
+                closes[i, np.searchsorted(days, np.array(offsets, dtype='<i8'))] = values
+            closes.flush()
+            del closes
+        with open(os.path.join(path, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump({
+                'symbols': ordered,
+                'days': int(len(days)),
+                'start': start.isoformat(),
+                # The last day actually loaded, so a build that ran before the session's candles landed is retried
+                'end': (EPOCH + timedelta(days=int(days[-1]))).isoformat() if len(days) else None,
+                'built_at': datetime.utcnow().isoformat()
+            }, f)
+
+        # A symlink swapped with rename is atomic, so readers see the old generation or the new one, never half of one
+        link = os.path.join(self.directory, f".current-{uuid.uuid4().hex[:8]}")
+        os.symlink(name, link)
+        os.replace(link, self._current)
+        self._prune(keep={name})
+        self._builds += 1
+        print(f"DEBUG: Built close price cache for {len(ordered)} symbols x {len(days)} days in {time.time() - started:.2f}s")
+        return path
+
+    def _prune(self, keep):
+        # The generation just replaced is kept so readers mid-swap can still open it
+        generations = sorted(
+            (e for e in os.listdir(self.directory) if e.startswith('gen-') and e not in keep),
+            key=lambda e: os.path.getmtime(os.path.join(self.directory, e))
+        )
+        for entry in generations[:-1]:
+            shutil.rmtree(os.path.join(self.directory, entry), ignore_errors=True)
+
+    def refresh_if_stale(self, background=True):
+        """Rebuild when the cache ends before the last closed session; one worker per host builds at a time"""
+        if np is None:
+            return False
+        snapshot = self.snapshot()
+        expected = market_calendar.last_closed_day()
+        if snapshot is not None and snapshot.end is not None and snapshot.end >= expected:
+            return False
+        now = time.time()
+        with self._lock:
+            # Candles for the latest session may not be appended yet, so retries are spaced out
+            if now - self._build_attempted_at < self.retry_interval:
+                return False
+            self._build_attempted_at = now
+        if background:
+            threading.Thread(target=self._locked_build, args=(expected,), name='close-cache-build', daemon=True).start()
+        else:
+            self._locked_build(expected)
+        return True
+
+    def _locked_build(self, end):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, 'build.lock'), 'w') as lock:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return
+            try:
+                self.build(end)
+            except Exception as e:
+                print(f"DEBUG: Close price cache build failed: {e}")
+
+    def stats(self):
+        snapshot = self.snapshot()
+        return {
+            'available': np is not None,
+            'directory': self.directory,
+            'builds': self._builds,
+            'symbols': len(snapshot.symbols) if snapshot is not None else 0,
+            'days': snapshot.manifest['days'] if snapshot is not None else 0,
+            'end': snapshot.manifest.get('end') if snapshot is not None else None
+        }
+
+
+close_cache = ClosePriceCache()
+
+
+def configure_close_cache(app_config):
+    """Point the cache at its directory and start a background build if it is missing or behind"""
+    close_cache.directory = app_config.get('CLOSE_CACHE_DIR') or close_cache.directory
+    close_cache.years = app_config.get('CLOSE_CACHE_YEARS', 10)
+    if np is None:
+        print("DEBUG: numpy is not installed, close price cache disabled")
+    elif app_config.get('CLOSE_CACHE_ENABLED', True) and candle_store.collection is not None:
+        close_cache.refresh_if_stale()
+    return close_cache
@@ -0,0 +1,105 @@
+def bounded_distance(a, b, max_distance):
+    """Optimal-string-alignment edit distance (insert, delete, substitute, swap); max_distance + 1 once it is exceeded"""
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous_previous[j - 2] + 1)
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return min(previous[-1], max_distance + 1)
+
+
+def max_typos(term):
+    """Edit budget for a query term: none for very short terms, one for most, two for long ones"""
+    if len(term) < 3:
+        return 0
+    if len(term) <= 8:
+        return 1
+    return 2
+
+
+class DeletionIndex:
+    """One-deletion neighbourhood index for radius-1 lookups over short strings such as tickers"""
+    def __init__(self, words=()):
+        self.neighbours = {}
+        for word in words:
+            self.add(word)
+
+    @staticmethod
+    def _variants(word):
+        return {word} | {word[:i] + word[i + 1:] for i in range(len(word))}
+
+    def add(self, word):
+        for variant in self._variants(word):
+            self.neighbours.setdefault(variant, set()).add(word)
+
+    def search(self, word):
+        """Return (distance, word) pairs within one edit of word"""
+        candidates = set()
+        for variant in self._variants(word):
+            candidates |= self.neighbours.get(variant, set())
+        matches = []
+        for candidate in candidates:
+            distance = bounded_distance(word, candidate, 1)
+            if distance <= 1:
+                matches.append((distance, candidate))
+        return matches
+
+
+def trigrams(term):
+    padded = f" {term} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+class TrigramIndex:
+    """Trigram postings over a vocabulary, verified with bounded edit distance"""
+    def __init__(self, words=()):
+        self.words = []
+        self.postings = {}
+        for word in set(words):
+            self.add(word)
+
+    def add(self, word):
+        word_id = len(self.words)
+        self.words.append(word)
+        for gram in set(trigrams(word)):
+            self.postings.setdefault(gram, []).append(word_id)
+
+    def search(self, term, max_distance):
+        """Return (distance, word) pairs within max_distance of term"""
+        counts = {}
+        for gram in set(trigrams(term)):
+            for word_id in self.postings.get(gram, ()):
+                counts[word_id] = counts.get(word_id, 0) + 1
+
+        # A word of length n has n padded trigrams; each edit destroys at most three of
+        # them and a swap four, so allowing for one swap rules out most candidates before the DP
+        required = len(term) - 3 * max_distance - 1
+        matches = []
+        for word_id, shared in counts.items():
+            if shared < required:
+                continue
+            word = self.words[word_id]
+            if abs(len(word) - len(term)) > max_distance:
+                continue
+            if shared < len(word) - 3 * max_distance - 1:
+                continue
+            distance = bounded_distance(term, word, max_distance)
+            if distance <= max_distance:
+                matches.append((distance, word))
+        return matches
@@ -0,0 +1,239 @@
+import threading
+import time
+from datetime import datetime
+
+from .breaker import breakers
+from .cache import MemoryBackend
+from .httpclient import http_client
+
+
+class FxService:
+    """Caches whole exchangerate-api conversion tables and derives any pair by triangulating through one pivot table"""
+    def __init__(self, api_key=None, pivot='USD', ttl=6 * 3600, negative_ttl=60, refresh_ahead=0.8, max_stale=48 * 3600):
+        self.api_key = api_key
+        self.pivot = pivot
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.refresh_ahead = refresh_ahead
+        self.max_stale = max_stale
+        self._lock = threading.Lock()
+        self._tables = {}
+        self._failed_at = {}
+        self._refreshing = set()
+
+    def _fetch_table(self, base):
+        url = f"https://v6.exchangerate-api.com/v6/{self.api_key}/latest/{base}"
+        resp = breakers['exchangerate'].call(http_client.get, url, timeout=5)
+        data = resp.json()
+        if data.get('result') != 'success' or 'conversion_rates' not in data:
+            raise ValueError(data.get('error-type', 'unexpected response'))
+
+        # Never hold a table past the provider's own next publication
+        expires_at = time.time() + self.ttl
+        next_update = data.get('time_next_update_unix')
+        if next_update:
+            expires_at = min(expires_at, max(next_update, time.time() + self.negative_ttl))
+        return data['conversion_rates'], expires_at
+
+    def _load(self, base):
+        """Fetch a table and store it; failures are remembered only for negative_ttl seconds"""
+        try:
+            rates, expires_at = self._fetch_table(base)
+        except Exception as e:
+            print(f"DEBUG: Exchange rate table error for {base}: {e}")
+            with self._lock:
+                self._failed_at[base] = time.time()
+            return None
+        with self._lock:
+            self._tables[base] = (rates, time.time(), expires_at)
+            self._failed_at.pop(base, None)
+        print(f"DEBUG: Loaded {len(rates)} exchange rates for {base}")
+        return rates
+
+    def _refresh_in_background(self, base):
+        with self._lock:
+            if base in self._refreshing:
+                return
+            failed_at = self._failed_at.get(base)
+            if failed_at is not None and time.time() - failed_at < self.negative_ttl:
+                return
+            self._refreshing.add(base)
+
+        def run():
+            try:
+                self._load(base)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(base)
+
+        threading.Thread(target=run, name=f"fx-refresh-{base}", daemon=True).start()
+
+    def get_table(self, base=None):
+        """Return the conversion table for base, fetching synchronously only when nothing usable is cached"""
+        base = base or self.pivot
+        now = time.time()
+        with self._lock:
+            entry = self._tables.get(base)
+            failed_at = self._failed_at.get(base)
+
+        if entry is not None:
+            rates, fetched_at, expires_at = entry
+            if now >= fetched_at + (expires_at - fetched_at) * self.refresh_ahead:
+                self._refresh_in_background(base)
+            # Past expiry the old table is still served while the refresh runs
+            if now < expires_at + self.max_stale:
+                return rates
+
+        if failed_at is not None and now - failed_at < self.negative_ttl:
+            return None
+        return self._load(base)
+
+    def rate(self, base, target):
+        """Units of target per one unit of base"""
+        if base == target:
+            return 1.0
+        table = self.get_table(self.pivot)
+        if not table or base not in table or target not in table:
+            print(f"DEBUG: Exchange rate unavailable for {base}->{target}, using 1.0")
+            return 1.0
+        return table[target] / table[base]
+
+    def warm_up(self):
+        self._refresh_in_background(self.pivot)
+
+
+class HistoricalFxStore:
+    """Daily pivot-currency tables in Mongo, one compact document per base and day"""
+    def __init__(self, fx, collection=None, maxsize=512, negative_ttl=3600):
+        self.fx = fx
+        self.collection = collection
+        self.negative_ttl = negative_ttl
+        self.memory = MemoryBackend(maxsize=maxsize)
+        # Days the history API could not answer, so each one costs at most one paid call per negative_ttl
+        self.failed_days = MemoryBackend(maxsize=maxsize)
+        self._recorded_today = None
+
+    @staticmethod
+    def _day(value):
+        if isinstance(value, datetime):
+            return value.date()
+        return value
+
+    def _doc_id(self, day):
+        return f"{self.fx.pivot}:{day.isoformat()}"
+
+    def _save(self, day, rates):
+        if self.collection is None:
+            return
+        try:
+            self.collection.replace_one(
+                {'_id': self._doc_id(day)},
+                {'base': self.fx.pivot, 'date': datetime.combine(day, datetime.min.time()), 'rates': rates},
+                upsert=True
+            )
+        except Exception as e:
+            print(f"DEBUG: Could not store exchange rates for {day}: {e}")
+
+    def _fetch_history(self, day):
+        url = f"https://v6.exchangerate-api.com/v6/{self.fx.api_key}/history/{self.fx.pivot}/{day.year}/{day.month}/{day.day}"
+        resp = breakers['exchangerate'].call(http_client.get, url, timeout=5)
+        data = resp.json()
+        if data.get('result') != 'success' or 'conversion_rates' not in data:
+            raise ValueError(data.get('error-type', 'unexpected response'))
+        return data['conversion_rates']
+
+    def _nearest_stored(self, day):
+        if self.collection is None:
+            return None
+        try:
+            doc = self.collection.find_one(
+                {'base': self.fx.pivot, 'date': {'$lte': datetime.combine(day, datetime.min.time())}},
+                sort=[('date', -1)]
+            )
+        except Exception as e:
+            print(f"DEBUG: Exchange rate history lookup failed for {day}: {e}")
+            return None
+        return doc['rates'] if doc else None
+
+    def history_on(self, day):
+        """The table recorded for a past day: memory, then Mongo, then the history API; None when none has it"""
+        key = day.isoformat()
+        rates = self.memory.get(key)
+        if rates is not None:
+            return rates
+
+        if self.collection is not None:
+            try:
+                doc = self.collection.find_one({'_id': self._doc_id(day)})
+            except Exception as e:
+                print(f"DEBUG: Exchange rate history lookup failed for {day}: {e}")
+                doc = None
+            if doc:
+                rates = doc['rates']
+
+        if rates is None and self.fx.api_key and self.failed_days.get(key) is None:
+            try:
+                rates = self._fetch_history(day)
+                self._save(day, rates)
+            except Exception as e:
+                print(f"DEBUG: Exchange rate history unavailable for {day}: {e}")
+                self.failed_days.set(key, True, self.negative_ttl)
+
+        if rates is not None:
+            self.memory.set(key, rates)
+        return rates
+
+    def rates_on(self, day):
+        """Pivot table for a calendar day as (rates, exact)
+
+        exact is False when the day has no table of its own and the closest earlier stored day,
+        or failing that the live table, stands in for it.
+        """
+        day = self._day(day)
+        today = datetime.utcnow().date()
+        if day >= today:
+            rates = self.fx.get_table()
+            # Snapshot the live table once a day so history accumulates without the history API
+            if rates and self._recorded_today != today:
+                self._recorded_today = today
+                self._save(today, rates)
+            return rates, rates is not None
+
+        rates = self.history_on(day)
+        if rates is not None:
+            return rates, True
+
+        rates = self._nearest_stored(day)
+        if rates is None:
+            print(f"DEBUG: No exchange rates recorded on or before {day}, using the live table")
+            rates = self.fx.get_table()
+        else:
+            print(f"DEBUG: No exchange rates recorded for {day}, using the closest earlier day")
+        return rates, False
+
+    def rate_on(self, base, target, day):
+        """Units of target per one unit of base on the given day"""
+        if base == target:
+            return 1.0
+        table, _ = self.rates_on(day)
+        if not table or base not in table or target not in table:
+            print(f"DEBUG: Exchange rate unavailable for {base}->{target} on {day}, using 1.0")
+            return 1.0
+        return table[target] / table[base]
+
+
+fx_service = FxService()
+fx_history = HistoricalFxStore(fx_service)
+
+
+def configure_fx_service(app_config, mongo_client=None):
+    fx_service.api_key = app_config.get('EXCHANGE_RATE_API_KEY')
+    fx_service.pivot = app_config.get('FX_PIVOT_CURRENCY', 'USD')
+    fx_service.ttl = app_config.get('FX_TABLE_TTL', 6 * 3600)
+    fx_service.negative_ttl = app_config.get('FX_NEGATIVE_TTL', 60)
+    fx_history.negative_ttl = app_config.get('FX_HISTORY_NEGATIVE_TTL', 3600)
+    if mongo_client is not None:
+        fx_history.collection = mongo_client.getCollectionEndpoint('FxDaily')
+    if fx_service.api_key:
+        fx_service.warm_up()
+    return fx_service
@@ -0,0 +1,130 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Upper bounds (seconds) of the per-host latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float('inf'))
+
+
+class HostStats:
+    """Request count, error count, status classes and a latency histogram for one upstream host"""
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_seconds = 0.0
+        self.status = {}
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+
+    def observe(self, seconds, status=None, error=False, retries=0):
+        self.requests += 1
+        self.retries += retries
+        self.total_seconds += seconds
+        if error or (status is not None and status >= 500):
+            self.errors += 1
+        label = f"{status // 100}xx" if status is not None else 'error'
+        self.status[label] = self.status.get(label, 0) + 1
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'retries': self.retries,
+            'avg_seconds': round(self.total_seconds / self.requests, 4) if self.requests else 0,
+            'status': dict(self.status),
+            'latency_histogram': {
+                ('+Inf' if bound == float('inf') else f"{bound:g}"): count
+                for bound, count in zip(LATENCY_BUCKETS, self.buckets)
+            }
+        }
+
+
+class HttpClient:
+    """Shared outbound HTTP client: keep-alive pools per host, default timeouts, jittered retries for idempotent calls
+
+    Callers on a latency budget pass retry=False, so a slow upstream fails within one timeout and
+    the circuit breaker and hedging see it straight away instead of after every retry.
+    """
+    def __init__(self, pool_maxsize=32, retries=2, backoff_factor=0.2, backoff_jitter=0.2,
+                 connect_timeout=3.05, read_timeout=10):
+        self.timeout = (connect_timeout, read_timeout)
+        self._lock = threading.Lock()
+        self._hosts = {}
+        self.configure(pool_maxsize, retries, backoff_factor, backoff_jitter)
+
+    def configure(self, pool_maxsize=32, retries=2, backoff_factor=0.2, backoff_jitter=0.2):
+        # Only GET/HEAD/OPTIONS are retried; POSTs such as Gemini prompts are never replayed
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            backoff_jitter=backoff_jitter,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset({'GET', 'HEAD', 'OPTIONS'}),
+            raise_on_status=False,
+            respect_retry_after_header=True
+        )
+        self.session = self._session(pool_maxsize, retry)
+        self.fail_fast_session = self._session(pool_maxsize, Retry(total=0, raise_on_status=False))
+
+    def _session(self, pool_maxsize, retry):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=pool_maxsize, max_retries=retry)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def _host_stats(self, host):
+        stats = self._hosts.get(host)
+        if stats is None:
+            stats = self._hosts.setdefault(host, HostStats())
+        return stats
+
+    def request(self, method, url, timeout=None, retry=True, **kwargs):
+        host = urlsplit(url).hostname or 'unknown'
+        session = self.session if retry else self.fail_fast_session
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+        except requests.RequestException:
+            with self._lock:
+                self._host_stats(host).observe(time.perf_counter() - start, error=True)
+            raise
+
+        retry_state = getattr(response.raw, 'retries', None)
+        retries = len(retry_state.history) if retry_state is not None else 0
+        with self._lock:
+            self._host_stats(host).observe(time.perf_counter() - start, response.status_code, retries=retries)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def stats(self):
+        with self._lock:
+            return {host: stats.as_dict() for host, stats in self._hosts.items()}
+
+
+http_client = HttpClient()
+
+
+def configure_http_client(app_config):
+    http_client.timeout = (app_config.get('HTTP_CONNECT_TIMEOUT', 3.05), app_config.get('HTTP_READ_TIMEOUT', 10))
+    http_client.configure(
+        pool_maxsize=app_config.get('HTTP_POOL_MAXSIZE', 32),
+        retries=app_config.get('HTTP_RETRIES', 2)
+    )
+    return http_client
@@ -0,0 +1,102 @@
+import threading
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+
+def declared_indexes(app_config=None):
+    """Every index the application's queries rely on, by collection"""
+    app_config = app_config or {}
+    profile_ttl = app_config.get('COMPANY_PROFILE_TTL_DAYS', 90) * 24 * 3600
+    return {
+        # Login and registration look users up by either field
+        'User': [
+            IndexModel([('username', ASCENDING)], name='username_unique', unique=True),
+            IndexModel([('email', ASCENDING)], name='email_unique', unique=True)
+        ],
+        # The expenses page lists a user's expenses newest first
+        'Expense': [IndexModel([('user_id', ASCENDING), ('date', DESCENDING)], name='user_date')],
+        'Budget': [IndexModel([('user_id', ASCENDING), ('year', ASCENDING), ('month', ASCENDING)], name='user_year_month')],
+        'Investment': [IndexModel([('user_id', ASCENDING)], name='user')],
+        'Goal': [IndexModel([('user_id', ASCENDING)], name='user')],
+        'Asset': [IndexModel([('user_id', ASCENDING)], name='user')],
+        'RetirementPlan': [IndexModel([('user_id', ASCENDING)], name='user')],
+        'UserProfile': [IndexModel([('user_id', ASCENDING)], name='user')],
+        'CompanyProfile': [IndexModel([('fetched_at', ASCENDING)], name='fetched_at_ttl', expireAfterSeconds=profile_ttl)],
+        'Candle': [IndexModel([('symbol', ASCENDING), ('date', ASCENDING)], name='symbol_date')]
+        # FxDaily, Lease and RateLimit are only ever read by _id
+    }
+
+
+def _key(spec):
+    # index_information reports directions as floats on some servers
+    return tuple((field, int(direction) if isinstance(direction, float) else direction) for field, direction in spec)
+
+
+class IndexManager:
+    """Builds the declared indexes idempotently and compares them with what the server has"""
+    def __init__(self, database, declared):
+        self.database = database
+        self.declared = declared
+
+    def ensure(self, collections=None):
+        """Create any missing declared index; returns per-collection index names or the error that stopped them"""
+        existing = set(self.database.list_collection_names())
+        results = {}
+        for name, models in self.declared.items():
+            if collections and name not in collections:
+                continue
+            # Creating an index would create the collection, and Candle has to be made as a time-series one
+            if name == 'Candle' and name not in existing:
+                results[name] = {'skipped': 'collection does not exist yet'}
+                continue
+            try:
+                results[name] = {'indexes': self.database[name].create_indexes(models)}
+            except OperationFailure as e:
+                # Typically duplicate values under a unique index, or changed options on an existing one
+                print(f"DEBUG: Could not build indexes on {name}: {e}")
+                results[name] = {'error': str(e)}
+        return results
+
+    def _usage(self, collection):
+        try:
+            return {s['name']: s['accesses']['ops'] for s in collection.aggregate([{'$indexStats': {}}])}
+        except OperationFailure:
+            return None
+
+    def report(self):
+        """Missing declared indexes, plus undeclared and never-used ones per collection"""
+        report = {}
+        for name in sorted(set(self.declared) | set(self.database.list_collection_names())):
+            if name.startswith('system.'):
+                continue
+            collection = self.database[name]
+            declared = {_key(m.document['key'].items()): m.document['name'] for m in self.declared.get(name, [])}
+            try:
+                existing = {idx_name: _key(info['key']) for idx_name, info in collection.index_information().items()}
+            except OperationFailure as e:
+                report[name] = {'error': str(e)}
+                continue
+            existing_keys = set(existing.values())
+            usage = self._usage(collection)
+            report[name] = {
+                'missing': [idx_name for key, idx_name in declared.items() if key not in existing_keys],
+                'undeclared': [idx_name for idx_name, key in existing.items() if idx_name != '_id_' and key not in declared],
+                # Counters reset when the server restarts, so treat these as candidates rather than verdicts
+                'unused': [idx_name for idx_name in existing if idx_name != '_id_' and usage is not None and usage.get(idx_name, 0) == 0],
+                'usage': usage
+            }
+        return report
+
+
+def configure_indexes(app_config, mongo_client):
+    """Build the declared indexes in the background at startup so a slow build never delays the first request"""
+    manager = IndexManager(mongo_client.getDatabase(), declared_indexes(app_config))
+    if app_config.get('INDEX_BOOTSTRAP_ENABLED', True):
+        def run():
+            try:
+                manager.ensure()
+            except Exception as e:
+                print(f"DEBUG: Index bootstrap failed: {e}")
+        threading.Thread(target=run, name='index-bootstrap', daemon=True).start()
+    return manager
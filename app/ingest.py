@@ -0,0 +1,261 @@
+import json
+import random
+import threading
+import time
+from datetime import datetime
+
+try:
+    from websockets.sync.client import connect as ws_connect
+except ImportError:
+    ws_connect = None
+
+from .cache import quote_cache
+from .markethours import market_calendar
+from .operations import refresh_stock_price
+from .refresher import LeaderLease, held_symbols_pipeline
+
+
+class TradeConflater:
+    """Folds raw trade ticks into one last-price and day-change quote per symbol"""
+    def __init__(self, calendar=market_calendar):
+        self.calendar = calendar
+        self._lock = threading.Lock()
+        self._state = {}
+        self._dirty = set()
+
+    def seed(self, symbol, quote):
+        """Track a symbol, taking previous close and session open/high/low from a REST quote when one is available"""
+        with self._lock:
+            state = self._state.setdefault(symbol, {
+                'price': None, 'previous_close': None, 'open': None, 'high': None, 'low': None, 'timestamp': 0, 'day': None
+            })
+            if not quote:
+                return
+            state.update({
+                'price': state['price'] or quote.get('current_price'),
+                'previous_close': quote.get('previous_close') or quote.get('current_price'),
+                'open': state['open'] or quote.get('open') or None,
+                'high': max(state['high'] or 0, quote.get('high') or 0) or None,
+                'low': min(state['low'] or float('inf'), quote.get('low') or float('inf')),
+                'timestamp': max(state['timestamp'], quote.get('timestamp') or 0)
+            })
+            if state['low'] == float('inf'):
+                state['low'] = None
+            state['day'] = self._session_day(state['timestamp'])
+
+    def has_baseline(self, symbol):
+        with self._lock:
+            return self._state.get(symbol, {}).get('previous_close') is not None
+
+    def forget(self, symbol):
+        with self._lock:
+            self._state.pop(symbol, None)
+            self._dirty.discard(symbol)
+
+    def _session_day(self, timestamp):
+        return datetime.fromtimestamp(timestamp, self.calendar.tz).date() if timestamp else None
+
+    def add_trades(self, trades):
+        """Apply Finnhub trade records ({'s', 'p', 't' in ms, ...}); out-of-order ticks are ignored"""
+        with self._lock:
+            for trade in trades:
+                symbol = trade.get('s')
+                price = trade.get('p')
+                if symbol not in self._state or price is None:
+                    continue
+                state = self._state[symbol]
+                timestamp = trade.get('t', 0) / 1000.0
+                if timestamp < state['timestamp']:
+                    continue
+
+                day = self._session_day(timestamp)
+                if state['day'] is not None and day != state['day']:
+                    # First trade of a new session: yesterday's last price becomes the close
+                    state['previous_close'] = state['price']
+                    state['open'] = state['high'] = state['low'] = None
+                state['day'] = day
+
+                state['price'] = price
+                state['timestamp'] = timestamp
+                state['open'] = state['open'] or price
+                state['high'] = max(state['high'] or price, price)
+                state['low'] = min(state['low'] or price, price)
+                self._dirty.add(symbol)
+
+    def drain(self):
+        """Quotes for every symbol that traded since the last drain"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            quotes = {}
+            for symbol in dirty:
+                state = self._state[symbol]
+                previous_close = state['previous_close'] or state['price']
+                change = state['price'] - previous_close
+                quotes[symbol] = {
+                    'current_price': state['price'],
+                    'change': round(change, 4),
+                    'change_percent': round(change / previous_close * 100, 4) if previous_close else 0,
+                    'high': state['high'],
+                    'low': state['low'],
+                    'open': state['open'],
+                    'previous_close': previous_close,
+                    'timestamp': int(state['timestamp']),
+                    'source': 'stream'
+                }
+            return quotes
+
+
+class TradeIngestor:
+    """Keeps one Finnhub trade websocket subscribed to every held symbol and writes conflated quotes to the quote cache"""
+    def __init__(self, url='wss://ws.finnhub.io', api_key=None, investments=None, lease=None, seed=None,
+                 max_symbols=50, flush_interval=1.0, sync_interval=30):
+        self.url = url
+        self.api_key = api_key
+        self.investments = investments
+        self.lease = lease
+        self.seed = seed
+        self.max_symbols = max_symbols
+        self.flush_interval = flush_interval
+        self.sync_interval = sync_interval
+        self.conflater = TradeConflater()
+        self.subscribed = set()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {'connections': 0, 'messages': 0, 'trades': 0, 'quotes_written': 0, 'errors': 0}
+
+    def desired_symbols(self):
+        if self.investments is None:
+            return set()
+        try:
+            symbols = [doc['_id'] for doc in self.investments.aggregate(held_symbols_pipeline())]
+        except Exception as e:
+            print(f"DEBUG: Could not list held symbols for trade stream: {e}")
+            return set(self.subscribed)
+        if len(symbols) > self.max_symbols:
+            # Symbols past the per-connection cap stay on the REST refresher
+            print(f"DEBUG: Trade stream capped at {self.max_symbols} of {len(symbols)} held symbols")
+        return set(symbols[:self.max_symbols])
+
+    def sync_subscriptions(self, conn, desired=None):
+        """Subscribe to newly held symbols and drop ones nobody holds any more"""
+        desired = self.desired_symbols() if desired is None else desired
+        for symbol in sorted(desired - self.subscribed):
+            self.conflater.seed(symbol, None)
+            conn.send(json.dumps({'type': 'subscribe', 'symbol': symbol}))
+            self.subscribed.add(symbol)
+        # A failed seed is retried on later syncs; until then change is reported against the first trade
+        for symbol in sorted(desired):
+            if self.seed is not None and not self.conflater.has_baseline(symbol):
+                self.conflater.seed(symbol, self.seed(symbol))
+        for symbol in sorted(self.subscribed - desired):
+            conn.send(json.dumps({'type': 'unsubscribe', 'symbol': symbol}))
+            self.subscribed.discard(symbol)
+            self.conflater.forget(symbol)
+
+    def handle_message(self, raw):
+        self._stats['messages'] += 1
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            return
+        if message.get('type') == 'trade':
+            trades = message.get('data') or []
+            self._stats['trades'] += len(trades)
+            self.conflater.add_trades(trades)
+        elif message.get('type') == 'error':
+            print(f"DEBUG: Trade stream error: {message.get('msg')}")
+
+    def flush(self):
+        quotes = self.conflater.drain()
+        for symbol, quote in quotes.items():
+            quote_cache.set(symbol, quote, market_calendar.quote_ttl(quote['timestamp'], quote_cache.ttl))
+        self._stats['quotes_written'] += len(quotes)
+        return len(quotes)
+
+    def _session(self):
+        """One websocket connection, held until it drops, the lease is lost or the ingestor stops"""
+        url = f"{self.url}?token={self.api_key}" if self.api_key else self.url
+        with ws_connect(url, open_timeout=10, close_timeout=2) as conn:
+            self._stats['connections'] += 1
+            self.subscribed = set()
+            self.sync_subscriptions(conn)
+            last_flush = last_sync = time.time()
+            while not self._stop.is_set():
+                try:
+                    self.handle_message(conn.recv(timeout=self.flush_interval))
+                except TimeoutError:
+                    pass
+
+                now = time.time()
+                if now - last_flush >= self.flush_interval:
+                    self.flush()
+                    last_flush = now
+                if now - last_sync >= self.sync_interval:
+                    if self.lease is not None and not self.lease.acquire():
+                        print("DEBUG: Trade stream lost its lease, disconnecting")
+                        return
+                    self.sync_subscriptions(conn)
+                    last_sync = now
+            self.flush()
+
+    def _run(self):
+        backoff = 1
+        while not self._stop.is_set():
+            if self.lease is not None and not self.lease.acquire():
+                self._stop.wait(self.sync_interval + random.uniform(0, 5))
+                continue
+            try:
+                self._session()
+                backoff = 1
+            except Exception as e:
+                self._stats['errors'] += 1
+                print(f"DEBUG: Trade stream disconnected: {e}")
+            # Capped, jittered reconnect so a flapping upstream is not hammered
+            self._stop.wait(backoff + random.uniform(0, backoff))
+            backoff = min(backoff * 2, 60)
+
+    def start(self):
+        if ws_connect is None:
+            print("DEBUG: websockets is not installed, trade stream disabled")
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='trade-ingest', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self.lease is not None:
+            self.lease.release()
+
+    def stats(self):
+        stats = dict(self._stats)
+        stats['running'] = self._thread is not None and self._thread.is_alive()
+        stats['subscribed'] = len(self.subscribed)
+        return stats
+
+
+trade_ingestor = TradeIngestor()
+
+
+def configure_trade_ingestor(app_config, mongo_client):
+    """Stream trades for held symbols when enabled, the websockets package is present and a Finnhub key is set"""
+    finnhub_key = app_config.get('FINNHUB_API_KEY')
+    trade_ingestor.url = app_config.get('FINNHUB_WS_URL', 'wss://ws.finnhub.io')
+    trade_ingestor.api_key = finnhub_key
+    trade_ingestor.max_symbols = app_config.get('TRADE_STREAM_MAX_SYMBOLS', 50)
+    trade_ingestor.sync_interval = app_config.get('TRADE_STREAM_SYNC_INTERVAL', 30)
+    trade_ingestor.investments = mongo_client.getCollectionEndpoint('Investment')
+    # Finnhub allows one websocket per key, so only the lease holder connects
+    trade_ingestor.lease = LeaderLease(
+        mongo_client.getCollectionEndpoint('Lease'),
+        'trade-ingest',
+        ttl=trade_ingestor.sync_interval * 3
+    )
+    # Each newly subscribed symbol needs one REST quote for its previous close
+    trade_ingestor.seed = lambda symbol: refresh_stock_price(symbol, finnhub_key)
+
+    if app_config.get('TRADE_STREAM_ENABLED') and finnhub_key:
+        trade_ingestor.start()
+    return trade_ingestor
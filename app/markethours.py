@@ -0,0 +1,156 @@
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+EXCHANGE_TZ = ZoneInfo('America/New_York')
+REGULAR_OPEN = time(9, 30)
+REGULAR_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+
+# Closing auction prints can land a few minutes after the bell, so quotes stay short-lived until then
+CLOSE_SETTLE = timedelta(minutes=15)
+
+# A closed-market quote whose own timestamp predates the latest session is retried at this interval
+STALE_QUOTE_TTL = 15 * 60
+
+
+def easter_sunday(year):
+    """Gregorian Easter (anonymous Gregorian algorithm)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year, month, weekday, n):
+    first = date(year, month, 1)
+    return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def _last_weekday(year, month, weekday):
+    last = date(year, month + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day):
+    """Saturday holidays move to Friday, Sunday holidays to Monday"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=32)
+def nyse_holidays(year):
+    holidays = {
+        _nth_weekday(year, 1, 0, 3),                 # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),                 # Washington's Birthday
+        easter_sunday(year) - timedelta(days=2),     # Good Friday
+        _last_weekday(year, 5, 0),                   # Memorial Day
+        _observed(date(year, 7, 4)),                 # Independence Day
+        _nth_weekday(year, 9, 0, 1),                 # Labor Day
+        _nth_weekday(year, 11, 3, 4),                # Thanksgiving
+        _observed(date(year, 12, 25)),               # Christmas
+    }
+    # New Year's Day on a Saturday is not observed on the prior Friday
+    if date(year, 1, 1).weekday() != 5:
+        holidays.add(_observed(date(year, 1, 1)))
+    if year >= 2022:
+        holidays.add(_observed(date(year, 6, 19)))   # Juneteenth
+    return frozenset(holidays)
+
+
+@lru_cache(maxsize=32)
+def nyse_early_closes(year):
+    candidates = {
+        date(year, 7, 3),                                      # Day before Independence Day
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),      # Day after Thanksgiving
+        date(year, 12, 24),                                    # Christmas Eve
+    }
+    return frozenset(d for d in candidates if d.weekday() < 5 and d not in nyse_holidays(year))
+
+
+class MarketCalendar:
+    """Regular-session calendar for the US equity exchanges"""
+    def __init__(self, tz=EXCHANGE_TZ):
+        self.tz = tz
+
+    def _local(self, at):
+        if at is None:
+            return datetime.now(self.tz)
+        if at.tzinfo is None:
+            at = at.replace(tzinfo=timezone.utc)
+        return at.astimezone(self.tz)
+
+    def is_trading_day(self, day):
+        return day.weekday() < 5 and day not in nyse_holidays(day.year)
+
+    def session(self, day):
+        """(open, close) for a trading day as exchange-local datetimes, or None"""
+        if not self.is_trading_day(day):
+            return None
+        close = EARLY_CLOSE if day in nyse_early_closes(day.year) else REGULAR_CLOSE
+        return datetime.combine(day, REGULAR_OPEN, self.tz), datetime.combine(day, close, self.tz)
+
+    def is_open(self, at=None):
+        at = self._local(at)
+        session = self.session(at.date())
+        return session is not None and session[0] <= at < session[1]
+
+    def next_open(self, at=None):
+        at = self._local(at)
+        day = at.date()
+        for _ in range(15):
+            session = self.session(day)
+            if session is not None and at < session[0]:
+                return session[0]
+            day += timedelta(days=1)
+        raise ValueError(f"No trading session within 15 days of {at}")
+
+    def last_session(self, at=None):
+        """The most recent session that has already opened"""
+        at = self._local(at)
+        day = at.date()
+        for _ in range(15):
+            session = self.session(day)
+            if session is not None and session[0] <= at:
+                return session
+            day -= timedelta(days=1)
+        raise ValueError(f"No trading session within 15 days of {at}")
+
+    def last_closed_day(self, at=None):
+        """Date of the most recent session that has already closed"""
+        at = self._local(at)
+        session_open, session_close = self.last_session(at)
+        if at >= session_close:
+            return session_open.date()
+        return self.last_session(session_open - timedelta(seconds=1))[0].date()
+
+    def quote_ttl(self, quote_timestamp, open_ttl, now=None):
+        """Seconds a quote stays fresh: open_ttl in session, otherwise until the next open once the quote is final"""
+        now = self._local(now)
+        if self.is_open(now):
+            return open_ttl
+
+        session_open, session_close = self.last_session(now)
+        if now < session_close + CLOSE_SETTLE:
+            return open_ttl
+
+        # Only a quote stamped within the latest session is that session's final price
+        quoted_at = datetime.fromtimestamp(quote_timestamp, self.tz) if quote_timestamp else None
+        if quoted_at is None or quoted_at < session_open:
+            return max(open_ttl, STALE_QUOTE_TTL)
+
+        # Timestamps rather than datetime subtraction, which ignores a DST change in between
+        return max(open_ttl, int(self.next_open(now).timestamp() - now.timestamp()))
+
+
+market_calendar = MarketCalendar()
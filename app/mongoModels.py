@@ -3,31 +3,63 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 from datetime import datetime
 
-class User(UserMixin):
-    def __init__(self, 
-                 _id = ObjectId(),
+
+def _compile_decoder(cls):
+    """Build cls.from_doc as straight-line attribute stores, skipping __init__ and its keyword handling"""
+    lines = [f"def from_doc(doc, _new=_new, _cls=_cls):", "    obj = _new(_cls)", "    get = doc.get"]
+    lines += [f"    obj.{field} = get({field!r})" for field in cls.FIELDS]
+    lines.append("    return obj")
+    namespace = {'_new': object.__new__, '_cls': cls}
+    exec("\n".join(lines), namespace)
+    return namespace['from_doc']
+
+
+class Model:
+    """Slotted document model; FIELDS are the stored attributes, which double as the document keys"""
+    __slots__ = ()
+    FIELDS = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.from_doc = staticmethod(_compile_decoder(cls))
+
+    def to_doc(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def getid(self):
+        return str(self._id)
+
+
+class User(Model, UserMixin):
+    __slots__ = FIELDS = ('_id', 'username', 'email', 'password_hash', 'created_at')
+
+    def __init__(self,
+                 _id = None,
                  username = None,
                  email = None,
                  password_hash = None,
-                 created_at = datetime.now()):
-        self._id = _id
+                 created_at = None):
+        self._id = _id if _id is not None else ObjectId()
         self.username = username
         self.email = email
         self.password_hash = password_hash
-        self.created_at = created_at
+        self.created_at = created_at if created_at is not None else datetime.now()
 
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
 
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
-    
+
     def get_id(self):
         return str(self._id)
-    
-class UserProfile():
-    def __init__(self, user_id, age=None, ra=None, cs=None, eri=None, csave=None, mc=None, rt=None, created_at=datetime.now(), updated_at=datetime.now(), _id=ObjectId()):
-        self._id=_id
+
+class UserProfile(Model):
+    __slots__ = FIELDS = ('_id', 'user_id', 'age', 'retirement_age', 'current_salary', 'expected_retirement_income',
+                          'current_savings', 'monthly_contribution', 'risk_tolerance', 'created_at', 'updated_at')
+
+    def __init__(self, user_id, age=None, ra=None, cs=None, eri=None, csave=None, mc=None, rt=None, created_at=None, updated_at=None, _id=None):
+        self._id = _id if _id is not None else ObjectId()
         self.user_id = user_id
         self.age = age
         self.retirement_age = ra
@@ -36,15 +68,15 @@ class UserProfile():
         self.current_savings = csave
         self.monthly_contribution = mc
         self.risk_tolerance = rt
-        self.created_at = created_at
-        self.updated_at = updated_at
+        self.created_at = created_at if created_at is not None else datetime.now()
+        self.updated_at = updated_at if updated_at is not None else datetime.now()
 
-    def getid(self):
-        return str(self._id)
+class Asset(Model):
+    __slots__ = FIELDS = ('_id', 'user_id', 'symbol', 'name', 'asset_type', 'expected_return', 'weight', 'risk_level',
+                          'created_at', 'updated_at')
 
-class Asset():
-    def __init__(self, user_id, symbol, name, asset_type, expected_return, weight, risk_level, created_at=datetime.now(), updated_at=datetime.now(), _id=ObjectId()):
-        self._id = _id
+    def __init__(self, user_id, symbol, name, asset_type, expected_return, weight, risk_level, created_at=None, updated_at=None, _id=None):
+        self._id = _id if _id is not None else ObjectId()
         self.user_id = user_id
         self.symbol = symbol
         self.name = name
@@ -52,15 +84,15 @@ class Asset():
         self.expected_return = expected_return
         self.weight = weight
         self.risk_level = risk_level
-        self.created_at = created_at
-        self.updated_at = updated_at
+        self.created_at = created_at if created_at is not None else datetime.now()
+        self.updated_at = updated_at if updated_at is not None else datetime.now()
 
-    def getid(self):
-        return str(self._id)
+class RetirementPlan(Model):
+    __slots__ = FIELDS = ('_id', 'user_id', 'name', 'target_amount', 'years_to_retirement', 'expected_return_rate',
+                          'monthly_contribution_needed', 'projected_amount', 'created_at', 'updated_at')
 
-class RetirementPlan():
-    def __init__(self, user_id, name, target_amount, err, mcn, pa, ytr = 0, c_at=datetime.now(), u_at=datetime.now(), _id=ObjectId()):
-        self._id = _id
+    def __init__(self, user_id, name, target_amount, err, mcn, pa, ytr = 0, c_at=None, u_at=None, _id=None):
+        self._id = _id if _id is not None else ObjectId()
         self.user_id = user_id
         self.name = name
         self.target_amount = target_amount
@@ -68,28 +100,27 @@ class RetirementPlan():
         self.expected_return_rate = err
         self.monthly_contribution_needed = mcn
         self.projected_amount = pa
-        self.created_at = c_at
-        self.updated_at = u_at
+        self.created_at = c_at if c_at is not None else datetime.now()
+        self.updated_at = u_at if u_at is not None else datetime.now()
 
-    def getid(self):
-        return str(self._id)
+class Budget(Model):
+    __slots__ = FIELDS = ('_id', 'user_id', 'category', 'limit_amount', 'month', 'year', 'created_at')
 
-class Budget():
-    def __init__(self, user_id, category, limit_amount, month, year, created_at=datetime.now(), _id=ObjectId()):
-        self._id = _id
+    def __init__(self, user_id, category, limit_amount, month, year, created_at=None, _id=None):
+        self._id = _id if _id is not None else ObjectId()
         self.user_id = user_id
         self.category = category
         self.limit_amount = limit_amount
         self.month = month
         self.year = year
-        self.created_at = created_at
+        self.created_at = created_at if created_at is not None else datetime.now()
 
-    def getid(self):
-        return str(self._id)
+class Expense(Model):
+    __slots__ = FIELDS = ('_id', 'user_id', 'category', 'amount', 'description', 'date', 'currency',
+                          'converted_amount_usd', 'created_at')
 
-class Expense():
-    def __init__(self, user_id, amount, category, description, date, currency, converted_amount_usd, created_at=datetime.now(), _id=ObjectId()):
-        self._id = _id
+    def __init__(self, user_id, amount, category, description, date, currency, converted_amount_usd, created_at=None, _id=None):
+        self._id = _id if _id is not None else ObjectId()
         self.user_id = user_id
         self.category = category
         self.amount = amount
@@ -97,34 +128,29 @@ class Expense():
         self.date = date
         self.currency = currency
         self.converted_amount_usd = converted_amount_usd
-        self.created_at = created_at
+        self.created_at = created_at if created_at is not None else datetime.now()
 
-    def getid(self):
-        return str(self._id)
+class Investment(Model):
+    __slots__ = FIELDS = ('_id', 'user_id', 'symbol', 'shares', 'purchase_price', 'purchase_date', 'created_at', 'updated_at')
 
-class Investment():
-    def __init__(self, user_id, symbol, shares, purchase_price, purchase_date, updated_at=datetime.now(), created_at=datetime.now(), _id=ObjectId()):
-        self._id = _id
+    def __init__(self, user_id, symbol, shares, purchase_price, purchase_date, updated_at=None, created_at=None, _id=None):
+        self._id = _id if _id is not None else ObjectId()
         self.user_id = user_id
         self.symbol = symbol
         self.shares = shares
         self.purchase_price = purchase_price
         self.purchase_date = purchase_date
-        self.created_at = created_at
-        self.updated_at = updated_at
+        self.created_at = created_at if created_at is not None else datetime.now()
+        self.updated_at = updated_at if updated_at is not None else datetime.now()
 
-    def getid(self):
-        return str(self._id)
+class Goal(Model):
+    __slots__ = FIELDS = ('_id', 'user_id', 'name', 'target_amount', 'current_amount', 'target_date', 'created_at')
 
-class Goal():
-    def __init__(self, user_id, name, target_amount, current_amount, target_date, created_at=datetime.now(), _id=ObjectId()):
-        self._id = _id
+    def __init__(self, user_id, name, target_amount, current_amount, target_date, created_at=None, _id=None):
+        self._id = _id if _id is not None else ObjectId()
         self.user_id = user_id
         self.name = name
         self.target_amount = target_amount
         self.current_amount = current_amount
         self.target_date = target_date
-        self.created_at = created_at
-
-    def getid(self):
-        return str(self._id)
\ No newline at end of file
+        self.created_at = created_at if created_at is not None else datetime.now()
@@ -8,144 +8,88 @@ import requests
 import json
 from functools import lru_cache
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from bson import ObjectId
 
 from .mongoModels import Investment, User, Budget, Expense, Goal, UserProfile, Asset, RetirementPlan
+from .cache import quote_cache
+from .ratelimit import finnhub_limiter
+from .breaker import breakers
+from .httpclient import http_client
+from .singleflight import quote_flight, profile_flight
+from .profiles import profile_store
+from .symbols import get_symbol_index
+from .fx import fx_service, fx_history
+from .markethours import market_calendar
+from .providers import quote_providers, finnhub_provider
+from .repository import Repository
+from .unitofwork import unit_of_work
+from .rollups import expense_rollup
 
 class mongoDBClient:
     def __init__(self, uri):
         self.uri = uri
         self.client = MongoClient(self.uri, server_api=ServerApi('1'))
 
+    def getDatabase(self):
+        return self.client.get_database("cashline")
+
     def getCollectionEndpoint(self, name):
-        return self.client.get_database("cashline").get_collection(name)
+        return self.getDatabase().get_collection(name)
+
+    def getRepository(self, name):
+        """Projection-aware reads for a collection, see app/repository.py"""
+        return Repository(self.getCollectionEndpoint(name), REPOSITORY_MODELS.get(name))
     
     def __del__(self):
         self.client.close()
 
 class deserializeDoc:
+    # Each model's from_doc is generated from its FIELDS, so a document decodes without going through __init__
     @staticmethod
     def user(doc):
-        if not doc:
-            return None
-        return User(
-            _id=doc.get('_id'),
-            username=doc.get('username'),
-            email=doc.get('email'),
-            password_hash=doc.get('password_hash'),
-            created_at=doc.get('created_at')
-        )
+        return User.from_doc(doc) if doc else None
 
     @staticmethod
     def user_profile(doc):
-        if not doc:
-            return None
-        return UserProfile(
-            user_id=doc.get('user_id'),
-            age=doc.get('age'),
-            ra=doc.get('retirement_age'),
-            cs=doc.get('current_salary'),
-            eri=doc.get('expected_retirement_income'),
-            csave=doc.get('current_savings'),
-            mc=doc.get('monthly_contribution'),
-            rt=doc.get('risk_tolerance'),
-            created_at=doc.get('created_at'),
-            updated_at=doc.get('updated_at'),
-            _id=doc.get('_id')
-        )
+        return UserProfile.from_doc(doc) if doc else None
 
     @staticmethod
     def asset(doc):
-        if not doc:
-            return None
-        return Asset(
-            user_id=doc.get('user_id'),
-            symbol=doc.get('symbol'),
-            name=doc.get('name'),
-            asset_type=doc.get('asset_type'),
-            expected_return=doc.get('expected_return'),
-            weight=doc.get('weight'),
-            risk_level=doc.get('risk_level'),
-            created_at=doc.get('created_at'),
-            updated_at=doc.get('updated_at'),
-            _id=doc.get('_id')
-        )
+        return Asset.from_doc(doc) if doc else None
 
     @staticmethod
     def retirement_plan(doc):
-        if not doc:
-            return None
-        return RetirementPlan(
-            user_id=doc.get('user_id'),
-            name=doc.get('name'),
-            target_amount=doc.get('target_amount'),
-            ytr=doc.get('years_to_retirment'),
-            err=doc.get('expected_return_rate'),
-            mcn=doc.get('monthly_contribution_needed'),
-            pa=doc.get('projected_amount'),
-            c_at=doc.get('created_at'),
-            u_at=doc.get('updated_at'),
-            _id=doc.get('_id')
-        )
+        return RetirementPlan.from_doc(doc) if doc else None
 
     @staticmethod
     def budget(doc):
-        if not doc:
-            return None
-        return Budget(
-            user_id=doc.get('user_id'),
-            category=doc.get('category'),
-            limit_amount=doc.get('limit_amount'),
-            month=doc.get('month'),
-            year=doc.get('year'),
-            created_at=doc.get('created_at'),
-            _id=doc.get('_id')
-        )
+        return Budget.from_doc(doc) if doc else None
 
     @staticmethod
     def expense(doc):
-        if not doc:
-            return None
-        return Expense(
-            user_id=doc.get('user_id'),
-            amount=doc.get('amount'),
-            category=doc.get('category'),
-            description=doc.get('description'),
-            date=doc.get('date'),
-            currency=doc.get('currency'),
-            converted_amount_usd=doc.get('converted_amount_usd'),
-            created_at=doc.get('created_at'),
-            _id=doc.get('_id')
-        )
+        return Expense.from_doc(doc) if doc else None
 
     @staticmethod
     def investment(doc):
-        if not doc:
-            return None
-        return Investment(
-            user_id=doc.get('user_id'),
-            symbol=doc.get('symbol'),
-            shares=doc.get('shares'),
-            purchase_price=doc.get('purchase_price'),
-            purchase_date=doc.get('purchase_date'),
-            created_at=doc.get('created_at'),
-            _id=doc.get('_id')
-        )
+        return Investment.from_doc(doc) if doc else None
 
     @staticmethod
     def goal(doc):
-        if not doc:
-            return None
-        return Goal(
-            user_id=doc.get('user_id'),
-            name=doc.get('name'),
-            target_amount=doc.get('target_amount'),
-            current_amount=doc.get('current_amount'),
-            target_date=doc.get('target_date'),
-            created_at=doc.get('created_at'),
-            _id=doc.get('_id')
-        )
-    
+        return Goal.from_doc(doc) if doc else None
+
+REPOSITORY_MODELS = {
+    'User': deserializeDoc.user,
+    'UserProfile': deserializeDoc.user_profile,
+    'Asset': deserializeDoc.asset,
+    'RetirementPlan': deserializeDoc.retirement_plan,
+    'Budget': deserializeDoc.budget,
+    'Expense': deserializeDoc.expense,
+    'Investment': deserializeDoc.investment,
+    'Goal': deserializeDoc.goal
+}
+
 def get_currency_symbol(code):
     CURRENCY_LIST = [
         ('USD', '$'), ('EUR', '€'), ('GBP', '£'), ('INR', '₹'),
@@ -158,91 +102,62 @@ def get_currency_symbol(code):
             return s
     return code
 
-@lru_cache(maxsize=32)
 def fetch_exchange_rate(base, target, api_key):
-    if base == target:
-        return 1.0
-    try:
-        url = f"https://v6.exchangerate-api.com/v6/{api_key}/latest/{base}"
-        resp = requests.get(url, timeout=5)
-        data = resp.json()
-        rate = data['conversion_rates'][target]
-        print(f"DEBUG: Exchange rate {base}->{target}: {rate}")
-        return rate
-    except Exception as e:
-        print(f"DEBUG: Exchange rate error for {base}->{target}: {e}")
-        return 1.0
+    """Get the base->target rate from the cached, triangulated FX tables"""
+    if api_key and not fx_service.api_key:
+        fx_service.api_key = api_key
+    return fx_service.rate(base, target)
+
+def fetch_exchange_rate_on(base, target, day, api_key):
+    """Get the base->target rate that applied on a given day"""
+    if api_key and not fx_service.api_key:
+        fx_service.api_key = api_key
+    return fx_history.rate_on(base, target, day)
 
 def search_stock_api(symbol, finnhub_key):
-    """Search for stock information using multiple fallback options"""
+    """Search for stock information in the local symbol index, falling back to Finnhub"""
     symbol = symbol.upper().strip()
     
-    # Curated list of popular stocks as fallback
-    popular_stocks = {
-        'AAPL': {'name': 'Apple Inc.', 'type': 'Stock', 'region': 'US'},
-        'MSFT': {'name': 'Microsoft Corporation', 'type': 'Stock', 'region': 'US'},
-        'GOOGL': {'name': 'Alphabet Inc.', 'type': 'Stock', 'region': 'US'},
-        'AMZN': {'name': 'Amazon.com Inc.', 'type': 'Stock', 'region': 'US'},
-        'TSLA': {'name': 'Tesla Inc.', 'type': 'Stock', 'region': 'US'},
-        'META': {'name': 'Meta Platforms Inc.', 'type': 'Stock', 'region': 'US'},
-        'NVDA': {'name': 'NVIDIA Corporation', 'type': 'Stock', 'region': 'US'},
-        'BRK.A': {'name': 'Berkshire Hathaway Inc.', 'type': 'Stock', 'region': 'US'},
-        'JNJ': {'name': 'Johnson & Johnson', 'type': 'Stock', 'region': 'US'},
-        'V': {'name': 'Visa Inc.', 'type': 'Stock', 'region': 'US'},
-        'JPM': {'name': 'JPMorgan Chase & Co.', 'type': 'Stock', 'region': 'US'},
-        'PG': {'name': 'Procter & Gamble Co.', 'type': 'Stock', 'region': 'US'},
-        'UNH': {'name': 'UnitedHealth Group Inc.', 'type': 'Stock', 'region': 'US'},
-        'HD': {'name': 'Home Depot Inc.', 'type': 'Stock', 'region': 'US'},
-        'MA': {'name': 'Mastercard Inc.', 'type': 'Stock', 'region': 'US'},
-        'DIS': {'name': 'Walt Disney Co.', 'type': 'Stock', 'region': 'US'},
-        'PYPL': {'name': 'PayPal Holdings Inc.', 'type': 'Stock', 'region': 'US'},
-        'NFLX': {'name': 'Netflix Inc.', 'type': 'Stock', 'region': 'US'},
-        'CRM': {'name': 'Salesforce Inc.', 'type': 'Stock', 'region': 'US'},
-        'INTC': {'name': 'Intel Corporation', 'type': 'Stock', 'region': 'US'},
-        'VTI': {'name': 'Vanguard Total Stock Market ETF', 'type': 'ETF', 'region': 'US'},
-        'VOO': {'name': 'Vanguard S&P 500 ETF', 'type': 'ETF', 'region': 'US'},
-        'QQQ': {'name': 'Invesco QQQ Trust', 'type': 'ETF', 'region': 'US'},
-        'SPY': {'name': 'SPDR S&P 500 ETF Trust', 'type': 'ETF', 'region': 'US'},
-        'BND': {'name': 'Vanguard Total Bond Market ETF', 'type': 'ETF', 'region': 'US'},
-        'GLD': {'name': 'SPDR Gold Shares', 'type': 'ETF', 'region': 'US'},
-        'TLT': {'name': 'iShares 20+ Year Treasury Bond ETF', 'type': 'ETF', 'region': 'US'},
-        'IEMG': {'name': 'iShares Core MSCI Emerging Markets ETF', 'type': 'ETF', 'region': 'US'},
-        'EFA': {'name': 'iShares MSCI EAFE ETF', 'type': 'ETF', 'region': 'US'}
-    }
-    
-    # First, try exact match in popular stocks
-    if symbol in popular_stocks:
-        stock_info = popular_stocks[symbol]
-        return [{
-            'symbol': symbol,
-            'name': stock_info['name'],
-            'type': stock_info['type'],
-            'region': stock_info['region']
-        }]
-    
-    # Then, try partial matches in popular stocks
-    matches = []
-    for ticker, info in popular_stocks.items():
-        if symbol in ticker or symbol in info['name'].upper():
-            matches.append({
-                'symbol': ticker,
-                'name': info['name'],
-                'type': info['type'],
-                'region': info['region']
-            })
-            if len(matches) >= 5:
-                break
-    
-    # If we found matches, return them
+    # The bundled exchange listing answers almost every query without a network call
+    index = get_symbol_index()
+    matches = index.search(symbol, limit=5)
+    if matches and index.is_authoritative(symbol):
+        return matches
+
+    # Name-only hits for a ticker-shaped query go after whatever Finnhub knows under that ticker
+    matches = _merge_matches(_search_finnhub(symbol, finnhub_key), matches)
     if matches:
         return matches
-    
+
+    # Typo neighbours are the last resort, so a real ticker missing from the listing (SNOW) never turns into NOW
+    return index.fuzzy_search(symbol, limit=5)
+
+def _merge_matches(first, second, limit=5):
+    merged = []
+    seen = set()
+    for match in first + second:
+        if match['symbol'] not in seen:
+            seen.add(match['symbol'])
+            merged.append(match)
+    return merged[:limit]
+
+def _search_finnhub(symbol, finnhub_key):
+    """Finnhub /search results in the local index's shape; an empty list when it has none or cannot be asked"""
     # Try Finnhub API (recommended - free tier with 60 calls/minute)
     try:
-        if finnhub_key:
+        if finnhub_key and breakers['finnhub'].allow():
+            if not finnhub_limiter.acquire('interactive'):
+                # Never went upstream, so a half-open probe slot goes back for a real call
+                breakers['finnhub'].release_probe()
+                return []
             url = f"https://finnhub.io/api/v1/search?q={symbol}&token={finnhub_key}"
-            response = requests.get(url, timeout=5)
-            data = response.json()
+            try:
+                response = http_client.get(url, timeout=5, retry=False)
+                data = response.json()
+            except Exception:
+                breakers['finnhub'].record_failure()
+                raise
+            breakers['finnhub'].record_success()
             
             if 'result' in data and data['result']:
                 api_matches = []
@@ -257,65 +172,128 @@ def search_stock_api(symbol, finnhub_key):
     except Exception as e:
         print(f"Finnhub API error: {e}")
     
-    # If no API results, return empty list
     return []
 
-def get_stock_price(symbol, finnhub_key):
-    """Get real-time stock price from Finnhub API with fallback to purchase price"""
-    try:
-        if finnhub_key and finnhub_key != 'your-finnhub-api-key-here':
-            url = f"https://finnhub.io/api/v1/quote?symbol={symbol}&token={finnhub_key}"
-            response = requests.get(url, timeout=5)
-            data = response.json()
-            
-            if 'c' in data and data['c'] is not None:
-                return {
-                    'current_price': data['c'],
-                    'change': data.get('d', 0),
-                    'change_percent': data.get('dp', 0),
-                    'high': data.get('h', 0),
-                    'low': data.get('l', 0),
-                    'open': data.get('o', 0),
-                    'previous_close': data.get('pc', 0),
-                    'timestamp': data.get('t', 0)
-                }
+def get_stock_price(symbol, finnhub_key, lane='interactive'):
+    """Get real-time stock price, served from the shared quote cache when possible"""
+    cached = quote_cache.get_stale(symbol)
+    if cached is not None:
+        if cached.get('stale'):
+            _revalidate_stock_price(symbol, finnhub_key)
+        return cached
+    
+    return _load_stock_price(symbol, finnhub_key, lane)
+
+def refresh_stock_price(symbol, finnhub_key, lane='background'):
+    """Fetch a fresh quote into the shared quote cache, ignoring whatever is cached now"""
+    # Outside the session a cached quote is already the closing price, and
+    # symbols on the trade stream are kept current without polling
+    cached = quote_cache.get(symbol)
+    if cached is not None and (cached.get('source') == 'stream' or not market_calendar.is_open()):
+        return cached
+    return _load_stock_price(symbol, finnhub_key, lane)
+
+def _load_stock_price(symbol, finnhub_key, lane='interactive'):
+    """Fetch a quote upstream, sharing one in-flight request between concurrent callers"""
+    return quote_flight.do(symbol.upper(), _fetch_and_cache_stock_price, symbol, finnhub_key, lane)
+
+def _fetch_and_cache_stock_price(symbol, finnhub_key, lane):
+    """Fetch a quote upstream and store it in the shared quote cache"""
+    price_data = _fetch_stock_price(symbol, finnhub_key, lane)
+    if price_data:
+        # Closed-market quotes are kept until the next open instead of the in-session TTL
+        quote_cache.set(symbol, price_data, market_calendar.quote_ttl(price_data.get('timestamp'), quote_cache.ttl))
+    return price_data
+
+# Shared pool so concurrent page renders cannot open unbounded upstream connections
+_quote_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='quote-fetch')
+# Profile loads are two upstream calls each, so batch enrichment gets its own smaller pool
+_profile_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='profile-fetch')
+_revalidating = set()
+_revalidating_lock = threading.Lock()
+
+def _revalidate_stock_price(symbol, finnhub_key):
+    """Refresh an expired quote in the background while the stale copy is served"""
+    key = symbol.upper()
+    with _revalidating_lock:
+        if key in _revalidating:
+            return
+        _revalidating.add(key)
+
+    def run():
+        try:
+            _load_stock_price(symbol, finnhub_key, 'enrichment')
+        finally:
+            with _revalidating_lock:
+                _revalidating.discard(key)
+
+    _quote_pool.submit(run)
+
+def get_stock_prices(symbols, finnhub_key, timeout=4, lane='interactive'):
+    """Get quotes for many symbols at once; symbols that miss the deadline are left out"""
+    unique_symbols = list(dict.fromkeys(s for s in symbols if s))
+    prices = {}
+    
+    # Serve whatever is already cached without touching the pool
+    pending = []
+    for symbol in unique_symbols:
+        cached = quote_cache.get_stale(symbol)
+        if cached is not None:
+            prices[symbol] = cached
+            if cached.get('stale'):
+                _revalidate_stock_price(symbol, finnhub_key)
         else:
-            print(f"DEBUG: No valid STOCK_API_KEY found for {symbol}")
-    except Exception as e:
-        print(f"Error getting stock price for {symbol}: {e}")
-    
-    return None
+            pending.append(symbol)
+    
+    if not pending:
+        return prices
+    
+    futures = {_quote_pool.submit(_load_stock_price, symbol, finnhub_key, lane): symbol for symbol in pending}
+    done, not_done = wait(futures, timeout=timeout)
+    for future in done:
+        try:
+            price_data = future.result()
+        except Exception as e:
+            print(f"Error getting stock price for {futures[future]}: {e}")
+            continue
+        if price_data:
+            prices[futures[future]] = price_data
+    
+    if not_done:
+        # Late results still land in the cache for the next render
+        print(f"DEBUG: Quote batch deadline hit, {len(not_done)} of {len(pending)} symbols still pending")
+    
+    return prices
 
-def get_company_profile_from_finnhub(symbol, finnhub_key):
-    """Get company profile data from Finnhub API for better categorization"""
-    try:
-        if finnhub_key and finnhub_key != 'your-finnhub-api-key-here':
-            # Get company profile
-            profile_url = f"https://finnhub.io/api/v1/stock/profile2?symbol={symbol}&token={finnhub_key}"
-            profile_response = requests.get(profile_url, timeout=5)
-            profile_data = profile_response.json()
-            
-            # Get company metrics for additional data
-            metrics_url = f"https://finnhub.io/api/v1/stock/metric?symbol={symbol}&metric=all&token={finnhub_key}"
-            metrics_response = requests.get(metrics_url, timeout=5)
-            metrics_data = metrics_response.json()
-            
-            if profile_data and 'ticker' in profile_data:
-                return {
-                    'symbol': profile_data.get('ticker', symbol),
-                    'name': profile_data.get('name', ''),
-                    'industry': profile_data.get('finnhubIndustry', ''),
-                    'sector': profile_data.get('sector', ''),
-                    'country': profile_data.get('country', ''),
-                    'currency': profile_data.get('currency', 'USD'),
-                    'market_cap': profile_data.get('marketCapitalization', 0),
-                    'beta': metrics_data.get('beta', 1.0) if metrics_data else 1.0,
-                    'volatility': metrics_data.get('volatility', 0) if metrics_data else 0
-                }
-    except Exception as e:
-        print(f"Error getting company profile from Finnhub for {symbol}: {e}")
-    
-    return None
+def get_cached_stock_prices(symbols, finnhub_key):
+    """Quotes already in the shared cache, never waiting on upstream; stale ones are revalidated in the background"""
+    prices = {}
+    for symbol in dict.fromkeys(s for s in symbols if s):
+        cached = quote_cache.get_stale(symbol)
+        if cached is not None:
+            prices[symbol] = cached
+            if cached.get('stale'):
+                _revalidate_stock_price(symbol, finnhub_key)
+    return prices
+
+def _fetch_stock_price(symbol, finnhub_key, lane='interactive'):
+    """Fetch a quote from the configured providers, Finnhub first"""
+    if finnhub_key and not finnhub_provider.api_key:
+        finnhub_provider.api_key = finnhub_key
+    price_data = quote_providers.quote(symbol, lane)
+    if price_data is None and not finnhub_provider.available():
+        print(f"DEBUG: No valid STOCK_API_KEY found for {symbol}")
+    return price_data
+
+def get_company_profile_from_finnhub(symbol, finnhub_key, lane='enrichment'):
+    """Get company profile data for better categorization, from the profile store or Finnhub"""
+    return profile_store.get(symbol, lambda: profile_flight.do(symbol.upper(), _fetch_company_profile, symbol, finnhub_key, lane))
+
+def _fetch_company_profile(symbol, finnhub_key, lane):
+    """Fetch profile and metrics for a symbol from the configured providers"""
+    if finnhub_key and not finnhub_provider.api_key:
+        finnhub_provider.api_key = finnhub_key
+    return quote_providers.profile(symbol, lane)
 
 def get_expected_return_for_asset(asset_type, symbol=None):
     """Get expected annual return based on asset type and optionally symbol"""
@@ -419,8 +397,10 @@ def get_risk_level_for_asset(asset_type, symbol=None):
 
 def get_asset_categorization_from_finnhub(symbol, finnhub_key):
     """Get asset categorization based on Finnhub company profile data"""
-    profile = get_company_profile_from_finnhub(symbol, finnhub_key)
-    
+    return _categorize_profile(get_company_profile_from_finnhub(symbol, finnhub_key))
+
+def _categorize_profile(profile):
+    """Asset type implied by a company profile, or None without one"""
     if not profile:
         return None
     
@@ -453,8 +433,10 @@ def get_asset_categorization_from_finnhub(symbol, finnhub_key):
 
 def get_enhanced_expected_return(symbol, finnhub_key):
     """Get enhanced expected return using Finnhub data"""
-    profile = get_company_profile_from_finnhub(symbol, finnhub_key)
-    
+    return _expected_return_from_profile(symbol, get_company_profile_from_finnhub(symbol, finnhub_key))
+
+def _expected_return_from_profile(symbol, profile):
+    """Expected return from sector, beta and volatility, falling back to the curated table"""
     if not profile:
         return get_expected_return_for_asset('Stock', symbol)
     
@@ -496,8 +478,10 @@ def get_enhanced_expected_return(symbol, finnhub_key):
 
 def get_enhanced_risk_level(symbol, finnhub_key):
     """Get enhanced risk level using Finnhub data"""
-    profile = get_company_profile_from_finnhub(symbol, finnhub_key)
-    
+    return _risk_level_from_profile(symbol, get_company_profile_from_finnhub(symbol, finnhub_key))
+
+def _risk_level_from_profile(symbol, profile):
+    """Risk level from beta and volatility, falling back to the curated table"""
     if not profile:
         return get_risk_level_for_asset('Stock', symbol)
     
@@ -513,6 +497,40 @@ def get_enhanced_risk_level(symbol, finnhub_key):
     else:
         return 'Medium'
 
+def enrich_assets(assets, finnhub_key, timeout=8):
+    """Expected return, risk level and asset type for many assets at once, fetching each distinct profile once"""
+    symbols = [(asset.get('symbol') or '').strip() for asset in assets]
+    profiles = profile_store.get_many(
+        [s for s in symbols if s],
+        lambda symbol: profile_flight.do(symbol, _fetch_company_profile, symbol, finnhub_key, 'enrichment'),
+        executor=_profile_pool,
+        timeout=timeout
+    )
+
+    results = []
+    for asset, symbol in zip(assets, symbols):
+        asset_type = asset.get('asset_type') or ''
+        if symbol:
+            # Same answers as the single-symbol endpoint, from the shared profile
+            profile = profiles.get(symbol.upper())
+            results.append({
+                'expected_return': _expected_return_from_profile(symbol, profile),
+                'risk_level': _risk_level_from_profile(symbol, profile),
+                'asset_type': _categorize_profile(profile) or asset_type,
+                'symbol': symbol,
+                # No profile means the helpers fell back to the curated tables
+                'source': 'finnhub' if profile else 'curated'
+            })
+        else:
+            results.append({
+                'expected_return': get_expected_return_for_asset(asset_type, symbol),
+                'risk_level': get_risk_level_for_asset(asset_type, symbol),
+                'asset_type': asset_type,
+                'symbol': symbol,
+                'source': 'curated'
+            })
+    return results
+
 def calculate_monthly_savings(target_amount, current_savings, years, expected_return):
     """Calculate required monthly savings to reach target"""
     try:
@@ -544,27 +562,16 @@ def calculate_monthly_savings(target_amount, current_savings, years, expected_re
 
 def summarize_user_financial_context(client):
     """Summarize the user's current financial situation for AI context"""
-    # Get user's data
-    budgets = list(client.getCollectionEndpoint('Budget').find({"user_id":current_user._id}))
-    for i in range(0, len(budgets)):
-        budgets[i] = deserializeDoc.budget(budgets[i])
-    # budgets = Budget.query.filter_by(user_id=current_user.id).all()
-    expenses = list(client.getCollectionEndpoint('Expense').find({"user_id":current_user._id}))
-    for i in range(0, len(expenses)):
-        expenses[i] = deserializeDoc.expense(expenses[i])
-    # expenses = Expense.query.filter_by(user_id=current_user.id).all()
-    investments = list(client.getCollectionEndpoint('Investment').find({"user_id":current_user._id}))
-    for i in range(0, len(investments)):
-        investments[i] = deserializeDoc.investment(investments[i])
-    # investments = Investment.query.filter_by(user_id=current_user.id).all()
-    goals = list(client.getCollectionEndpoint('Goal').find({"user_id":current_user._id}))
-    for i in range(0, len(goals)):
-        goals[i] = deserializeDoc.goal(goals[i])
-    # goals = Goal.query.filter_by(user_id=current_user.id).all()
+    # Get user's data; reads already made in this request are reused from its identity map
+    uow = unit_of_work(client)
+    budgets = uow.models('Budget', {"user_id":current_user._id})
+    spending = expense_rollup(uow, current_user._id)
+    investments = uow.models('Investment', {"user_id":current_user._id})
+    goals = uow.models('Goal', {"user_id":current_user._id})
     
     # Calculate totals
     total_budget = sum(b.limit_amount for b in budgets)
-    total_expenses = sum(e.converted_amount_usd for e in expenses)
+    total_expenses = spending['total_spent']
     total_investments = sum(i.shares * i.purchase_price for i in investments)
     total_goals = sum(g.target_amount for g in goals)
     current_income = session.get('monthly_income', 0)
@@ -581,15 +588,15 @@ def summarize_user_financial_context(client):
         context_lines.append(f"Total budget: ${total_budget:.2f}, Total spent: ${total_expenses:.2f}")
         context_lines.append("Budget Categories:")
         for budget in budgets:
-            spent = sum(e.converted_amount_usd for e in expenses if e.category == budget.category)
+            spent = spending['by_category'].get(budget.category, 0)
             context_lines.append(f"- {budget.category}: limit ${budget.limit_amount:.2f}, spent ${spent:.2f}")
     else:
         context_lines.append(f"Total expenses: ${total_expenses:.2f}")
     
     # Recent expenses
-    if expenses:
+    if spending['recent']:
         context_lines.append("Recent expenses:")
-        for expense in expenses[-5:]:  # Last 5 expenses
+        for expense in spending['recent']:  # Last 5 expenses
             context_lines.append(f"- ${expense.converted_amount_usd:.2f} on {expense.category} ({expense.description}) at {expense.date.strftime('%Y-%m-%d')}")
     
     # Goals
@@ -0,0 +1,89 @@
+import json
+import threading
+import time
+
+from .cache import quote_cache
+
+# Fields the holdings pages need to redraw a row
+STREAM_FIELDS = ('current_price', 'change', 'change_percent', 'timestamp')
+
+
+class StreamSlots:
+    """Caps how many streams one worker holds open, since each occupies a worker thread for its whole duration"""
+    def __init__(self, limit=4):
+        self.limit = limit
+        self.active = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        with self._lock:
+            if self.active >= self.limit:
+                self.rejected += 1
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.active = max(0, self.active - 1)
+
+    def stats(self):
+        with self._lock:
+            return {'active': self.active, 'limit': self.limit, 'rejected': self.rejected}
+
+
+stream_slots = StreamSlots()
+
+
+def configure_stream_slots(app_config):
+    stream_slots.limit = app_config.get('PRICE_STREAM_MAX_CONCURRENT', 4)
+    return stream_slots
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def price_snapshot(symbols):
+    """The cached quote fields for symbols, for pages polling instead of streaming"""
+    snapshot = {}
+    for symbol in dict.fromkeys(s.upper() for s in symbols if s):
+        quote = quote_cache.get(symbol)
+        if quote is not None:
+            snapshot[symbol] = {field: quote.get(field) for field in STREAM_FIELDS}
+    return snapshot
+
+
+def price_events(symbols, poll_interval=5, heartbeat=15, max_duration=300, sleep=time.sleep, clock=time.time):
+    """Yield SSE frames with the quotes that changed for symbols, read only from the shared quote cache"""
+    symbols = list(dict.fromkeys(s.upper() for s in symbols if s))
+    # Browsers reconnect on their own after the stream ends, so each connection is kept short-lived
+    yield f"retry: {int(poll_interval * 1000)}\n\n"
+
+    started = clock()
+    last_sent = {}
+    last_write = started
+    while True:
+        changed = {}
+        for symbol in symbols:
+            quote = quote_cache.get(symbol)
+            if quote is None:
+                continue
+            payload = {field: quote.get(field) for field in STREAM_FIELDS}
+            if last_sent.get(symbol) != payload:
+                last_sent[symbol] = payload
+                changed[symbol] = payload
+
+        now = clock()
+        if changed:
+            yield format_event('prices', changed)
+            last_write = now
+        elif now - last_write >= heartbeat:
+            # Comment frames keep proxies from closing an idle connection
+            yield ": keep-alive\n\n"
+            last_write = now
+
+        if now - started >= max_duration:
+            return
+        sleep(poll_interval)
@@ -0,0 +1,167 @@
+from concurrent.futures import wait
+from datetime import datetime, timedelta
+
+from flask import g, has_app_context
+
+from .cache import MemoryBackend
+
+# The only profile fields the enrichment helpers read; nothing else is persisted
+PROFILE_FIELDS = ('symbol', 'name', 'industry', 'sector', 'country', 'currency', 'market_cap', 'beta', 'volatility')
+
+# Stored in place of a profile when the providers had none, such as an ETF with an empty profile2
+MISSING = {'missing': True}
+
+
+class ProfileStore:
+    """Company profiles layered as per-request memo, process LRU and a Mongo collection with a TTL index"""
+    def __init__(self, maxsize=512, ttl=90 * 24 * 3600, miss_ttl=6 * 3600):
+        self.memory = MemoryBackend(maxsize=maxsize)
+        self.collection = None
+        self.ttl = ttl
+        self.miss_ttl = miss_ttl
+
+    def _request_memo(self):
+        if not has_app_context():
+            return None
+        if '_company_profiles' not in g:
+            g._company_profiles = {}
+        return g._company_profiles
+
+    @staticmethod
+    def _trim(profile):
+        return {field: profile.get(field) for field in PROFILE_FIELDS} if profile else MISSING
+
+    @staticmethod
+    def _found(profile):
+        return None if profile is None or profile.get('missing') else profile
+
+    def _remember(self, key, profile):
+        self.memory.set(key, profile, self.miss_ttl if profile.get('missing') else self.ttl)
+
+    def _decode(self, doc):
+        if not doc.get('missing'):
+            return {field: doc.get(field) for field in PROFILE_FIELDS}
+        # The collection's TTL index is sized for real profiles, so misses are aged out here
+        fetched_at = doc.get('fetched_at')
+        if fetched_at is None or datetime.utcnow() - fetched_at > timedelta(seconds=self.miss_ttl):
+            return None
+        return MISSING
+
+    def _load_persisted(self, key):
+        if self.collection is None:
+            return None
+        try:
+            doc = self.collection.find_one({'_id': key})
+        except Exception as e:
+            print(f"DEBUG: Company profile lookup failed for {key}: {e}")
+            return None
+        if not doc:
+            return None
+        return self._decode(doc)
+
+    def _persist(self, key, profile):
+        if self.collection is None:
+            return
+        doc = dict(profile)
+        doc['fetched_at'] = datetime.utcnow()
+        try:
+            self.collection.replace_one({'_id': key}, doc, upsert=True)
+        except Exception as e:
+            print(f"DEBUG: Could not persist company profile for {key}: {e}")
+
+    def get(self, symbol, loader):
+        """Return the profile for symbol, calling loader() only when every layer misses"""
+        key = symbol.upper().strip()
+        memo = self._request_memo()
+        if memo is not None and key in memo:
+            return memo[key]
+
+        profile = self.memory.get(key)
+        if profile is None:
+            profile = self._load_persisted(key)
+            if profile is None:
+                # Misses are stored too, for miss_ttl, so symbols without a profile are not refetched on every request
+                profile = self._trim(loader())
+                self._persist(key, profile)
+            self._remember(key, profile)
+        profile = self._found(profile)
+
+        if memo is not None:
+            memo[key] = profile
+        return profile
+
+    def _load_persisted_many(self, keys):
+        if self.collection is None or not keys:
+            return {}
+        try:
+            docs = self.collection.find({'_id': {'$in': keys}})
+            decoded = {doc['_id']: self._decode(doc) for doc in docs}
+            return {key: profile for key, profile in decoded.items() if profile is not None}
+        except Exception as e:
+            print(f"DEBUG: Company profile batch lookup failed: {e}")
+            return {}
+
+    def get_many(self, symbols, loader, executor=None, timeout=None):
+        """Profiles for many symbols: one Mongo read covers the memory misses, and loader(symbol) runs concurrently for the rest"""
+        keys = list(dict.fromkeys(s.upper().strip() for s in symbols if s))
+        memo = self._request_memo()
+        profiles = {}
+        missing = []
+        for key in keys:
+            if memo is not None and key in memo:
+                profiles[key] = memo[key]
+                continue
+            profile = self.memory.get(key)
+            if profile is None:
+                missing.append(key)
+            else:
+                profiles[key] = profile
+
+        persisted = self._load_persisted_many(missing)
+        for key, profile in persisted.items():
+            self._remember(key, profile)
+            profiles[key] = profile
+
+        def load(key):
+            # Stored from the worker, so a load that misses the deadline still lands for next time
+            profile = self._trim(loader(key))
+            self._persist(key, profile)
+            self._remember(key, profile)
+            return profile
+
+        to_load = [key for key in missing if key not in persisted]
+        if to_load:
+            if executor is None:
+                loaded = {key: load(key) for key in to_load}
+            else:
+                futures = {executor.submit(load, key): key for key in to_load}
+                done, not_done = wait(futures, timeout=timeout)
+                loaded = {}
+                for future in done:
+                    try:
+                        loaded[futures[future]] = future.result()
+                    except Exception as e:
+                        print(f"DEBUG: Company profile load failed for {futures[future]}: {e}")
+                if not_done:
+                    # Slow loads are left out of this answer but are not memoised as misses
+                    print(f"DEBUG: Profile batch deadline hit, {len(not_done)} of {len(to_load)} symbols still pending")
+            profiles.update(loaded)
+
+        profiles = {key: self._found(profile) for key, profile in profiles.items()}
+        if memo is not None:
+            memo.update(profiles)
+        return profiles
+
+    def stats(self):
+        return self.memory.get_stats()
+
+
+profile_store = ProfileStore()
+
+
+def configure_profile_store(app_config, mongo_client):
+    """Attach the Mongo layer; its fetched_at TTL index is declared in app/indexes.py"""
+    profile_store.ttl = app_config.get('COMPANY_PROFILE_TTL_DAYS', 90) * 24 * 3600
+    profile_store.miss_ttl = app_config.get('COMPANY_PROFILE_MISS_TTL_HOURS', 6) * 3600
+    profile_store.collection = mongo_client.getCollectionEndpoint('CompanyProfile')
+    return profile_store
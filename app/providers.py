@@ -0,0 +1,367 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+try:
+    import yfinance as yf
+except ImportError:
+    yf = None
+
+from .breaker import breakers, CircuitBreaker, OPEN
+from .httpclient import http_client
+from .ratelimit import finnhub_limiter
+
+
+class NotAttempted(Exception):
+    """Raised by a provider that declined to send a request, e.g. no rate limit token; says nothing about upstream health"""
+
+
+class LatencyTracker:
+    """Recent response times for one provider, used to pick the hedge delay"""
+    def __init__(self, size=200, min_samples=20):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=size)
+        self.min_samples = min_samples
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct, default=None):
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return default
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class QuoteProvider:
+    """One upstream source of quotes and company profiles; methods return None when they have nothing
+    and raise NotAttempted when no request went out"""
+    name = 'provider'
+
+    def __init__(self):
+        self.latency = LatencyTracker()
+        self.breaker = breakers.get(self.name) or CircuitBreaker(self.name)
+        self.calls = 0
+        self.failures = 0
+
+    def available(self):
+        return True
+
+    def fetch_quote(self, symbol, lane='interactive'):
+        return None
+
+    def fetch_profile(self, symbol, lane='enrichment'):
+        return None
+
+    def fetch_candles(self, symbol, start, end, lane='background'):
+        """Daily candles between two dates as [{'date', 'open', 'high', 'low', 'close', 'volume'}]"""
+        return None
+
+
+class FinnhubProvider(QuoteProvider):
+    name = 'finnhub'
+
+    def __init__(self, api_key=None):
+        super().__init__()
+        self.api_key = api_key
+
+    def available(self):
+        return bool(self.api_key) and self.api_key != 'your-finnhub-api-key-here'
+
+    def fetch_quote(self, symbol, lane='interactive'):
+        if not finnhub_limiter.acquire(lane):
+            raise NotAttempted(f"no {lane} rate limit token")
+        url = f"https://finnhub.io/api/v1/quote?symbol={symbol}&token={self.api_key}"
+        # Interactive quotes are hedged and breaker-guarded, so they fail fast rather than retry
+        response = http_client.get(url, timeout=5, retry=lane != 'interactive')
+        data = response.json()
+
+        if 'c' in data and data['c'] is not None:
+            return {
+                'current_price': data['c'],
+                'change': data.get('d', 0),
+                'change_percent': data.get('dp', 0),
+                'high': data.get('h', 0),
+                'low': data.get('l', 0),
+                'open': data.get('o', 0),
+                'previous_close': data.get('pc', 0),
+                'timestamp': data.get('t', 0)
+            }
+        return None
+
+    def fetch_profile(self, symbol, lane='enrichment'):
+        # Profile and metrics are two upstream calls
+        if not (finnhub_limiter.acquire(lane) and finnhub_limiter.acquire(lane)):
+            raise NotAttempted(f"no {lane} rate limit token")
+        # Get company profile
+        profile_url = f"https://finnhub.io/api/v1/stock/profile2?symbol={symbol}&token={self.api_key}"
+        profile_response = http_client.get(profile_url, timeout=5, retry=lane != 'interactive')
+        profile_data = profile_response.json()
+
+        # Get company metrics for additional data
+        metrics_url = f"https://finnhub.io/api/v1/stock/metric?symbol={symbol}&metric=all&token={self.api_key}"
+        metrics_response = http_client.get(metrics_url, timeout=5, retry=lane != 'interactive')
+        metrics_data = metrics_response.json()
+
+        if profile_data and 'ticker' in profile_data:
+            return {
+                'symbol': profile_data.get('ticker', symbol),
+                'name': profile_data.get('name', ''),
+                'industry': profile_data.get('finnhubIndustry', ''),
+                'sector': profile_data.get('sector', ''),
+                'country': profile_data.get('country', ''),
+                'currency': profile_data.get('currency', 'USD'),
+                'market_cap': profile_data.get('marketCapitalization', 0),
+                'beta': metrics_data.get('beta', 1.0) if metrics_data else 1.0,
+                'volatility': metrics_data.get('volatility', 0) if metrics_data else 0
+            }
+        return None
+
+    def fetch_candles(self, symbol, start, end, lane='background'):
+        if not finnhub_limiter.acquire(lane):
+            raise NotAttempted(f"no {lane} rate limit token")
+        start_ts = int(datetime.combine(start, datetime.min.time(), timezone.utc).timestamp())
+        end_ts = int(datetime.combine(end, datetime.max.time(), timezone.utc).timestamp())
+        url = f"https://finnhub.io/api/v1/stock/candle?symbol={symbol}&resolution=D&from={start_ts}&to={end_ts}&token={self.api_key}"
+        data = http_client.get(url, timeout=10).json()
+        if data.get('s') == 'no_data':
+            return []
+        if data.get('s') != 'ok':
+            return None
+        return [
+            {
+                'date': datetime.fromtimestamp(t, timezone.utc).date(),
+                'open': o, 'high': h, 'low': l, 'close': c, 'volume': v
+            }
+            for t, o, h, l, c, v in zip(data['t'], data['o'], data['h'], data['l'], data['c'], data['v'])
+        ]
+
+
+class YFinanceProvider(QuoteProvider):
+    """Yahoo Finance through the optional yfinance package, as in the legacy investments module"""
+    name = 'yfinance'
+
+    def available(self):
+        return yf is not None
+
+    def fetch_quote(self, symbol, lane='interactive'):
+        history = yf.Ticker(symbol).history(period='5d')
+        if history.empty:
+            return None
+        last = history.iloc[-1]
+        current = float(last['Close'])
+        previous_close = float(history['Close'].iloc[-2]) if len(history) > 1 else float(last['Open'])
+        change = current - previous_close
+        return {
+            'current_price': current,
+            'change': change,
+            'change_percent': change / previous_close * 100 if previous_close else 0,
+            'high': float(last['High']),
+            'low': float(last['Low']),
+            'open': float(last['Open']),
+            'previous_close': previous_close,
+            'timestamp': int(history.index[-1].timestamp())
+        }
+
+    def fetch_profile(self, symbol, lane='enrichment'):
+        info = yf.Ticker(symbol).info or {}
+        if not info.get('symbol') and not info.get('shortName'):
+            return None
+        return {
+            'symbol': info.get('symbol', symbol),
+            'name': info.get('longName') or info.get('shortName', ''),
+            'industry': info.get('industry', ''),
+            'sector': info.get('sector', ''),
+            'country': info.get('country', ''),
+            'currency': info.get('currency', 'USD'),
+            # Finnhub reports market cap in millions
+            'market_cap': (info.get('marketCap') or 0) / 1e6,
+            'beta': info.get('beta') or 1.0,
+            'volatility': 0
+        }
+
+    def fetch_candles(self, symbol, start, end, lane='background'):
+        history = yf.Ticker(symbol).history(start=start.isoformat(), end=(end + timedelta(days=1)).isoformat(), interval='1d')
+        return [
+            {
+                'date': index.date(),
+                'open': float(row['Open']), 'high': float(row['High']), 'low': float(row['Low']),
+                'close': float(row['Close']), 'volume': float(row['Volume'])
+            }
+            for index, row in history.iterrows()
+        ]
+
+
+PROVIDER_TYPES = {
+    'finnhub': FinnhubProvider,
+    'yfinance': YFinanceProvider
+}
+
+
+class ProviderChain:
+    """Ordered failover across providers, hedging slow interactive quote calls with the next provider"""
+    def __init__(self, providers, hedge=True, default_hedge_delay=1.0, min_hedge_delay=0.05, timeout=6.0):
+        self.providers = providers
+        self.hedge = hedge
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.timeout = timeout
+        self.hedges_fired = 0
+        self.hedges_won = 0
+        self._pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix='quote-provider')
+
+    def get(self, name):
+        for provider in self.providers:
+            if provider.name == name:
+                return provider
+        return None
+
+    def _available(self):
+        # Providers behind an open breaker are skipped outright instead of timing out
+        return [p for p in self.providers if p.available() and p.breaker.state != OPEN]
+
+    def _call(self, provider, method, symbol, lane):
+        if not provider.breaker.allow():
+            return None
+        start = time.time()
+        try:
+            result = getattr(provider, method)(symbol, lane)
+        except NotAttempted:
+            # Local throttling is not an upstream outcome, so it neither closes nor trips the breaker
+            provider.breaker.release_probe()
+            return None
+        except Exception as e:
+            provider.calls += 1
+            provider.failures += 1
+            provider.breaker.record_failure()
+            print(f"Error getting {method[6:]} from {provider.name} for {symbol}: {e}")
+            result = None
+        else:
+            provider.calls += 1
+            provider.breaker.record_success()
+        if method == 'fetch_quote':
+            provider.latency.record(time.time() - start)
+        return result
+
+    def hedge_delay(self, provider):
+        p95 = provider.latency.percentile(95, self.default_hedge_delay)
+        return max(self.min_hedge_delay, p95)
+
+    def _failover(self, method, symbol, lane, providers):
+        for provider in providers:
+            result = self._call(provider, method, symbol, lane)
+            if result:
+                return result
+        return None
+
+    def quote(self, symbol, lane='interactive'):
+        providers = self._available()
+        if not providers:
+            return None
+        # Background work is not latency sensitive, so it never doubles upstream load
+        if not self.hedge or lane != 'interactive' or len(providers) < 2:
+            return self._failover('fetch_quote', symbol, lane, providers)
+
+        primary, secondary = providers[0], providers[1]
+        first = self._pool.submit(self._call, primary, 'fetch_quote', symbol, lane)
+        done, _ = wait([first], timeout=self.hedge_delay(primary))
+        if done and first.result():
+            return first.result()
+
+        if not done:
+            self.hedges_fired += 1
+        second = self._pool.submit(self._call, secondary, 'fetch_quote', symbol, lane)
+        pending = {first, second} - done
+        deadline = time.time() + self.timeout
+        while pending:
+            done, pending = wait(pending, timeout=max(0, deadline - time.time()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                result = future.result()
+                if result:
+                    if future is second and first in pending:
+                        self.hedges_won += 1
+                    return result
+
+        # Anything past the two raced providers is plain failover
+        return self._failover('fetch_quote', symbol, lane, providers[2:])
+
+    def profile(self, symbol, lane='enrichment'):
+        return self._failover('fetch_profile', symbol, lane, self._available())
+
+    def candles(self, symbol, start, end, lane='background'):
+        """Daily candles from the first provider that answers; an empty list means it has none for the range"""
+        for provider in self._available():
+            if not provider.breaker.allow():
+                continue
+            try:
+                result = provider.fetch_candles(symbol, start, end, lane)
+            except NotAttempted:
+                provider.breaker.release_probe()
+                continue
+            except Exception as e:
+                provider.calls += 1
+                provider.failures += 1
+                provider.breaker.record_failure()
+                print(f"Error getting candles from {provider.name} for {symbol}: {e}")
+                continue
+            provider.calls += 1
+            provider.breaker.record_success()
+            if result is not None:
+                return result
+        return None
+
+    def stats(self):
+        return {
+            'hedges_fired': self.hedges_fired,
+            'hedges_won': self.hedges_won,
+            'providers': [
+                {
+                    'name': p.name,
+                    'available': p.available(),
+                    'calls': p.calls,
+                    'failures': p.failures,
+                    'p50': p.latency.percentile(50),
+                    'p95': p.latency.percentile(95),
+                    'hedge_delay': self.hedge_delay(p),
+                    'circuit': p.breaker.stats()
+                }
+                for p in self.providers
+            ]
+        }
+
+
+finnhub_provider = FinnhubProvider()
+quote_providers = ProviderChain([finnhub_provider, YFinanceProvider()])
+
+
+def configure_quote_providers(app_config):
+    """Order the providers from QUOTE_PROVIDERS and apply the hedging settings
+
+    Secondary providers are opt-in: yfinance is not in requirements.txt, so it has to be
+    installed and listed in QUOTE_PROVIDERS before hedging and failover have anything to use.
+    """
+    finnhub_provider.api_key = app_config.get('FINNHUB_API_KEY')
+    providers = []
+    for name in (app_config.get('QUOTE_PROVIDERS') or 'finnhub').split(','):
+        name = name.strip().lower()
+        if name == 'finnhub':
+            providers.append(finnhub_provider)
+        elif name in PROVIDER_TYPES:
+            provider = quote_providers.get(name) or PROVIDER_TYPES[name]()
+            if provider.available():
+                providers.append(provider)
+            else:
+                # Left out so the chain and its stats only list providers that can actually answer
+                print(f"DEBUG: Quote provider {name} is configured but its package is not installed, skipping")
+        elif name:
+            print(f"DEBUG: Unknown quote provider {name}")
+    quote_providers.providers = providers
+    quote_providers.hedge = app_config.get('QUOTE_HEDGE_ENABLED', True)
+    quote_providers.default_hedge_delay = app_config.get('QUOTE_HEDGE_DEFAULT_DELAY', 1.0)
+    return quote_providers
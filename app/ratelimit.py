@@ -0,0 +1,188 @@
+import threading
+import time
+
+from pymongo import ReturnDocument
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Share of the bucket each lane must leave untouched, so background work can
+# never drain the tokens that interactive page requests depend on
+LANE_RESERVES = {
+    'interactive': 0.0,
+    'enrichment': 0.25,
+    'background': 0.5
+}
+
+# How long a caller in each lane may queue for a token before falling back
+LANE_MAX_WAIT = {
+    'interactive': 2.0,
+    'enrichment': 1.0,
+    'background': 30.0
+}
+
+
+class MemoryBucketStore:
+    """Token bucket state for a single process"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def take(self, key, capacity, rate, reserve):
+        now = time.time()
+        with self._lock:
+            tokens, ts = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + max(0, now - ts) * rate)
+            granted = tokens >= reserve + 1
+            if granted:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            return granted, tokens
+
+
+class RedisBucketStore:
+    """Token bucket state shared through Redis, updated atomically in a Lua script"""
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local reserve = tonumber(ARGV[4])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    local granted = 0
+    if tokens >= reserve + 1 then
+        tokens = tokens - 1
+        granted = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) * 2 + 1)
+    return {granted, tostring(tokens)}
+    """
+
+    def __init__(self, client=None, url=None, namespace='cashline:ratelimit'):
+        if client is None:
+            if redis is None:
+                raise RuntimeError("The redis package is required for RedisBucketStore")
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.namespace = namespace
+        self._script = client.register_script(self.SCRIPT)
+
+    def take(self, key, capacity, rate, reserve):
+        granted, tokens = self._script(keys=[f"{self.namespace}:{key}"], args=[capacity, rate, time.time(), reserve])
+        return bool(granted), float(tokens)
+
+
+class MongoBucketStore:
+    """Token bucket state shared through a Mongo collection, updated with a single pipeline update"""
+    def __init__(self, collection):
+        self.collection = collection
+
+    def take(self, key, capacity, rate, reserve):
+        now = time.time()
+        refilled = {'$min': [capacity, {'$add': [
+            {'$ifNull': ['$tokens', capacity]},
+            {'$multiply': [{'$max': [0, {'$subtract': [now, {'$ifNull': ['$ts', now]}]}]}, rate]}
+        ]}]}
+        doc = self.collection.find_one_and_update(
+            {'_id': key},
+            [
+                {'$set': {'tokens': refilled, 'ts': now}},
+                {'$set': {'granted': {'$gte': ['$tokens', reserve + 1]}}},
+                {'$set': {'tokens': {'$cond': ['$granted', {'$subtract': ['$tokens', 1]}, '$tokens']}}}
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return bool(doc['granted']), float(doc['tokens'])
+
+
+class RateLimiter:
+    """Token-bucket limiter for one upstream API with priority lanes"""
+    def __init__(self, store, name, rate_per_minute=60, burst=10):
+        self.store = store
+        self.name = name
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst
+        # Used while the shared store is failing, so the quota is still enforced per process
+        self.fallback = MemoryBucketStore()
+        self.store_errors = 0
+        self._lock = threading.Lock()
+        self._granted = {lane: 0 for lane in LANE_RESERVES}
+        self._rejected = {lane: 0 for lane in LANE_RESERVES}
+
+    def _count(self, counters, lane):
+        with self._lock:
+            counters[lane] = counters.get(lane, 0) + 1
+
+    def try_acquire(self, lane='interactive'):
+        """Take one token without waiting"""
+        reserve = LANE_RESERVES.get(lane, LANE_RESERVES['background']) * self.capacity
+        try:
+            granted, _ = self.store.take(self.name, self.capacity, self.rate, reserve)
+        except Exception as e:
+            # A broken state store should neither take the site down nor switch the limit off
+            with self._lock:
+                self.store_errors += 1
+            print(f"DEBUG: Rate limiter store error for {self.name}, limiting in-process: {e}")
+            granted, _ = self.fallback.take(self.name, self.capacity, self.rate, reserve)
+        return granted
+
+    def acquire(self, lane='interactive', max_wait=None):
+        """Wait up to the lane's bounded wait for a token; False means the caller should fall back"""
+        if max_wait is None:
+            max_wait = LANE_MAX_WAIT.get(lane, 0)
+        deadline = time.time() + max_wait
+
+        while True:
+            if self.try_acquire(lane):
+                self._count(self._granted, lane)
+                return True
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                self._count(self._rejected, lane)
+                print(f"DEBUG: {self.name} rate limit reached for {lane} lane, falling back")
+                return False
+            time.sleep(min(remaining, 1.0 / self.rate))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rate_per_minute': self.rate * 60,
+                'burst': self.capacity,
+                'granted': dict(self._granted),
+                'rejected': dict(self._rejected),
+                'store': type(self.store).__name__,
+                'store_errors': self.store_errors
+            }
+
+
+finnhub_limiter = RateLimiter(MemoryBucketStore(), 'finnhub')
+
+
+def configure_rate_limiter(app_config, mongo_client):
+    """Share the Finnhub bucket across workers through Redis when available, otherwise Mongo"""
+    store_name = app_config.get('RATE_LIMIT_STORE') or ('redis' if app_config.get('REDIS_URL') else 'mongo')
+    store = None
+    if store_name == 'redis':
+        try:
+            store = RedisBucketStore(url=app_config.get('REDIS_URL'))
+            # from_url connects lazily, so check the server is actually reachable before relying on it
+            store.client.ping()
+        except Exception as e:
+            store = None
+            print(f"DEBUG: Redis rate limit store unavailable ({e}), using Mongo")
+            store_name = 'mongo'
+    if store_name == 'mongo':
+        store = MongoBucketStore(mongo_client.getCollectionEndpoint('RateLimit'))
+    if store is None:
+        store = MemoryBucketStore()
+
+    finnhub_limiter.store = store
+    finnhub_limiter.rate = app_config.get('FINNHUB_RATE_LIMIT', 60) / 60.0
+    finnhub_limiter.capacity = app_config.get('FINNHUB_RATE_BURST', 10)
+    return finnhub_limiter
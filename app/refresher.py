@@ -0,0 +1,239 @@
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from .markethours import market_calendar
+from .operations import refresh_stock_price
+
+
+class LeaderLease:
+    """Time-limited lease in a Mongo collection so only one instance runs a periodic job"""
+    def __init__(self, collection, name, ttl=180, owner=None):
+        self.collection = collection
+        self.name = name
+        self.ttl = ttl
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def acquire(self):
+        """Take or renew the lease; True while this instance is the leader"""
+        if self.collection is None:
+            return True
+        now = datetime.utcnow()
+        try:
+            doc = self.collection.find_one_and_update(
+                {'_id': self.name, '$or': [{'owner': self.owner}, {'expires_at': {'$lt': now}}]},
+                {'$set': {'owner': self.owner, 'expires_at': now + timedelta(seconds=self.ttl)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Another instance holds an unexpired lease, so the upsert collided with it
+            return False
+        except Exception as e:
+            print(f"DEBUG: Lease {self.name} unavailable: {e}")
+            return False
+        return doc is not None and doc.get('owner') == self.owner
+
+    def release(self):
+        if self.collection is None:
+            return
+        try:
+            self.collection.delete_one({'_id': self.name, 'owner': self.owner})
+        except Exception as e:
+            print(f"DEBUG: Could not release lease {self.name}: {e}")
+
+
+def held_symbols_pipeline():
+    """Distinct upper-cased symbols across Investment and Asset, computed server-side"""
+    return [
+        {'$project': {'_id': 0, 'symbol': 1}},
+        {'$unionWith': {'coll': 'Asset', 'pipeline': [{'$project': {'_id': 0, 'symbol': 1}}]}},
+        {'$match': {'symbol': {'$type': 'string', '$ne': ''}}},
+        {'$group': {'_id': {'$toUpper': '$symbol'}}},
+        {'$sort': {'_id': 1}}
+    ]
+
+
+class PriceRefresher:
+    """Keeps quotes for every held symbol warm in the shared quote cache from a background thread"""
+    def __init__(self, investments=None, lease=None, refresh=None, interval=60, jitter=10, batch_size=20, after_close=None):
+        self.investments = investments
+        self.lease = lease
+        self.refresh = refresh
+        self.after_close = after_close
+        self.after_close_lease = None
+        self._after_close_thread = None
+        self._closed_day = None
+        self.interval = interval
+        self.jitter = jitter
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {
+            'runs': 0,
+            'skipped_not_leader': 0,
+            'symbols': 0,
+            'refreshed': 0,
+            'failed': 0,
+            'last_run_at': None,
+            'last_duration': None
+        }
+
+    def held_symbols(self):
+        if self.investments is None:
+            return []
+        try:
+            return [doc['_id'] for doc in self.investments.aggregate(held_symbols_pipeline())]
+        except Exception as e:
+            print(f"DEBUG: Could not list held symbols: {e}")
+            return []
+
+    def refresh_once(self):
+        """Run one refresh cycle if this instance holds the lease; returns the number of quotes refreshed"""
+        if self.refresh is None:
+            return 0
+        if self.lease is not None and not self.lease.acquire():
+            with self._lock:
+                self._stats['skipped_not_leader'] += 1
+            return 0
+
+        start = time.time()
+        symbols = self.held_symbols()
+        refreshed = 0
+        failed = 0
+        for i in range(0, len(symbols), self.batch_size):
+            if self._stop.is_set():
+                break
+            # Renewing between batches keeps a long cycle from outliving the lease
+            if i and self.lease is not None and not self.lease.acquire():
+                print("DEBUG: Price refresher lost its lease mid-cycle")
+                break
+            batch = symbols[i:i + self.batch_size]
+            batch_refreshed = 0
+            for symbol in batch:
+                try:
+                    ok = self.refresh(symbol) is not None
+                except Exception as e:
+                    print(f"DEBUG: Background refresh failed for {symbol}: {e}")
+                    ok = False
+                if ok:
+                    batch_refreshed += 1
+                else:
+                    failed += 1
+            refreshed += batch_refreshed
+            if not batch_refreshed:
+                # A fully failed batch means the upstream or its rate limit is exhausted; retry next cycle
+                print("DEBUG: Price refresher batch failed, ending cycle early")
+                break
+
+        with self._lock:
+            self._stats['runs'] += 1
+            self._stats['symbols'] = len(symbols)
+            self._stats['refreshed'] += refreshed
+            self._stats['failed'] += failed
+            self._stats['last_run_at'] = datetime.utcnow().isoformat()
+            self._stats['last_duration'] = round(time.time() - start, 3)
+        print(f"DEBUG: Price refresher refreshed {refreshed} of {len(symbols)} held symbols")
+        self.run_after_close(symbols)
+        return refreshed
+
+    def run_after_close(self, symbols, now=None):
+        """Start the after_close job once per closed session, such as appending that day's candles
+
+        It runs on its own thread under its own lease, so a slow job never delays quote refreshes
+        or holds the refresher's lease. Returns True when a job was started.
+        """
+        if self.after_close is None or self._stop.is_set():
+            return False
+        closed_day = market_calendar.last_closed_day(now or datetime.now(timezone.utc))
+        if closed_day == self._closed_day:
+            return False
+        if self._after_close_thread is not None and self._after_close_thread.is_alive():
+            return False
+        self._after_close_thread = threading.Thread(
+            target=self._after_close_job, args=(list(symbols), closed_day), name='after-close', daemon=True
+        )
+        self._after_close_thread.start()
+        return True
+
+    def _keep_after_close_lease(self):
+        if self._stop.is_set():
+            return False
+        return self.after_close_lease is None or self.after_close_lease.acquire()
+
+    def _after_close_job(self, symbols, closed_day):
+        # Another instance holding the lease is doing the job; this one checks again next cycle
+        if not self._keep_after_close_lease():
+            return
+        try:
+            self.after_close(symbols, closed_day, self._keep_after_close_lease)
+        except Exception as e:
+            print(f"DEBUG: After-close job failed: {e}")
+            return
+        self._closed_day = closed_day
+
+    def _next_delay(self):
+        return self.interval + random.uniform(0, self.jitter)
+
+    def _run(self):
+        # Jittered start so instances booted together do not contend for the lease at once
+        delay = random.uniform(0, self.jitter)
+        while not self._stop.wait(delay):
+            try:
+                self.refresh_once()
+            except Exception as e:
+                print(f"DEBUG: Price refresher cycle failed: {e}")
+            delay = self._next_delay()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='price-refresher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self.lease is not None:
+            self.lease.release()
+        if self.after_close_lease is not None:
+            self.after_close_lease.release()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['running'] = self._thread is not None and self._thread.is_alive()
+        stats['interval'] = self.interval
+        stats['jitter'] = self.jitter
+        return stats
+
+
+price_refresher = PriceRefresher()
+
+
+def configure_price_refresher(app_config, mongo_client):
+    """Start refreshing held symbols in the background when enabled and a Finnhub key is configured"""
+    finnhub_key = app_config.get('FINNHUB_API_KEY')
+    price_refresher.interval = app_config.get('PRICE_REFRESH_INTERVAL', 60)
+    price_refresher.jitter = app_config.get('PRICE_REFRESH_JITTER', 10)
+    price_refresher.batch_size = app_config.get('PRICE_REFRESH_BATCH_SIZE', 20)
+    price_refresher.investments = mongo_client.getCollectionEndpoint('Investment')
+    # The lease outlives one full cycle so a slow leader is not displaced mid-run
+    price_refresher.lease = LeaderLease(
+        mongo_client.getCollectionEndpoint('Lease'),
+        'price-refresher',
+        ttl=(price_refresher.interval + price_refresher.jitter) * 3
+    )
+    price_refresher.refresh = lambda symbol: refresh_stock_price(symbol, finnhub_key)
+
+    if app_config.get('PRICE_REFRESH_ENABLED', True) and finnhub_key and price_refresher.interval > 0:
+        price_refresher.start()
+    return price_refresher
@@ -0,0 +1,47 @@
+from bson.raw_bson import RawBSONDocument
+
+
+def projection(fields):
+    """Mongo projection for exactly the named fields; _id is only returned when asked for"""
+    if fields is None:
+        return None
+    spec = {field: 1 for field in fields}
+    if '_id' not in spec:
+        spec['_id'] = 0
+    return spec
+
+
+class Repository:
+    """Reads one collection returning only the fields a caller names, as lazily decoded RawBSONDocuments"""
+    def __init__(self, collection, deserialize=None):
+        self.collection = collection
+        self.deserialize = deserialize
+        # Raw documents keep the wire bytes and are only parsed when a field is first read
+        self.raw = collection.with_options(
+            codec_options=collection.codec_options.with_options(document_class=RawBSONDocument)
+        )
+
+    def find(self, query, fields=None, sort=None, limit=0):
+        cursor = self.raw.find(query, projection(fields), limit=limit)
+        if sort:
+            cursor = cursor.sort(sort)
+        return list(cursor)
+
+    def find_one(self, query, fields=None):
+        return self.raw.find_one(query, projection(fields))
+
+    def for_user(self, user_id, fields=None, sort=None):
+        """A user's documents, narrowed to fields; served by the user_id indexes"""
+        return self.find({'user_id': user_id}, fields, sort)
+
+    def models_for_user(self, user_id, sort=None):
+        """A user's documents as full model objects, for callers that need every field"""
+        return [self.deserialize(doc) for doc in self.find({'user_id': user_id}, sort=sort)]
+
+    def aggregate(self, pipeline):
+        """Pipeline results as ordinary documents; rollups are small so lazy decoding buys nothing"""
+        return list(self.collection.aggregate(pipeline))
+
+    def values(self, query, field):
+        """One field from every matching document, fetching nothing else"""
+        return [doc[field] for doc in self.find(query, [field]) if field in doc]
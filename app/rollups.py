@@ -0,0 +1,51 @@
+from .mongoModels import Expense
+
+RECENT_EXPENSES = 5
+
+
+def week_of_month(date_field):
+    """Bucket 0-3 for a day of the month, with days 22 onwards all in the last bucket"""
+    return {'$min': [3, {'$floor': {'$divide': [{'$subtract': [{'$dayOfMonth': date_field}, 1]}, 7]}}]}
+
+
+def expense_rollup_pipeline(user_id, recent=RECENT_EXPENSES):
+    """One round trip for every spending figure the dashboard and advice context show"""
+    amount = '$converted_amount_usd'
+    return [
+        # Served by the (user_id, date) index; everything after works on this user's expenses only
+        {'$match': {'user_id': user_id}},
+        {'$facet': {
+            'totals': [{'$group': {'_id': None, 'spent': {'$sum': amount}, 'count': {'$sum': 1}}}],
+            'by_category': [
+                {'$group': {'_id': '$category', 'spent': {'$sum': amount}}},
+                {'$sort': {'_id': 1}}
+            ],
+            'weekly': [{'$group': {'_id': week_of_month('$date'), 'spent': {'$sum': amount}}}],
+            'recent': [
+                {'$sort': {'date': -1, '_id': -1}},
+                {'$limit': recent}
+            ]
+        }}
+    ]
+
+
+def _decode(result):
+    facets = result[0] if result else {}
+    totals = facets.get('totals') or [{}]
+    weekly = [0, 0, 0, 0]
+    for bucket in facets.get('weekly', []):
+        if bucket['_id'] is not None:
+            weekly[int(bucket['_id'])] += bucket['spent']
+    return {
+        'total_spent': totals[0].get('spent', 0),
+        'count': totals[0].get('count', 0),
+        'by_category': {row['_id']: row['spent'] for row in facets.get('by_category', [])},
+        'weekly': weekly,
+        # Oldest first, the order both callers list them in
+        'recent': [Expense.from_doc(doc) for doc in reversed(facets.get('recent', []))]
+    }
+
+
+def expense_rollup(uow, user_id, recent=RECENT_EXPENSES):
+    """Totals, per-category spend, weekly buckets and the latest expenses, computed by the server"""
+    return _decode(uow.aggregate('Expense', expense_rollup_pipeline(user_id, recent)))
@@ -12,6 +12,7 @@ from config import config
 from app.forms import LoginForm, RegistrationForm, BudgetForm, ExpenseForm, InvestmentForm, GoalForm, UserProfileForm, AssetForm, RetirementPlanForm, AutomatedRetirementForm, RetirementProfileForm, RetirementCalculatorForm
 from app.mongoModels import Investment, User, Budget, Expense, Goal, UserProfile, Asset, RetirementPlan
 from app.operations import mongoDBClient, deserializeDoc, summarize_user_financial_context
+from app.httpclient import http_client
 
 advice_bp = Blueprint("advice", __name__)
 
@@ -49,10 +50,11 @@ def advice():
                     "contents": [{"parts": [{"text": f"{system_prompt}\n\n{question}"}]}]
                 }
                 
-                response = requests.post(
+                response = http_client.post(
                     url,
                     headers=headers,
-                    json=data
+                    json=data,
+                    timeout=current_app.config["GEMINI_TIMEOUT"]
                 )
 
                 print(response.json())
@@ -116,10 +118,11 @@ def advice_chat():
             "contents": [{"parts": [{"text": f"{system_prompt}\n\n{question}"}]}]
         }
         
-        response = requests.post(
+        response = http_client.post(
             url,
             headers=headers,
-            json=data
+            json=data,
+            timeout=current_app.config["GEMINI_TIMEOUT"]
         )
         
         if response.status_code == 200:
@@ -7,6 +7,7 @@ import json
 from functools import lru_cache
 import re
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 
 from config import config
 from app.forms import LoginForm, RegistrationForm, BudgetForm, ExpenseForm, InvestmentForm, GoalForm, UserProfileForm, AssetForm, RetirementPlanForm, AutomatedRetirementForm, RetirementProfileForm, RetirementCalculatorForm
@@ -67,12 +68,14 @@ def register():
             )
             user.set_password(form.password.data)
 
-            doc = vars(user)
-            doc.pop("_id", None)
+            doc = user.to_doc()
             current_app.mongo.getCollectionEndpoint('User').insert_one(doc)
 
             flash('Registration successful! Please log in with your new account.', 'login_success')
             return redirect(url_for('auth.login'))
+        except DuplicateKeyError:
+            # A concurrent registration took the username or email after the checks above
+            flash('Username or email already registered. Please choose another or try logging in.', 'error')
         except Exception as e:
             flash('Registration failed. Please try again.', 'error')
     
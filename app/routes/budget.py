@@ -12,6 +12,7 @@ from config import config
 from app.forms import LoginForm, RegistrationForm, BudgetForm, ExpenseForm, InvestmentForm, GoalForm, UserProfileForm, AssetForm, RetirementPlanForm, AutomatedRetirementForm, RetirementProfileForm, RetirementCalculatorForm
 from app.mongoModels import Investment, User, Budget, Expense, Goal, UserProfile, Asset, RetirementPlan
 from app.operations import mongoDBClient, deserializeDoc
+from app.unitofwork import unit_of_work
 
 budget_bp = Blueprint("budget", __name__)
 
@@ -27,9 +28,9 @@ def budget():
             month=form.month.data,
             year=int(form.year.data)
         )
-        doc = vars(budget)
-        doc.pop("_id", None)
-        current_app.mongo.getCollectionEndpoint('Budget').insert_one(doc)
+        uow = unit_of_work()
+        uow.insert('Budget', budget.to_doc())
+        uow.commit()
 
         flash('Budget added successfully!', 'success')
         return redirect(url_for('budget.budget'))
@@ -43,10 +44,10 @@ def budget():
 @budget_bp.route('/edit_budget/<budget_id>', methods=['GET', 'POST'], endpoint='edit_budget')
 @login_required
 def edit_budget(budget_id):
-    budget_doc = current_app.mongo.getCollectionEndpoint('Budget').find_one({"_id": ObjectId(budget_id)})
-    if not budget_doc:
+    uow = unit_of_work()
+    budget = uow.model('Budget', {"_id": ObjectId(budget_id)})
+    if not budget:
         abort(404)
-    budget = deserializeDoc.budget(budget_doc)
 
     if budget.user_id != current_user._id:
         flash('Access denied.', 'error')
@@ -59,7 +60,7 @@ def edit_budget(budget_id):
         budget.month = form.month.data
         budget.year = int(form.year.data)
         
-        current_app.mongo.getCollectionEndpoint('Budget').update_one(
+        uow.update('Budget',
             { "_id" : ObjectId(budget_id) },
             { "$set" : {
                 "category" : budget.category,
@@ -68,6 +69,7 @@ def edit_budget(budget_id):
                 "year" : budget.year,
             }}
         )
+        uow.commit()
 
         flash('Budget updated successfully!', 'success')
         return redirect(url_for('budget.budget'))
@@ -82,15 +84,16 @@ def edit_budget(budget_id):
 @budget_bp.route('/delete_budget/<budget_id>', methods=['POST'], endpoint='delete_budget')
 @login_required
 def delete_budget(budget_id):
-    budget_doc = current_app.mongo.getCollectionEndpoint('Budget').find_one({"_id": ObjectId(budget_id)})
-    if not budget_doc:
+    uow = unit_of_work()
+    budget = uow.model('Budget', {"_id": ObjectId(budget_id)})
+    if not budget:
         abort(404)
-    budget = deserializeDoc.budget(budget_doc)
 
     if budget.user_id != current_user._id:
         flash('Access denied.', 'error')
         return redirect(url_for('budget.budget'))
     
-    current_app.mongo.getCollectionEndpoint('Budget').delete_one({"_id" : ObjectId(budget_id)})
+    uow.delete('Budget', {"_id" : ObjectId(budget_id)})
+    uow.commit()
     flash('Budget deleted successfully!', 'success')
     return redirect(url_for('budget.budget'))
@@ -11,7 +11,8 @@ from bson import ObjectId
 from config import config
 from app.forms import LoginForm, RegistrationForm, BudgetForm, ExpenseForm, InvestmentForm, GoalForm, UserProfileForm, AssetForm, RetirementPlanForm, AutomatedRetirementForm, RetirementProfileForm, RetirementCalculatorForm
 from app.mongoModels import Investment, User, Budget, Expense, Goal, UserProfile, Asset, RetirementPlan
-from app.operations import mongoDBClient, deserializeDoc, fetch_exchange_rate
+from app.operations import mongoDBClient, deserializeDoc, fetch_exchange_rate_on
+from app.unitofwork import unit_of_work
 
 expenses_bp = Blueprint("expenses", __name__)
 
@@ -19,20 +20,17 @@ expenses_bp = Blueprint("expenses", __name__)
 @login_required
 def expenses():
     form = ExpenseForm()
+    uow = unit_of_work()
     
     # Get categories from existing budgets
-    budgets = list(current_app.mongo.getCollectionEndpoint('Budget').find({"user_id":current_user._id}))
-    for i in range(len(budgets)):
-        budgets[i] = deserializeDoc.budget(budgets[i])
-
-    categories = [budget.category for budget in budgets]
+    categories = uow.values('Budget', {"user_id":current_user._id}, 'category')
     form.category.choices = [(cat, cat) for cat in categories]
     
     if form.validate_on_submit():
         # Convert amount to USD
         amount_usd = form.amount.data
         if form.currency.data != 'USD':
-            rate = fetch_exchange_rate(form.currency.data, 'USD', current_app.config["EXCHANGE_RATE_API_KEY"])
+            rate = fetch_exchange_rate_on(form.currency.data, 'USD', form.date.data, current_app.config["EXCHANGE_RATE_API_KEY"])
             amount_usd = form.amount.data * rate
         
         expense = Expense(
@@ -44,9 +42,8 @@ def expenses():
             currency=form.currency.data,
             converted_amount_usd=amount_usd
         )
-        doc = vars(expense)
-        doc.pop("_id", None)
-        current_app.mongo.getCollectionEndpoint('Expense').insert_one(doc)
+        uow.insert('Expense', expense.to_doc())
+        uow.commit()
         flash('Expense added successfully!', 'success')
         return redirect(url_for('expenses.expenses'))
     
@@ -60,10 +57,10 @@ def expenses():
 @expenses_bp.route('/edit_expense/<expense_id>', methods=['GET', 'POST'], endpoint='edit_expense')
 @login_required
 def edit_expense(expense_id):
-    expense_doc = current_app.mongo.getCollectionEndpoint('Expense').find_one({"_id": ObjectId(expense_id)})
-    if not expense_doc:
+    uow = unit_of_work()
+    expense = uow.model('Expense', {"_id": ObjectId(expense_id)})
+    if not expense:
         abort(404)
-    expense = deserializeDoc.expense(expense_doc)
 
     if expense.user_id != current_user._id:
         flash('Access denied.', 'error')
@@ -72,18 +69,14 @@ def edit_expense(expense_id):
     form = ExpenseForm()
     
     # Get categories from existing budgets
-    budgets = list(current_app.mongo.getCollectionEndpoint('Budget').find({"user_id":current_user._id}))
-    for i in range(len(budgets)):
-        budgets[i] = deserializeDoc.budget(budgets[i])
-
-    categories = [budget.category for budget in budgets]
+    categories = uow.values('Budget', {"user_id":current_user._id}, 'category')
     form.category.choices = [(cat, cat) for cat in categories]
     
     if form.validate_on_submit():
         # Convert amount to USD
         amount_usd = form.amount.data
         if form.currency.data != 'USD':
-            rate = fetch_exchange_rate(form.currency.data, 'USD', current_app.config["EXCHANGE_RATE_API_KEY"])
+            rate = fetch_exchange_rate_on(form.currency.data, 'USD', form.date.data, current_app.config["EXCHANGE_RATE_API_KEY"])
             amount_usd = form.amount.data * rate
         
         expense.amount = form.amount.data
@@ -93,7 +86,7 @@ def edit_expense(expense_id):
         expense.currency = form.currency.data
         expense.converted_amount_usd = amount_usd
         
-        current_app.mongo.getCollectionEndpoint('Expense').update_one(
+        uow.update('Expense',
             {"_id": ObjectId(expense_id)},
             {"$set": {
                 "amount":expense.amount,
@@ -103,6 +96,7 @@ def edit_expense(expense_id):
                 "currency":expense.currency,
                 "converted_amount_usd":expense.converted_amount_usd
             }})
+        uow.commit()
 
         flash('Expense updated successfully!', 'success')
         return redirect(url_for('expenses.expenses'))
@@ -118,15 +112,16 @@ def edit_expense(expense_id):
 @expenses_bp.route('/delete_expense/<expense_id>', methods=['POST'], endpoint='delete_expense')
 @login_required
 def delete_expense(expense_id):
-    expense_doc = current_app.mongo.getCollectionEndpoint('Expense').find_one({"_id": ObjectId(expense_id)})
-    if not expense_doc:
+    uow = unit_of_work()
+    expense = uow.model('Expense', {"_id": ObjectId(expense_id)})
+    if not expense:
         abort(404)
-    expense = deserializeDoc.expense(expense_doc)
 
     if expense.user_id != current_user._id:
         flash('Access denied.', 'error')
         return redirect(url_for('expenses.expenses'))
     
-    current_app.mongo.getCollectionEndpoint('Expense').delete_one({"_id" : ObjectId(expense_id)})
+    uow.delete('Expense', {"_id" : ObjectId(expense_id)})
+    uow.commit()
     flash('Expense deleted successfully!', 'success')
     return redirect(url_for('expenses.expenses'))
@@ -12,6 +12,7 @@ from config import config
 from app.forms import LoginForm, RegistrationForm, BudgetForm, ExpenseForm, InvestmentForm, GoalForm, UserProfileForm, AssetForm, RetirementPlanForm, AutomatedRetirementForm, RetirementProfileForm, RetirementCalculatorForm
 from app.mongoModels import Investment, User, Budget, Expense, Goal, UserProfile, Asset, RetirementPlan
 from app.operations import mongoDBClient, deserializeDoc
+from app.unitofwork import unit_of_work
 
 goals_bp = Blueprint("goals", __name__)
 
@@ -37,9 +38,9 @@ def add_goal():
             target_date=datetime.combine(form.target_date.data, datetime.min.time())
         )
 
-        doc = vars(goal)
-        doc.pop("_id", None)
-        current_app.mongo.getCollectionEndpoint('Goal').insert_one(doc)
+        uow = unit_of_work()
+        uow.insert('Goal', goal.to_doc())
+        uow.commit()
         flash('Goal added successfully!', 'success')
         return redirect(url_for('goals.goals'))
     
@@ -48,10 +49,10 @@ def add_goal():
 @goals_bp.route('/goals/edit/<goal_id>', methods=['GET', 'POST'], endpoint='edit_goal')
 @login_required
 def edit_goal(goal_id):
-    goal_doc = current_app.mongo.getCollectionEndpoint('Goal').find_one({"_id": ObjectId(goal_id)})
-    if not goal_doc:
+    uow = unit_of_work()
+    goal = uow.model('Goal', {"_id": ObjectId(goal_id)})
+    if not goal:
         abort(404)
-    goal = deserializeDoc.goal(goal_doc)
 
     if goal.user_id != current_user._id:
         flash('Access denied.', 'error')
@@ -64,7 +65,7 @@ def edit_goal(goal_id):
         goal.current_amount = form.current_amount.data
         goal.target_date = datetime.combine(form.target_date.data, datetime.min.time())
         
-        current_app.mongo.getCollectionEndpoint('Goal').update_one(
+        uow.update('Goal',
             {"_id": ObjectId(goal_id)},
             {"$set": {
                 "name": goal.name,
@@ -72,6 +73,7 @@ def edit_goal(goal_id):
                 "current_amount": goal.current_amount,
                 "target_date": goal.target_date,
             }})
+        uow.commit()
         
         flash('Goal updated successfully!', 'success')
         return redirect(url_for('goals.goals'))
@@ -86,14 +88,15 @@ def edit_goal(goal_id):
 @goals_bp.route('/goals/delete/<goal_id>', methods=['POST'], endpoint='delete_goal')
 @login_required
 def delete_goal(goal_id):
-    goal_doc = current_app.mongo.getCollectionEndpoint('Goal').find_one({"_id": ObjectId(goal_id)})
-    if not goal_doc:
+    uow = unit_of_work()
+    goal = uow.model('Goal', {"_id": ObjectId(goal_id)})
+    if not goal:
         abort(404)
-    goal = deserializeDoc.goal(goal_doc)
     if goal.user_id != current_user._id:
         flash('Access denied.', 'error')
         return redirect(url_for('goals.goals'))
     
-    current_app.mongo.getCollectionEndpoint('Goal').delete_one({"_id" : ObjectId(goal_id)})
+    uow.delete('Goal', {"_id" : ObjectId(goal_id)})
+    uow.commit()
     flash('Goal deleted successfully!', 'success')
     return redirect(url_for('goals.goals'))
@@ -11,7 +11,11 @@ from bson import ObjectId
 from config import config
 from app.forms import LoginForm, RegistrationForm, BudgetForm, ExpenseForm, InvestmentForm, GoalForm, UserProfileForm, AssetForm, RetirementPlanForm, AutomatedRetirementForm, RetirementProfileForm, RetirementCalculatorForm
 from app.mongoModels import Investment, User, Budget, Expense, Goal, UserProfile, Asset, RetirementPlan
-from app.operations import mongoDBClient, deserializeDoc, fetch_exchange_rate, get_stock_price, get_currency_symbol
+from app.operations import mongoDBClient, deserializeDoc, fetch_exchange_rate, get_stock_prices, get_currency_symbol
+from app.singleflight import quote_flight, profile_flight
+from app.httpclient import http_client
+from app.unitofwork import unit_of_work
+from app.rollups import expense_rollup
 
 main_bp = Blueprint("main", __name__)
 
@@ -58,14 +62,14 @@ def onboarding():
         ]
         
         try:
-            response = requests.post(
+            response = http_client.post(
                 "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent",
                 headers={
                     "Content-Type": "application/json",
                     "x-goog-api-key": GEMINI_API_KEY
                 },
                 json={"contents": conversation},
-                timeout=60
+                timeout=current_app.config["GEMINI_TIMEOUT"]
             )
             
             if response.status_code == 200:
@@ -125,6 +129,7 @@ def onboarding_confirm():
     
     # Get current user
     user = current_user
+    uow = unit_of_work()
     
     # Save income (we'll add this to a new Income model later)
     # For now, we'll store it in session
@@ -142,9 +147,7 @@ def onboarding_confirm():
                     month=datetime.now().strftime('%B'),
                     year=datetime.now().year
                 )
-                doc = vars(budget)
-                doc.pop("_id", None)
-                current_app.mongo.getCollectionEndpoint("Budget").insert_one(doc)
+                uow.insert("Budget", budget.to_doc())
     
     # Save AI-suggested savings goals
     if goal_names and goal_targets:
@@ -165,9 +168,10 @@ def onboarding_confirm():
                     current_amount=0,
                     target_date=target_date
                 )
-                doc = vars(goal)
-                doc.pop("_id", None)
-                current_app.mongo.getCollectionEndpoint("Goal").insert_one(doc)
+                uow.insert("Goal", goal.to_doc())
+    
+    # One bulk write per collection instead of a round trip per suggested budget and goal
+    uow.commit()
     
     try:
         flash('Welcome! Your personalized budget has been set up.', 'success')
@@ -193,6 +197,40 @@ def set_currency():
     session['currency_rate'] = rate
     return redirect(request.referrer or url_for('main.dashboard'))
     
+@main_bp.route('/api/quotes', endpoint="quotes")
+@login_required
+def quotes():
+    """Quotes for ?symbols=AAPL,MSFT in one call: cached ones at once, the rest fetched together under a deadline"""
+    symbols = list(dict.fromkeys(s.strip().upper() for s in request.args.get('symbols', '').split(',') if s.strip()))
+    if len(symbols) > current_app.config["QUOTES_MAX_SYMBOLS"]:
+        return jsonify({'error': f'at most {current_app.config["QUOTES_MAX_SYMBOLS"]} symbols per request'}), 400
+    prices = get_stock_prices(symbols, current_app.config["FINNHUB_API_KEY"], timeout=current_app.config["QUOTE_BATCH_TIMEOUT"])
+    return jsonify({
+        'quotes': prices,
+        'missing': [symbol for symbol in symbols if symbol not in prices]
+    })
+
+@main_bp.route('/api/cache/stats', endpoint="cache_stats")
+@login_required
+def cache_stats():
+    """Expose quote cache and upstream rate limit counters so they can be sized"""
+    stats = current_app.quote_cache.stats()
+    stats['finnhub_rate_limit'] = current_app.finnhub_limiter.stats()
+    stats['quote_providers'] = current_app.quote_providers.stats()
+    stats['circuits'] = {name: breaker.stats() for name, breaker in current_app.breakers.items()}
+    stats['http'] = current_app.http_client.stats()
+    stats['single_flight'] = {
+        'quote': quote_flight.stats(),
+        'profile': profile_flight.stats()
+    }
+    stats['company_profiles'] = current_app.profile_store.stats()
+    stats['price_refresher'] = current_app.price_refresher.stats()
+    stats['trade_stream'] = current_app.trade_ingestor.stats()
+    stats['price_streams'] = current_app.stream_slots.stats()
+    stats['candles'] = current_app.candle_store.stats()
+    stats['close_cache'] = current_app.close_cache.stats()
+    return jsonify(stats)
+
 @main_bp.route('/', endpoint="dashboard")
 @login_required
 def dashboard():
@@ -204,29 +242,19 @@ def dashboard():
     if 'currency_rate' not in session:
         session['currency_rate'] = 1.0
     
-    # Get user's data
-    budgets = list(current_app.mongo.getCollectionEndpoint('Budget').find({"user_id":current_user._id}))
-    for i in range(0, len(budgets)):
-        budgets[i] = deserializeDoc.budget(budgets[i])
-    # budgets = Budget.query.filter_by(user_id=current_user.id).all()
-    expenses = list(current_app.mongo.getCollectionEndpoint('Expense').find({"user_id":current_user._id}))
-    for i in range(0, len(expenses)):
-        expenses[i] = deserializeDoc.expense(expenses[i])
-    # expenses = Expense.query.filter_by(user_id=current_user.id).all()
-    investments = list(current_app.mongo.getCollectionEndpoint('Investment').find({"user_id":current_user._id}))
-    for i in range(0, len(investments)):
-        investments[i] = deserializeDoc.investment(investments[i])
-    # investments = Investment.query.filter_by(user_id=current_user.id).all()
-    goals = list(current_app.mongo.getCollectionEndpoint('Goal').find({"user_id":current_user._id}))
-    for i in range(0, len(goals)):
-        goals[i] = deserializeDoc.goal(goals[i])
-    # goals = Goal.query.filter_by(user_id=current_user.id).all()
+    # Get user's data, shared with anything else in this request that reads the same queries
+    uow = unit_of_work()
+    budgets = uow.models('Budget', {"user_id":current_user._id})
+    # Spending is rolled up by the server, so this costs the same however many expenses the user has
+    spending = expense_rollup(uow, current_user._id)
+    investments = uow.models('Investment', {"user_id":current_user._id})
+    goals = uow.models('Goal', {"user_id":current_user._id})
     
-    print(f"DEBUG: Dashboard - User {current_user._id} has {len(budgets)} budgets, {len(expenses)} expenses, {len(investments)} investments, {len(goals)} goals")
+    print(f"DEBUG: Dashboard - User {current_user._id} has {len(budgets)} budgets, {spending['count']} expenses, {len(investments)} investments, {len(goals)} goals")
     
     # Calculate totals
     total_budget = sum(b.limit_amount for b in budgets)
-    total_expenses = sum(e.converted_amount_usd for e in expenses)
+    total_expenses = spending['total_spent']
     total_investments = sum(i.shares * i.purchase_price for i in investments)
     total_goals = sum(g.target_amount for g in goals)
     
@@ -240,7 +268,7 @@ def dashboard():
     
     # Calculate categories from budgets
     for budget in budgets:
-        spent = sum(e.converted_amount_usd for e in expenses if e.category == budget.category)
+        spent = spending['by_category'].get(budget.category, 0)
         data['categories'].append({
             'name': budget.category,
             'budget': budget.limit_amount,
@@ -248,35 +276,17 @@ def dashboard():
         })
     
     # If no budgets exist, create categories from expenses
-    if not data['categories'] and expenses:
-        # Group expenses by category
-        category_totals = {}
-        for expense in expenses:
-            category = expense.category
-            if category not in category_totals:
-                category_totals[category] = 0
-            category_totals[category] += expense.converted_amount_usd
-        
+    if not data['categories'] and spending['count']:
         # Create category data from expenses
-        for category, spent in category_totals.items():
+        for category, spent in spending['by_category'].items():
             data['categories'].append({
                 'name': category,
                 'budget': spent,  # Use spent amount as budget for now
                 'spent': spent
             })
     
-    # Generate weekly spending data for the chart
-    if expenses:
-        # Group expenses by week
-        weekly_spending = [0, 0, 0, 0]  # 4 weeks
-        for expense in expenses:
-            # Calculate which week this expense belongs to (simple logic)
-            week_index = min(3, int((expense.date.day - 1) / 7))
-            weekly_spending[week_index] += expense.converted_amount_usd
-        
-        data['weekly_spending'] = weekly_spending
-    else:
-        data['weekly_spending'] = [0, 0, 0, 0]
+    # Weekly spending for the chart, bucketed by day of the month (see app/rollups.py)
+    data['weekly_spending'] = spending['weekly']
     
     # Set budget for chart (use income if available, otherwise use total spent)
     if data['income'] > 0:
@@ -287,13 +297,13 @@ def dashboard():
         data['chart_budget'] = total_expenses if total_expenses > 0 else 1000  # Default
     
     # Get recent expenses (last 5)
-    recent_expenses = expenses[-5:] if expenses else []
+    recent_expenses = spending['recent']
     
     # Calculate investments snapshot with real-time prices
     investments_snapshot = []
+    prices = get_stock_prices([inv.symbol for inv in investments], current_app.config["FINNHUB_API_KEY"], timeout=current_app.config["QUOTE_BATCH_TIMEOUT"])
     for inv in investments:
-        # Get current price from API
-        price_data = get_stock_price(inv.symbol, current_app.config["FINNHUB_API_KEY"])
+        price_data = prices.get(inv.symbol)
         if price_data and 'current_price' in price_data:
             current_price = price_data['current_price']
             current_value = inv.shares * current_price
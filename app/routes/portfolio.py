@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify, flash, abort, Blueprint, current_app
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, flash, abort, Blueprint, current_app, Response, stream_with_context
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from datetime import datetime, date, timedelta
 from dotenv import load_dotenv
@@ -12,7 +12,9 @@ from config import config
 from app.forms import LoginForm, RegistrationForm, BudgetForm, ExpenseForm, InvestmentForm, GoalForm, UserProfileForm, AssetForm, RetirementPlanForm, AutomatedRetirementForm, RetirementProfileForm, RetirementCalculatorForm
 from app.mongoModels import Investment, User, Budget, Expense, Goal, UserProfile, Asset, RetirementPlan
 from app.operations import mongoDBClient, deserializeDoc
-from app.operations import calculate_monthly_savings, search_stock_api, get_enhanced_expected_return, get_enhanced_risk_level, get_asset_categorization_from_finnhub, get_expected_return_for_asset, get_risk_level_for_asset, fetch_exchange_rate, get_stock_price
+from app.pricestream import price_events, price_snapshot, stream_slots
+from app.unitofwork import unit_of_work
+from app.operations import calculate_monthly_savings, search_stock_api, get_enhanced_expected_return, get_enhanced_risk_level, get_asset_categorization_from_finnhub, get_expected_return_for_asset, get_risk_level_for_asset, enrich_assets, fetch_exchange_rate, get_stock_price, get_stock_prices, get_cached_stock_prices
 
 portfolio_bp = Blueprint("portfolio", __name__)
 
@@ -82,6 +84,22 @@ def get_allocation_expected_return():
         'source': 'curated'
     })
 
+@portfolio_bp.route('/portfolio/allocation/enrich', methods=['POST'], endpoint='enrich_assets')
+@login_required
+def enrich_assets_batch():
+    """Batch version of get_expected_return: takes {"assets": [{"symbol", "asset_type"}, ...]} or {"symbols": [...]}"""
+    payload = request.get_json(silent=True) or {}
+    assets = payload.get('assets')
+    if assets is None:
+        assets = [{'symbol': symbol} for symbol in payload.get('symbols') or []]
+    if not isinstance(assets, list) or not all(isinstance(asset, dict) for asset in assets):
+        return jsonify({'error': 'assets must be a list of objects'}), 400
+    if len(assets) > current_app.config["ENRICH_BATCH_MAX"]:
+        return jsonify({'error': f'at most {current_app.config["ENRICH_BATCH_MAX"]} assets per request'}), 400
+
+    results = enrich_assets(assets, current_app.config["FINNHUB_API_KEY"], timeout=current_app.config["ENRICH_BATCH_TIMEOUT"])
+    return jsonify({'assets': results})
+
 # Unified Portfolio Management Routes
 @portfolio_bp.route('/portfolio', endpoint='portfolio_overview')
 @login_required
@@ -105,10 +123,11 @@ def portfolio_overview():
     for i in range(0, len(retirement_plans)):
         retirement_plans[i] = deserializeDoc.retirement_plan(retirement_plans[i])
 
-    # Get real-time prices for current investments (limit to first 5 to avoid API limits)
+    # Get real-time prices for all current investments in one batch
+    prices = get_stock_prices([inv.symbol for inv in current_investments], current_app.config["FINNHUB_API_KEY"], timeout=current_app.config["QUOTE_BATCH_TIMEOUT"])
     investment_prices = {}
-    for investment in current_investments[:5]:
-        price_data = get_stock_price(investment.symbol, current_app.config["FINNHUB_API_KEY"])
+    for investment in current_investments:
+        price_data = prices.get(investment.symbol)
         if price_data:
             investment_prices[investment.symbol] = price_data
         else:
@@ -176,10 +195,11 @@ def current_holdings():
     total_current_value = 0
     total_gain_loss = 0
     
-    # Get real-time prices
+    # Get real-time prices for every holding in one batch
+    prices = get_stock_prices([inv.symbol for inv in investments], current_app.config["FINNHUB_API_KEY"], timeout=current_app.config["QUOTE_BATCH_TIMEOUT"])
     investment_prices = {}
-    for investment in investments[:10]:  # Limit to avoid API rate limits
-        price_data = get_stock_price(investment.symbol, current_app.config["FINNHUB_API_KEY"])
+    for investment in investments:
+        price_data = prices.get(investment.symbol)
         if price_data:
             investment_prices[investment.symbol] = price_data
             print(f"DEBUG: Got real-time price for {investment.symbol}: ${price_data['current_price']}")
@@ -220,6 +240,50 @@ def current_holdings():
                             total_gain_loss=total_gain_loss,
                             total_gain_loss_pct=total_gain_loss_pct)
 
+@portfolio_bp.route('/portfolio/holdings/stream', endpoint='holdings_stream')
+@login_required
+def holdings_stream():
+    """Server-Sent Events stream of price updates for the current user's holdings"""
+    # Each stream holds a worker thread, so past the cap the page is told to poll holdings_prices instead
+    if not stream_slots.try_acquire():
+        return Response("Too many live price streams on this worker\n", status=503, mimetype='text/plain',
+                        headers={'Retry-After': str(int(current_app.config["PRICE_STREAM_INTERVAL"]))})
+    try:
+        symbols = current_app.mongo.getCollectionEndpoint('Investment').distinct('symbol', {"user_id":current_user._id})
+    except Exception:
+        stream_slots.release()
+        raise
+    events = price_events(
+        symbols,
+        poll_interval=current_app.config["PRICE_STREAM_INTERVAL"],
+        max_duration=current_app.config["PRICE_STREAM_MAX_DURATION"]
+    )
+    response = Response(stream_with_context(events), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # The server closes the response however the stream ends, even if the client left before the first frame
+    response.call_on_close(stream_slots.release)
+    return response
+
+@portfolio_bp.route('/portfolio/holdings/prices', endpoint='holdings_prices')
+@login_required
+def holdings_prices():
+    """Cached quotes for the current user's holdings, polled by pages that could not get a stream"""
+    symbols = current_app.mongo.getCollectionEndpoint('Investment').distinct('symbol', {"user_id":current_user._id})
+    return jsonify({'prices': price_snapshot(symbols), 'interval': current_app.config["PRICE_STREAM_INTERVAL"]})
+
+@portfolio_bp.route('/portfolio/candles/<symbol>', endpoint='symbol_candles')
+@login_required
+def symbol_candles(symbol):
+    """Daily candles for a symbol from the candle store, defaulting to the past year"""
+    try:
+        end = date.fromisoformat(request.args['end']) if request.args.get('end') else date.today()
+        start = date.fromisoformat(request.args['start']) if request.args.get('start') else end - timedelta(days=365)
+    except ValueError:
+        return jsonify({'error': 'start and end must be YYYY-MM-DD'}), 400
+    return jsonify({'symbol': symbol.upper(), 'candles': current_app.candle_store.get_candles(symbol, start, end)})
+
 @portfolio_bp.route('/portfolio/holdings/add', methods=['GET', 'POST'], endpoint='add_holding')
 @login_required
 def add_holding():
@@ -232,9 +296,9 @@ def add_holding():
             purchase_price=form.purchase_price.data,
             purchase_date=datetime.combine(form.purchase_date.data, datetime.min.time())
         )
-        doc = vars(investment)
-        doc.pop("_id", None)
-        current_app.mongo.getCollectionEndpoint('Investment').insert_one(doc)
+        uow = unit_of_work()
+        uow.insert('Investment', investment.to_doc())
+        uow.commit()
         flash('Investment added successfully!', 'success')
         return redirect(url_for('portfolio.current_holdings'))
     
@@ -243,10 +307,10 @@ def add_holding():
 @portfolio_bp.route('/portfolio/holdings/edit/<investment_id>', methods=['GET', 'POST'], endpoint='edit_holding')
 @login_required
 def edit_holding(investment_id):
-    investment_doc = current_app.mongo.getCollectionEndpoint('Investment').find_one({"_id": ObjectId(investment_id)})
-    if not investment_doc:
+    uow = unit_of_work()
+    investment = uow.model('Investment', {"_id": ObjectId(investment_id)})
+    if not investment:
         abort(404)
-    investment = deserializeDoc.investment(investment_doc)
     
     if investment.user_id != current_user._id:
         flash('Access denied.', 'error')
@@ -260,7 +324,7 @@ def edit_holding(investment_id):
         investment.purchase_date = datetime.combine(form.purchase_date.data, datetime.min.time())
         investment.updated_at = datetime.now()
         
-        current_app.mongo.getCollectionEndpoint('Investment').update_one(
+        uow.update('Investment',
             {"_id": ObjectId(investment_id)},
             {"$set": {
                 "symbol": investment.symbol,
@@ -269,6 +333,7 @@ def edit_holding(investment_id):
                 "purchase_date": investment.purchase_date,
                 "updated_at": investment.updated_at
             }})
+        uow.commit()
 
         flash('Investment updated successfully!', 'success')
         return redirect(url_for('portfolio.current_holdings'))
@@ -284,16 +349,17 @@ def edit_holding(investment_id):
 @portfolio_bp.route('/portfolio/holdings/delete/<investment_id>', methods=['POST'], endpoint='delete_holding')
 @login_required
 def delete_holding(investment_id):
-    investment_doc = current_app.mongo.getCollectionEndpoint('Investment').find_one({"_id": ObjectId(investment_id)})
-    if not investment_doc:
+    uow = unit_of_work()
+    investment = uow.model('Investment', {"_id": ObjectId(investment_id)})
+    if not investment:
         abort(404)
-    investment = deserializeDoc.investment(investment_doc)
 
     if investment.user_id != current_user._id:
         flash('Access denied.', 'error')
         return redirect(url_for('portfolio.current_holdings'))
     
-    current_app.mongo.getCollectionEndpoint('Investment').delete_one({"_id" : ObjectId(investment_id)})
+    uow.delete('Investment', {"_id" : ObjectId(investment_id)})
+    uow.commit()
     flash('Investment deleted successfully!', 'success')
     return redirect(url_for('portfolio.current_holdings'))
 
@@ -343,9 +409,9 @@ def retirement_profile():
                 eri=form.expected_retirement_income.data,
                 csave=form.current_savings.data
             )
-            docs = vars(profile)
-            docs.pop("_id", None)
-            current_app.mongo.getCollectionEndpoint('UserProfile').insert_one(docs)
+            uow = unit_of_work()
+            uow.insert('UserProfile', profile.to_doc())
+            uow.commit()
         
         flash('Retirement profile updated successfully!', 'success')
         return redirect(url_for('portfolio.retirement_planning'))
@@ -389,11 +455,9 @@ def add_asset():
             form.risk_level.data = get_enhanced_risk_level(form.symbol.data, current_app.config["FINNHUB_API_KEY"])
         
         # Check weight constraints
-        assets = list(current_app.mongo.getCollectionEndpoint('Asset').find({"user_id":current_user._id}))
-        for i in range(len(assets)):
-            assets[i] = deserializeDoc.asset(assets[i])
-
-        existing_weight = sum(a.weight for a in assets)
+        uow = unit_of_work()
+        weights = uow.values('Asset', {"user_id":current_user._id}, 'weight')
+        existing_weight = sum(weights)
         if existing_weight + form.weight.data > 100:
             flash('Total portfolio weight cannot exceed 100%. Current total: {:.1f}%'.format(existing_weight), 'error')
             return render_template('add_asset.html', form=form)
@@ -408,9 +472,8 @@ def add_asset():
             risk_level=form.risk_level.data
         )
 
-        doc = vars(asset)
-        doc.pop("_id", None)
-        current_app.mongo.getCollectionEndpoint('Asset').insert_one(doc)
+        uow.insert('Asset', asset.to_doc())
+        uow.commit()
         flash('Asset added successfully!', 'success')
         return redirect(url_for('portfolio.asset_allocation'))
     
@@ -425,11 +488,12 @@ def search_assets():
     
     results = search_stock_api(query, current_app.config["FINNHUB_API_KEY"])
     
-    # Add price information to each result
+    # Only cached prices are attached so typeahead never waits on upstream;
+    # the page fetches the rest in one /api/quotes call
+    prices = get_cached_stock_prices([r['symbol'] for r in results], current_app.config["FINNHUB_API_KEY"])
     for result in results:
-        price_data = get_stock_price(result['symbol'], current_app.config["FINNHUB_API_KEY"])
-        if price_data:
-            result['price'] = price_data
+        if result['symbol'] in prices:
+            result['price'] = prices[result['symbol']]
     
     return jsonify(results)
 
@@ -442,21 +506,22 @@ def search_holdings():
     
     results = search_stock_api(query, current_app.config["FINNHUB_API_KEY"])
     
-    # Add price information to each result
+    # Only cached prices are attached so typeahead never waits on upstream;
+    # the page fetches the rest in one /api/quotes call
+    prices = get_cached_stock_prices([r['symbol'] for r in results], current_app.config["FINNHUB_API_KEY"])
     for result in results:
-        price_data = get_stock_price(result['symbol'], current_app.config["FINNHUB_API_KEY"])
-        if price_data:
-            result['price'] = price_data
+        if result['symbol'] in prices:
+            result['price'] = prices[result['symbol']]
     
     return jsonify({'results': results})
 
 @portfolio_bp.route('/portfolio/allocation/edit/<asset_id>', methods=['GET', 'POST'], endpoint='edit_asset')
 @login_required
 def edit_asset(asset_id):
-    asset_doc = current_app.mongo.getCollectionEndpoint('Asset').find_one({"_id": ObjectId(asset_id)})
-    if not asset_doc:
+    uow = unit_of_work()
+    asset = uow.model('Asset', {"_id": ObjectId(asset_id)})
+    if not asset:
         abort(404)
-    asset = deserializeDoc.asset(asset_doc)
 
     if asset.user_id != current_user._id:
         flash('Access denied.', 'error')
@@ -475,11 +540,8 @@ def edit_asset(asset_id):
             form.risk_level.data = get_enhanced_risk_level(form.symbol.data, current_app.config["FINNHUB_API_KEY"])
         
         # Check weight constraints
-        assets = list(current_app.mongo.getCollectionEndpoint('Asset').find({"user_id":current_user._id}))
-        for i in range(len(assets)):
-            assets[i] = deserializeDoc.asset(assets[i])
-
-        existing_weight = sum(a.weight for a in assets) - asset.weight
+        weights = uow.values('Asset', {"user_id":current_user._id}, 'weight')
+        existing_weight = sum(weights) - asset.weight
 
         if existing_weight + form.weight.data > 100:
             print("hello123")
@@ -494,7 +556,7 @@ def edit_asset(asset_id):
         asset.risk_level = form.risk_level.data
         asset.updated_at = datetime.now()
 
-        current_app.mongo.getCollectionEndpoint('Asset').update_one(
+        uow.update('Asset',
             {"_id": ObjectId(asset_id)},
             {"$set": {
                 "symbol" : asset.symbol,
@@ -506,6 +568,7 @@ def edit_asset(asset_id):
                 "updated_at" : asset.updated_at
             }}
         )
+        uow.commit()
         
         flash('Asset updated successfully!', 'success')
         return redirect(url_for('portfolio.asset_allocation'))
@@ -523,16 +586,17 @@ def edit_asset(asset_id):
 @portfolio_bp.route('/portfolio/allocation/delete/<asset_id>', methods=['POST'], endpoint='delete_asset')
 @login_required
 def delete_asset(asset_id):
-    asset_doc = current_app.mongo.getCollectionEndpoint('Asset').find_one({"_id": ObjectId(asset_id)})
-    if not asset_doc:
+    uow = unit_of_work()
+    asset = uow.model('Asset', {"_id": ObjectId(asset_id)})
+    if not asset:
         abort(404)
-    asset = deserializeDoc.asset(asset_doc)
 
     if asset.user_id != current_user._id:
         flash('Access denied.', 'error')
         return redirect(url_for('portfolio.asset_allocation'))
     
-    current_app.mongo.getCollectionEndpoint('Asset').delete_one({"_id" : ObjectId(asset_id)})
+    uow.delete('Asset', {"_id" : ObjectId(asset_id)})
+    uow.commit()
     flash('Asset deleted successfully!', 'success')
     return redirect(url_for('portfolio.asset_allocation'))
 
@@ -562,9 +626,9 @@ def add_retirement_plan():
             mcn=0,
             pa=0  # Will be calculated based on current savings and returns
         )
-        docs = vars(plan)
-        docs.pop("_id", None)
-        current_app.mongo.getCollectionEndpoint('RetirementPlan').insert_one(docs)
+        uow = unit_of_work()
+        uow.insert('RetirementPlan', plan.to_doc())
+        uow.commit()
         flash('Retirement plan added successfully!', 'success')
         return redirect(url_for('portfolio.retirement_plans'))
     
@@ -573,16 +637,17 @@ def add_retirement_plan():
 @portfolio_bp.route('/portfolio/retirement/plans/delete/<plan_id>', methods=['POST'], endpoint='delete_retirement_plan')
 @login_required
 def delete_retirement_plan(plan_id):
-    plan_doc = current_app.mongo.getCollectionEndpoint('RetirementPlan').find_one({"_id": ObjectId(plan_id)})
-    if not plan_doc:
+    uow = unit_of_work()
+    plan = uow.model('RetirementPlan', {"_id": ObjectId(plan_id)})
+    if not plan:
         abort(404)
-    plan = deserializeDoc.retirement_plan(plan_doc)
 
     if plan.user_id != current_user._id:
         flash('Access denied.', 'error')
         return redirect(url_for('portfolio.retirement_plans'))
     
-    current_app.mongo.getCollectionEndpoint('RetirementPlan').delete_one({"_id" : ObjectId(plan_id)})
+    uow.delete('RetirementPlan', {"_id" : ObjectId(plan_id)})
+    uow.commit()
     flash('Retirement plan deleted successfully!', 'success')
     return redirect(url_for('portfolio.retirement_plans'))
 
@@ -595,11 +660,11 @@ def automated_retirement_onboarding():
     
     if form.validate_on_submit():
         # Create or update retirement profile
-        profile_doc = current_app.mongo.getCollectionEndpoint('UserProfile').find_one()
-        profile = deserializeDoc.user_profile(profile_doc)
+        uow = unit_of_work()
+        profile = uow.model('UserProfile', {"user_id":current_user._id})
         if not profile:
             profile = UserProfile(user_id=current_user._id)
-            current_app.mongo.getCollectionEndpoint('UserProfile').insert_one(vars(profile))
+            uow.insert('UserProfile', profile.to_doc())
         
         # Auto-calculate retirement parameters based on industry standards
         current_age = form.current_age.data
@@ -653,7 +718,7 @@ def automated_retirement_onboarding():
         profile.expected_retirement_income = target_income
         profile.current_savings = current_savings
 
-        current_app.mongo.getCollectionEndpoint('UserProfile').update_one(
+        uow.update('UserProfile',
             {"_id" : profile._id},
             {"$set": {
                 'age' : profile.age,
@@ -674,10 +739,9 @@ def automated_retirement_onboarding():
             mcn=monthly_savings,
             pa=current_savings * (1 + expected_return/100)**years_to_retirement
         )
-        docs = vars(plan)
-        docs.pop("_id", None)
-        
-        current_app.mongo.getCollectionEndpoint('RetirementPlan').insert_one(docs)
+        uow.insert('RetirementPlan', plan.to_doc())
+        # Profile insert, profile update and the new plan go out as one batch per collection
+        uow.commit()
 
         flash(f'Automated retirement plan created! Target: ${target_amount:,.0f}, Monthly savings: ${monthly_savings:,.0f}', 'success')
         return redirect(url_for('portfolio.retirement_planning'))
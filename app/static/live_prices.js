@@ -0,0 +1,111 @@
+// Live holdings prices over Server-Sent Events, or by polling pollUrl when the server
+// has no stream to spare (it answers 503) or the browser lacks EventSource.
+// Rows carry data-live-symbol, data-shares and data-purchase-price; cells and summary
+// figures are marked with data-live="<field>" and are rewritten in place on each update.
+(function () {
+    function money(value, signed) {
+        const sign = signed && value >= 0 ? '+' : (value < 0 ? '-' : '');
+        return sign + '$' + Math.abs(value).toFixed(2);
+    }
+
+    function percent(value, digits) {
+        return (value >= 0 ? '+' : '') + value.toFixed(digits) + '%';
+    }
+
+    function setTrend(el, value) {
+        el.classList.toggle('text-success', value >= 0);
+        el.classList.toggle('text-danger', value < 0);
+    }
+
+    function update(root, field, text, trend) {
+        root.querySelectorAll('[data-live="' + field + '"]').forEach(function (el) {
+            el.textContent = text;
+            if (trend !== undefined) {
+                setTrend(el, trend);
+            }
+        });
+    }
+
+    window.startLivePrices = function (streamUrl, holdings, pollUrl) {
+        if (!holdings.length) {
+            return;
+        }
+        const prices = {};
+        holdings.forEach(function (h) {
+            prices[h.symbol] = h.current_price;
+        });
+
+        function refreshTotals() {
+            let purchase = 0;
+            let current = 0;
+            holdings.forEach(function (h) {
+                purchase += h.shares * h.purchase_price;
+                current += h.shares * prices[h.symbol];
+            });
+            const gain = current - purchase;
+            const gainPct = purchase > 0 ? gain / purchase * 100 : 0;
+            update(document, 'total_current_value', money(current, false));
+            update(document, 'total_gain_loss', money(gain, true), gain);
+            update(document, 'total_gain_loss_pct', percent(gainPct, 1), gainPct);
+        }
+
+        function applyQuote(symbol, quote) {
+            prices[symbol] = quote.current_price;
+            document.querySelectorAll('[data-live-symbol="' + symbol + '"]').forEach(function (row) {
+                const shares = parseFloat(row.dataset.shares);
+                const purchaseValue = shares * parseFloat(row.dataset.purchasePrice);
+                const currentValue = shares * quote.current_price;
+                const gain = currentValue - purchaseValue;
+                const gainPct = purchaseValue > 0 ? gain / purchaseValue * 100 : 0;
+                update(row, 'current_price', money(quote.current_price, false));
+                row.querySelectorAll('[data-live="stale"]').forEach(function (el) {
+                    el.remove();
+                });
+                update(row, 'change', money(quote.change || 0, true).replace('$', '') + ' (' + percent(quote.change_percent || 0, 2) + ')', quote.change || 0);
+                update(row, 'total_value', money(currentValue, false));
+                update(row, 'gain_loss', money(gain, true), gain);
+                update(row, 'gain_loss_pct', percent(gainPct, 1), gainPct);
+                update(row, 'gain_loss_with_pct', money(gain, true) + ' (' + percent(gainPct, 1) + ')', gain);
+            });
+        }
+
+        function applyQuotes(quotes) {
+            Object.keys(quotes).forEach(function (symbol) {
+                applyQuote(symbol, quotes[symbol]);
+            });
+            refreshTotals();
+        }
+
+        function poll() {
+            if (!pollUrl) {
+                return;
+            }
+            fetch(pollUrl, {credentials: 'same-origin'})
+                .then(function (response) { return response.ok ? response.json() : null; })
+                .then(function (body) {
+                    if (body) {
+                        applyQuotes(body.prices);
+                    }
+                    setTimeout(poll, ((body && body.interval) || 15) * 1000);
+                })
+                .catch(function () {
+                    setTimeout(poll, 30000);
+                });
+        }
+
+        if (!window.EventSource) {
+            poll();
+            return;
+        }
+        const source = new EventSource(streamUrl);
+        source.addEventListener('prices', function (event) {
+            applyQuotes(JSON.parse(event.data));
+        });
+        source.addEventListener('error', function () {
+            // A 503 (or any non-stream response) closes the source for good; network drops reconnect by themselves
+            if (source.readyState === EventSource.CLOSED) {
+                poll();
+            }
+        });
+    };
+})();
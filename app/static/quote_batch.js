@@ -0,0 +1,44 @@
+// Lazy prices for search results. Results render straight away with whatever price
+// the server had cached; everything else is fetched in one /api/quotes call.
+(function () {
+    window.priceInfoHtml = function (price) {
+        if (!price || !price.current_price) {
+            return '';
+        }
+        const change = price.change || 0;
+        const changeClass = change >= 0 ? 'text-success' : 'text-danger';
+        const changeSymbol = change >= 0 ? '+' : '';
+        const changePercent = price.change_percent || 0;
+        return `
+            <div class="mt-1">
+                <span class="fw-bold">$${price.current_price.toFixed(2)}</span>
+                <span class="${changeClass} ms-2">
+                    ${changeSymbol}${change.toFixed(2)} 
+                    (${changeSymbol}${changePercent.toFixed(2)}%)
+                </span>
+            </div>
+        `;
+    };
+
+    // Fills every empty [data-quote-symbol] element under container
+    window.loadMissingQuotes = function (container) {
+        const targets = Array.from(container.querySelectorAll('[data-quote-symbol]')).filter(function (el) {
+            return !el.innerHTML.trim();
+        });
+        const symbols = Array.from(new Set(targets.map(function (el) { return el.dataset.quoteSymbol; })));
+        if (!symbols.length) {
+            return;
+        }
+        fetch('/api/quotes?symbols=' + encodeURIComponent(symbols.join(',')))
+            .then(response => response.json())
+            .then(data => {
+                targets.forEach(function (el) {
+                    const quote = (data.quotes || {})[el.dataset.quoteSymbol.toUpperCase()];
+                    if (quote) {
+                        el.innerHTML = priceInfoHtml(quote);
+                    }
+                });
+            })
+            .catch(error => console.error('Error loading quotes:', error));
+    };
+})();
@@ -0,0 +1,221 @@
+import csv
+import os
+import re
+import threading
+
+from .fuzzy import DeletionIndex, TrigramIndex, max_typos
+
+SYMBOLS_FILE = os.path.join(os.path.dirname(__file__), 'data', 'symbols.csv')
+
+# Most-searched tickers float to the top of otherwise equal matches
+POPULAR_SYMBOLS = {
+    'AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA', 'META', 'NVDA', 'BRK.A', 'JNJ', 'V',
+    'JPM', 'PG', 'UNH', 'HD', 'MA', 'DIS', 'PYPL', 'NFLX', 'CRM', 'INTC',
+    'VTI', 'VOO', 'QQQ', 'SPY', 'BND', 'GLD', 'TLT', 'IEMG', 'EFA'
+}
+
+# Longest company-name prefix kept in the token index; longer query tokens are verified directly
+MAX_NAME_PREFIX = 12
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Anything this short without spaces could be a ticker missing from the bundled listing
+_TICKER_SHAPE_RE = re.compile(r"^[A-Z0-9.\-]{1,5}$")
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text.lower())
+
+
+class SymbolIndex:
+    """In-memory search over a symbol listing: a prefix trie on tickers plus a prefix index on company-name tokens"""
+    def __init__(self, rows):
+        # Entries are stored in rank order, so an entry id doubles as its rank and
+        # every id list built below is already sorted best-first
+        rows = sorted(rows, key=lambda r: (r['symbol'] not in POPULAR_SYMBOLS, len(r['symbol']), r['symbol']))
+        self.entries = rows
+        self.by_symbol = {}
+        self.trie = {}
+        self.name_prefixes = {}
+        self.name_tokens = []
+        self.token_ids = {}
+        self._fuzzy = None
+        self._fuzzy_lock = threading.Lock()
+
+        for entry_id, row in enumerate(rows):
+            symbol = row['symbol']
+            self.by_symbol[symbol] = entry_id
+
+            node = self.trie
+            for ch in symbol:
+                node = node.setdefault(ch, {'ids': []})
+                node['ids'].append(entry_id)
+
+            tokens = tokenize(row['name'])
+            self.name_tokens.append(tokens)
+            seen = set()
+            for token in tokens:
+                self.token_ids.setdefault(token, []).append(entry_id)
+                for n in range(1, min(len(token), MAX_NAME_PREFIX) + 1):
+                    prefix = token[:n]
+                    if prefix not in seen:
+                        seen.add(prefix)
+                        self.name_prefixes.setdefault(prefix, []).append(entry_id)
+
+    @classmethod
+    def from_csv(cls, path=SYMBOLS_FILE):
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = [
+                {'symbol': r['symbol'].upper(), 'name': r['name'], 'type': r['type'], 'region': r['region']}
+                for r in csv.DictReader(f) if r.get('symbol')
+            ]
+        return cls(rows)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _ticker_prefix_ids(self, query):
+        node = self.trie
+        for ch in query:
+            node = node.get(ch)
+            if node is None:
+                return []
+        return node['ids']
+
+    def _name_token_ids(self, token):
+        ids = self.name_prefixes.get(token[:MAX_NAME_PREFIX], [])
+        if len(token) <= MAX_NAME_PREFIX:
+            return ids
+        return [i for i in ids if any(t.startswith(token) for t in self.name_tokens[i])]
+
+    def _name_ids(self, query, limit):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        candidates = sorted((self._name_token_ids(t) for t in tokens), key=len)
+        if len(candidates) == 1:
+            return candidates[0][:limit]
+
+        # Walk the shortest list in rank order and keep ids every other token also matches
+        others = [set(ids) for ids in candidates[1:]]
+        matches = []
+        for entry_id in candidates[0]:
+            if all(entry_id in other for other in others):
+                matches.append(entry_id)
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    def _whole_word_ids(self, query, limit):
+        # A one-word query that is a whole name token (Arm, Block) beats names that merely start with it
+        tokens = tokenize(query)
+        return self.token_ids.get(tokens[0], [])[:limit] if len(tokens) == 1 else []
+
+    def _result(self, entry_id):
+        row = self.entries[entry_id]
+        return {'symbol': row['symbol'], 'name': row['name'], 'type': row['type'], 'region': row['region']}
+
+    def lookup(self, symbol):
+        entry_id = self.by_symbol.get(symbol.upper().strip())
+        return self._result(entry_id) if entry_id is not None else None
+
+    def has_ticker_match(self, query):
+        ticker = query.strip().upper()
+        return ticker in self.by_symbol or bool(self._ticker_prefix_ids(ticker))
+
+    def is_authoritative(self, query):
+        """Whether search() can stand in for an upstream lookup: a ticker hit, or a query that cannot be a ticker"""
+        if self.has_ticker_match(query):
+            return True
+        # Name-only hits for NET or ARM (Netflix, Under Armour) say nothing about whether the ticker exists
+        return not _TICKER_SHAPE_RE.match(query.strip().upper())
+
+    def search(self, query, limit=5):
+        """Rank exact ticker, then ticker-prefix, then whole-word and prefix company-name matches and return the top `limit`"""
+        query = query.strip()
+        if not query:
+            return []
+        ticker = query.upper()
+
+        ordered = []
+        exact = self.by_symbol.get(ticker)
+        if exact is not None:
+            ordered.append(exact)
+        ordered.extend(self._ticker_prefix_ids(ticker)[:limit])
+        ordered.extend(self._whole_word_ids(query, limit))
+        ordered.extend(self._name_ids(query, limit))
+
+        results = []
+        seen = set()
+        for entry_id in ordered:
+            if entry_id in seen:
+                continue
+            seen.add(entry_id)
+            results.append(self._result(entry_id))
+            if len(results) >= limit:
+                break
+        return results
+
+    def _fuzzy_indexes(self):
+        # Built on first use; most queries never need approximate matching
+        if self._fuzzy is None:
+            with self._fuzzy_lock:
+                if self._fuzzy is None:
+                    self._fuzzy = (DeletionIndex(self.by_symbol), TrigramIndex(self.token_ids))
+        return self._fuzzy
+
+    def fuzzy_search(self, query, limit=5):
+        """Typo-tolerant search: tickers within one edit, name tokens within a length-scaled edit budget"""
+        query = query.strip()
+        if not query:
+            return []
+        ticker_index, name_trigrams = self._fuzzy_indexes()
+
+        # Best (lowest) total distance per entry across all query tokens. Id lists are in
+        # rank order, so a single-term query only ever needs the first `limit` ids of each
+        terms = tokenize(query)
+        cap = limit if len(terms) == 1 else None
+        scores = None
+        for term in terms:
+            budget = max_typos(term)
+            term_scores = {}
+            if budget == 0:
+                for entry_id in self._name_token_ids(term)[:cap]:
+                    term_scores[entry_id] = 0
+            else:
+                for distance, token in name_trigrams.search(term, budget):
+                    for entry_id in self.token_ids[token][:cap]:
+                        if distance < term_scores.get(entry_id, budget + 1):
+                            term_scores[entry_id] = distance
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {i: scores[i] + d for i, d in term_scores.items() if i in scores}
+
+        scores = scores or {}
+        ticker = query.upper()
+        if ' ' not in ticker and 2 <= len(ticker) <= 6:
+            for distance, symbol in ticker_index.search(ticker):
+                entry_id = self.by_symbol[symbol]
+                scores[entry_id] = min(scores.get(entry_id, distance), distance)
+
+        ranked = sorted(scores.items(), key=lambda item: (item[1], item[0]))
+        return [self._result(entry_id) for entry_id, _ in ranked[:limit]]
+
+
+_symbol_index = None
+_symbol_index_lock = threading.Lock()
+
+
+def get_symbol_index():
+    """Load the bundled listing once per process"""
+    global _symbol_index
+    if _symbol_index is None:
+        with _symbol_index_lock:
+            if _symbol_index is None:
+                try:
+                    _symbol_index = SymbolIndex.from_csv()
+                except Exception as e:
+                    print(f"DEBUG: Could not load symbol listing: {e}")
+                    _symbol_index = SymbolIndex([])
+    return _symbol_index
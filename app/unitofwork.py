@@ -0,0 +1,106 @@
+from flask import current_app, g, has_app_context
+from pymongo import DeleteOne, InsertOne, UpdateOne
+
+
+class UnitOfWork:
+    """Request-scoped identity map over repository reads, with writes queued and flushed as one bulk_write per collection"""
+    def __init__(self, client):
+        self.client = client
+        self.identity_map = {}
+        self.pending = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, name, key, load):
+        # Queued writes land first so a read never misses what this request already wrote
+        if name in self.pending:
+            self.flush(name)
+        key = (name,) + key
+        if key in self.identity_map:
+            self.hits += 1
+            return self.identity_map[key]
+        self.misses += 1
+        value = self.identity_map[key] = load(self.client.getRepository(name))
+        return value
+
+    def find(self, name, query, fields=None, sort=None):
+        """Raw documents for a query, read at most once per request"""
+        return self._cached(name, ('find', repr(query), repr(fields), repr(sort)),
+                            lambda repo: repo.find(query, fields, sort))
+
+    def find_one(self, name, query, fields=None):
+        return self._cached(name, ('find_one', repr(query), repr(fields)),
+                            lambda repo: repo.find_one(query, fields))
+
+    def values(self, name, query, field):
+        return self._cached(name, ('values', repr(query), field),
+                            lambda repo: repo.values(query, field))
+
+    def aggregate(self, name, pipeline):
+        return self._cached(name, ('aggregate', repr(pipeline)),
+                            lambda repo: repo.aggregate(pipeline))
+
+    def models(self, name, query, sort=None):
+        """Model objects for a query; callers in one request share the same instances"""
+        return self._cached(name, ('models', repr(query), repr(sort)),
+                            lambda repo: [repo.deserialize(doc) for doc in repo.find(query, sort=sort)])
+
+    def model(self, name, query):
+        return self._cached(name, ('model', repr(query)),
+                            lambda repo: repo.deserialize(repo.find_one(query)))
+
+    def _queue(self, name, op):
+        self.pending.setdefault(name, []).append(op)
+        self.invalidate(name)
+
+    def insert(self, name, doc):
+        self._queue(name, InsertOne(doc))
+
+    def update(self, name, query, update):
+        self._queue(name, UpdateOne(query, update))
+
+    def delete(self, name, query):
+        self._queue(name, DeleteOne(query))
+
+    def invalidate(self, name):
+        for key in [k for k in self.identity_map if k[0] == name]:
+            del self.identity_map[key]
+
+    def flush(self, name=None):
+        """Send queued writes, one ordered bulk_write per collection; returns the number of operations sent"""
+        names = [name] if name is not None else list(self.pending)
+        sent = 0
+        for collection in names:
+            ops = self.pending.pop(collection, None)
+            if not ops:
+                continue
+            self.client.getCollectionEndpoint(collection).bulk_write(ops, ordered=True)
+            self.invalidate(collection)
+            sent += len(ops)
+        return sent
+
+    def commit(self):
+        return self.flush()
+
+
+def unit_of_work(client=None):
+    """The current request's unit of work, created on first use; outside a request each call gets a fresh one"""
+    if not has_app_context():
+        return UnitOfWork(client)
+    if '_unit_of_work' not in g:
+        g._unit_of_work = UnitOfWork(client or current_app.mongo)
+    return g._unit_of_work
+
+
+def close_unit_of_work(exception=None):
+    """Teardown hook: flush writes a route queued but never committed, unless the request failed"""
+    uow = g.pop('_unit_of_work', None)
+    if uow is None or not uow.pending:
+        return
+    if exception is not None:
+        print(f"DEBUG: Discarding {sum(len(ops) for ops in uow.pending.values())} queued writes after error: {exception}")
+        return
+    try:
+        uow.commit()
+    except Exception as e:
+        print(f"DEBUG: Flushing queued writes at teardown failed: {e}")
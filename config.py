@@ -10,6 +10,54 @@ class Config:
     EXCHANGE_RATE_API_KEY = os.environ.get('EXCHANGE_RATE_API_KEY')
     MONGO_URI = os.environ.get('URI')
     FINNHUB_API_KEY = os.environ.get('FINNHUB_API_KEY')
+    REDIS_URL = os.environ.get('REDIS_URL')
+    QUOTE_CACHE_TTL = int(os.environ.get('QUOTE_CACHE_TTL', 60))
+    QUOTE_CACHE_MAXSIZE = int(os.environ.get('QUOTE_CACHE_MAXSIZE', 1024))
+    QUOTE_STALE_TTL = int(os.environ.get('QUOTE_STALE_TTL', 24 * 3600))
+    QUOTE_BATCH_TIMEOUT = float(os.environ.get('QUOTE_BATCH_TIMEOUT', 4))
+    QUOTES_MAX_SYMBOLS = int(os.environ.get('QUOTES_MAX_SYMBOLS', 50))
+    RATE_LIMIT_STORE = os.environ.get('RATE_LIMIT_STORE')
+    FINNHUB_RATE_LIMIT = int(os.environ.get('FINNHUB_RATE_LIMIT', 60))
+    FINNHUB_RATE_BURST = int(os.environ.get('FINNHUB_RATE_BURST', 10))
+    COMPANY_PROFILE_TTL_DAYS = int(os.environ.get('COMPANY_PROFILE_TTL_DAYS', 90))
+    COMPANY_PROFILE_MISS_TTL_HOURS = int(os.environ.get('COMPANY_PROFILE_MISS_TTL_HOURS', 6))
+    FX_PIVOT_CURRENCY = os.environ.get('FX_PIVOT_CURRENCY', 'USD')
+    FX_TABLE_TTL = int(os.environ.get('FX_TABLE_TTL', 6 * 3600))
+    FX_NEGATIVE_TTL = int(os.environ.get('FX_NEGATIVE_TTL', 60))
+    FX_HISTORY_NEGATIVE_TTL = int(os.environ.get('FX_HISTORY_NEGATIVE_TTL', 3600))
+    PRICE_REFRESH_ENABLED = os.environ.get('PRICE_REFRESH_ENABLED', 'true').lower() == 'true'
+    PRICE_REFRESH_INTERVAL = float(os.environ.get('PRICE_REFRESH_INTERVAL', 60))
+    PRICE_REFRESH_JITTER = float(os.environ.get('PRICE_REFRESH_JITTER', 10))
+    PRICE_REFRESH_BATCH_SIZE = int(os.environ.get('PRICE_REFRESH_BATCH_SIZE', 20))
+    PRICE_STREAM_INTERVAL = float(os.environ.get('PRICE_STREAM_INTERVAL', 5))
+    PRICE_STREAM_MAX_DURATION = float(os.environ.get('PRICE_STREAM_MAX_DURATION', 300))
+    # Per worker; each open stream holds one of gunicorn's --threads for up to PRICE_STREAM_MAX_DURATION
+    PRICE_STREAM_MAX_CONCURRENT = int(os.environ.get('PRICE_STREAM_MAX_CONCURRENT', 4))
+    TRADE_STREAM_ENABLED = os.environ.get('TRADE_STREAM_ENABLED', 'false').lower() == 'true'
+    FINNHUB_WS_URL = os.environ.get('FINNHUB_WS_URL', 'wss://ws.finnhub.io')
+    TRADE_STREAM_MAX_SYMBOLS = int(os.environ.get('TRADE_STREAM_MAX_SYMBOLS', 50))
+    TRADE_STREAM_SYNC_INTERVAL = float(os.environ.get('TRADE_STREAM_SYNC_INTERVAL', 30))
+    # Secondary providers are opt-in, e.g. 'finnhub,yfinance' after `pip install yfinance`
+    QUOTE_PROVIDERS = os.environ.get('QUOTE_PROVIDERS', 'finnhub')
+    QUOTE_HEDGE_ENABLED = os.environ.get('QUOTE_HEDGE_ENABLED', 'true').lower() == 'true'
+    QUOTE_HEDGE_DEFAULT_DELAY = float(os.environ.get('QUOTE_HEDGE_DEFAULT_DELAY', 1.0))
+    CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', 5))
+    CIRCUIT_RESET_TIMEOUT = float(os.environ.get('CIRCUIT_RESET_TIMEOUT', 30))
+    HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 32))
+    HTTP_RETRIES = int(os.environ.get('HTTP_RETRIES', 2))
+    HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', 3.05))
+    HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', 10))
+    GEMINI_TIMEOUT = float(os.environ.get('GEMINI_TIMEOUT', 60))
+    ENRICH_BATCH_MAX = int(os.environ.get('ENRICH_BATCH_MAX', 100))
+    ENRICH_BATCH_TIMEOUT = float(os.environ.get('ENRICH_BATCH_TIMEOUT', 8))
+    INDEX_BOOTSTRAP_ENABLED = os.environ.get('INDEX_BOOTSTRAP_ENABLED', 'true').lower() == 'true'
+    CANDLE_HISTORY_DAYS = int(os.environ.get('CANDLE_HISTORY_DAYS', 5 * 365))
+    CANDLE_DAILY_APPEND = os.environ.get('CANDLE_DAILY_APPEND', 'true').lower() == 'true'
+    CANDLE_APPEND_MAX_GAP_DAYS = int(os.environ.get('CANDLE_APPEND_MAX_GAP_DAYS', 7))
+    CANDLE_APPEND_LEASE_TTL = int(os.environ.get('CANDLE_APPEND_LEASE_TTL', 600))
+    CLOSE_CACHE_ENABLED = os.environ.get('CLOSE_CACHE_ENABLED', 'true').lower() == 'true'
+    CLOSE_CACHE_DIR = os.environ.get('CLOSE_CACHE_DIR')
+    CLOSE_CACHE_YEARS = int(os.environ.get('CLOSE_CACHE_YEARS', 10))
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Candle Backfill Script
+Loads daily OHLCV history into the Candle time-series collection for every
+held symbol, or the given ones, through the rate-limited background lane.
+Symbols that already have candles only fetch the days they are missing.
+"""
+
+import argparse
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+
+def backfill_candles(symbols=None, days=None, end=None):
+    app = create_app()
+    store = app.candle_store
+    if days:
+        store.history_days = days
+    if not symbols:
+        symbols = app.price_refresher.held_symbols()
+    print(f"Backfilling candles for {len(symbols)} symbols")
+
+    result = store.backfill(symbols, end)
+    print(f"Appended {result['candles']} candles")
+    if result['failed']:
+        print(f"Could not reach a provider for: {', '.join(result['failed'])}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', help='comma separated; defaults to every held symbol')
+    parser.add_argument('--days', type=int, help='history to load for symbols with no candles yet')
+    parser.add_argument('--end', type=date.fromisoformat, help='last day to load (YYYY-MM-DD); defaults to the last closed session')
+    args = parser.parse_args()
+    symbols = [s.strip().upper() for s in args.symbols.split(',') if s.strip()] if args.symbols else None
+    backfill_candles(symbols=symbols, days=args.days, end=args.end)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Expense FX Backfill Script
+Recomputes converted_amount_usd for existing expenses with the exchange rate
+on each expense's date, streaming the collection and writing in bulk batches
+"""
+
+import argparse
+import os
+import sys
+from datetime import date
+
+from pymongo import UpdateOne
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.fx import fx_history
+
+def load_day_tables(expenses):
+    """Resolve each distinct expense day once instead of once per expense
+
+    Returns the tables plus the days with no table of their own. Those days are left out rather
+    than filled from another day, so their expenses keep the amount they already have.
+    """
+    days = expenses.aggregate([
+        {'$match': {'currency': {'$ne': 'USD'}}},
+        {'$group': {'_id': {'$dateToString': {'format': '%Y-%m-%d', 'date': '$date'}}}}
+    ])
+    tables = {}
+    missing = []
+    for day in days:
+        if not day['_id']:
+            continue
+        rates, exact = fx_history.rates_on(date.fromisoformat(day['_id']))
+        if exact:
+            tables[day['_id']] = rates
+        else:
+            missing.append(day['_id'])
+    return tables, sorted(missing)
+
+def backfill_expense_fx(batch_size=1000, dry_run=False):
+    app = create_app()
+    expenses = app.mongo.getCollectionEndpoint('Expense')
+
+    # USD expenses need no rate, so they are fixed with one server-side update
+    if not dry_run:
+        result = expenses.update_many(
+            {'currency': 'USD', '$expr': {'$ne': ['$converted_amount_usd', '$amount']}},
+            [{'$set': {'converted_amount_usd': '$amount'}}]
+        )
+        print(f"Fixed {result.modified_count} USD expenses")
+
+    tables, missing_days = load_day_tables(expenses)
+    print(f"Loaded exchange rates for {len(tables)} distinct days")
+    if missing_days:
+        print(f"No historical rates for {len(missing_days)} days, their expenses are skipped: {', '.join(missing_days)}")
+
+    cursor = expenses.find(
+        {'currency': {'$ne': 'USD'}},
+        {'amount': 1, 'currency': 1, 'date': 1, 'converted_amount_usd': 1},
+        batch_size=batch_size
+    )
+
+    scanned = 0
+    changed = 0
+    skipped = 0
+    ops = []
+    for doc in cursor:
+        scanned += 1
+        table = tables.get(doc['date'].strftime('%Y-%m-%d')) if doc.get('date') else None
+        currency = doc.get('currency')
+        if not table or currency not in table or 'USD' not in table or doc.get('amount') is None:
+            skipped += 1
+            continue
+
+        converted = doc['amount'] * table['USD'] / table[currency]
+        if doc.get('converted_amount_usd') is not None and abs(doc['converted_amount_usd'] - converted) < 1e-9:
+            continue
+
+        changed += 1
+        ops.append(UpdateOne({'_id': doc['_id']}, {'$set': {'converted_amount_usd': converted}}))
+        if len(ops) >= batch_size:
+            if not dry_run:
+                expenses.bulk_write(ops, ordered=False)
+            ops = []
+            print(f"Scanned {scanned} expenses, {changed} updated so far")
+
+    if ops and not dry_run:
+        expenses.bulk_write(ops, ordered=False)
+
+    print(f"Backfill {'dry run ' if dry_run else ''}complete: scanned {scanned}, updated {changed}, skipped {skipped}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+    backfill_expense_fx(batch_size=args.batch_size, dry_run=args.dry_run)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Model Deserialization Benchmark
+Decodes synthetic expense documents into model objects with the previous
+dict-backed, keyword-constructed models and with the current slotted models,
+reporting wall time and peak traced memory for each
+"""
+
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bson import ObjectId
+from app.operations import deserializeDoc
+
+CATEGORIES = ['Food', 'Transport', 'Housing', 'Utilities', 'Entertainment', 'Travel', 'Health', 'Other']
+CURRENCIES = ['USD', 'EUR', 'GBP', 'JPY']
+
+class LegacyExpense:
+    """The model as it was before slots: instance __dict__ and defaults evaluated once at import"""
+    def __init__(self, user_id, amount, category, description, date, currency, converted_amount_usd, created_at=datetime.now(), _id=ObjectId()):
+        self._id = _id
+        self.user_id = user_id
+        self.category = category
+        self.amount = amount
+        self.description = description
+        self.date = date
+        self.currency = currency
+        self.converted_amount_usd = converted_amount_usd
+        self.created_at = created_at
+
+def legacy_expense(doc):
+    if not doc:
+        return None
+    return LegacyExpense(
+        user_id=doc.get('user_id'),
+        amount=doc.get('amount'),
+        category=doc.get('category'),
+        description=doc.get('description'),
+        date=doc.get('date'),
+        currency=doc.get('currency'),
+        converted_amount_usd=doc.get('converted_amount_usd'),
+        created_at=doc.get('created_at'),
+        _id=doc.get('_id')
+    )
+
+def synthetic_expenses(count, seed=11):
+    rng = random.Random(seed)
+    users = [ObjectId() for _ in range(50)]
+    start = datetime(2020, 1, 1)
+    docs = []
+    for i in range(count):
+        when = start + timedelta(minutes=rng.randint(0, 60 * 24 * 365 * 5))
+        amount = round(rng.uniform(1, 500), 2)
+        docs.append({
+            '_id': ObjectId(), 'user_id': rng.choice(users), 'category': rng.choice(CATEGORIES),
+            'amount': amount, 'description': f"expense {i}", 'date': when, 'currency': rng.choice(CURRENCIES),
+            'converted_amount_usd': amount, 'created_at': when
+        })
+    return docs
+
+def measure(decode, docs):
+    gc.collect()
+    start = time.perf_counter()
+    decoded = [decode(doc) for doc in docs]
+    seconds = time.perf_counter() - start
+    del decoded
+    gc.collect()
+
+    # Peak is measured on a separate pass because tracing itself slows allocation down
+    tracemalloc.start()
+    decoded = [decode(doc) for doc in docs]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del decoded
+    return seconds, peak
+
+def run_benchmark(count=100000):
+    docs = synthetic_expenses(count)
+    results = {}
+    for label, decode in (('legacy', legacy_expense), ('slotted', deserializeDoc.expense)):
+        seconds, peak = measure(decode, docs)
+        results[label] = {'seconds': seconds, 'peak_bytes': peak}
+
+    print(f"Documents: {count} expenses")
+    for label, stats in results.items():
+        print(f"{label:>8}: {stats['seconds'] * 1000:.0f} ms, peak {stats['peak_bytes'] / 1024 / 1024:.1f} MiB, "
+              f"{stats['peak_bytes'] / count:.0f} bytes per object")
+    legacy, slotted = results['legacy'], results['slotted']
+    print(f"Speedup: {legacy['seconds'] / slotted['seconds']:.2f}x, "
+          f"memory: {slotted['peak_bytes'] / legacy['peak_bytes'] * 100:.0f}% of legacy")
+    return results
+
+if __name__ == '__main__':
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
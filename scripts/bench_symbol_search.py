@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Symbol Search Benchmark
+Measures exact and typo-tolerant search latency over the bundled listing
+padded with synthetic symbols to a realistic exchange-wide universe
+"""
+
+import os
+import random
+import statistics
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.symbols import SymbolIndex, SYMBOLS_FILE
+import csv
+
+NAME_WORDS = [
+    'global', 'holdings', 'capital', 'energy', 'pharma', 'systems', 'technologies', 'financial',
+    'industries', 'resources', 'partners', 'bancorp', 'therapeutics', 'realty', 'trust', 'networks',
+    'semiconductor', 'international', 'american', 'digital', 'health', 'medical', 'solutions', 'group'
+]
+
+QUERIES = [
+    'mircosoft', 'nvida', 'amazn', 'appel', 'berkshir', 'jonson', 'netflx', 'salesfroce',
+    'vangard', 'teslla', 'APPL', 'MSFTT', 'GOGL', 'paypall', 'mastercrd', 'semiconductr'
+]
+
+def synthetic_rows(count, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    seen = set()
+    while len(rows) < count:
+        symbol = ''.join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(3, 5)))
+        if symbol in seen:
+            continue
+        seen.add(symbol)
+        invented = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10)))
+        name = f"{invented.title()} {rng.choice(NAME_WORDS).title()} {rng.choice(NAME_WORDS).title()}"
+        rows.append({'symbol': symbol, 'name': name, 'type': 'Stock', 'region': 'US'})
+    return rows
+
+def run_benchmark(universe_size=50000, rounds=20):
+    with open(SYMBOLS_FILE, newline='', encoding='utf-8') as f:
+        rows = [dict(r) for r in csv.DictReader(f)]
+    known = {r['symbol'] for r in rows}
+    rows += [r for r in synthetic_rows(universe_size) if r['symbol'] not in known][:max(0, universe_size - len(rows))]
+
+    start = time.perf_counter()
+    index = SymbolIndex(rows)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index.fuzzy_search('warmup')
+    fuzzy_build_seconds = time.perf_counter() - start
+
+    results = {}
+    for label, search in (('prefix', index.search), ('fuzzy', index.fuzzy_search)):
+        timings = []
+        for _ in range(rounds):
+            for query in QUERIES:
+                t0 = time.perf_counter()
+                search(query)
+                timings.append((time.perf_counter() - t0) * 1000)
+        timings.sort()
+        results[label] = {
+            'p50': statistics.median(timings),
+            'p95': timings[int(len(timings) * 0.95) - 1],
+            'max': timings[-1]
+        }
+
+    print(f"Universe: {len(index)} symbols")
+    print(f"Index build: {build_seconds * 1000:.0f} ms, fuzzy index build: {fuzzy_build_seconds * 1000:.0f} ms")
+    for label, stats in results.items():
+        print(f"{label:>6}: p50 {stats['p50']:.3f} ms, p95 {stats['p95']:.3f} ms, max {stats['max']:.3f} ms")
+    print("Sample fuzzy matches:")
+    for query in QUERIES[:6]:
+        print(f"  {query!r} -> {[r['symbol'] for r in index.fuzzy_search(query)]}")
+    return results
+
+if __name__ == '__main__':
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
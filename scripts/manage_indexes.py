@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+MongoDB Index Manager
+Builds the indexes declared in app/indexes.py and reports declared indexes
+that are missing, plus existing ones that are undeclared or have not been used
+since the server last restarted.
+
+    python scripts/manage_indexes.py ensure
+    python scripts/manage_indexes.py report [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ.setdefault('INDEX_BOOTSTRAP_ENABLED', 'false')
+
+from app import create_app
+
+def ensure(manager):
+    failed = False
+    for name, result in manager.ensure().items():
+        if 'error' in result:
+            failed = True
+            print(f"{name}: FAILED - {result['error']}")
+        elif 'skipped' in result:
+            print(f"{name}: skipped ({result['skipped']})")
+        else:
+            print(f"{name}: {', '.join(result['indexes'])}")
+    return 1 if failed else 0
+
+def report(manager, as_json=False):
+    results = manager.report()
+    if as_json:
+        print(json.dumps(results, indent=2, default=str))
+        return 1 if any(r.get('missing') for r in results.values()) else 0
+
+    missing_any = False
+    for name, result in results.items():
+        if 'error' in result:
+            print(f"{name}: could not read indexes - {result['error']}")
+            continue
+        lines = []
+        if result['missing']:
+            missing_any = True
+            lines.append(f"missing: {', '.join(result['missing'])}")
+        if result['undeclared']:
+            lines.append(f"undeclared: {', '.join(result['undeclared'])}")
+        if result['unused']:
+            lines.append(f"unused since restart: {', '.join(result['unused'])}")
+        print(f"{name}: {'; '.join(lines) if lines else 'ok'}")
+    return 1 if missing_any else 0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build and audit MongoDB indexes')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('ensure')
+    report_cmd = commands.add_parser('report')
+    report_cmd.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    manager = create_app().indexes
+    if args.command == 'ensure':
+        sys.exit(ensure(manager))
+    sys.exit(report(manager, as_json=args.json))
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Finnhub Trade Websocket Stand-in
+Replays recorded trade messages to local clients, honouring subscribe and
+unsubscribe requests, so the trade ingestor can be run without a Finnhub key.
+
+    python scripts/replay_trades_server.py serve --port 8765
+    FINNHUB_WS_URL=ws://localhost:8765 TRADE_STREAM_ENABLED=true python run.py
+
+Recordings are JSON lines of raw Finnhub messages and can be captured with:
+
+    FINNHUB_API_KEY=... python scripts/replay_trades_server.py record --symbols AAPL,MSFT --minutes 5
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from websockets.exceptions import ConnectionClosed
+from websockets.sync.client import connect
+from websockets.sync.server import serve
+
+DEFAULT_RECORDING = os.path.join(os.path.dirname(__file__), 'data', 'finnhub_trades_sample.jsonl')
+
+def load_trades(path):
+    """Flatten a recording into (offset_seconds, trade) pairs in time order"""
+    trades = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            message = json.loads(line)
+            if message.get('type') == 'trade':
+                trades.extend(message.get('data') or [])
+    trades.sort(key=lambda t: t['t'])
+    if not trades:
+        return []
+    start = trades[0]['t']
+    return [((t['t'] - start) / 1000.0, t) for t in trades]
+
+def make_handler(trades, speed, loop):
+    def handler(conn):
+        print(f"Client connected from {conn.remote_address}")
+        try:
+            replay(conn)
+        except ConnectionClosed:
+            print("Client disconnected")
+
+    def replay(conn):
+        subscribed = set()
+        while True:
+            # Ticks are re-stamped to the wall clock so replayed quotes look current
+            started = time.time()
+            for offset, trade in trades:
+                due = started + offset / speed
+                while True:
+                    remaining = due - time.time()
+                    try:
+                        raw = conn.recv(timeout=max(remaining, 0))
+                    except TimeoutError:
+                        break
+                    request = json.loads(raw)
+                    if request.get('type') == 'subscribe':
+                        subscribed.add(request.get('symbol'))
+                    elif request.get('type') == 'unsubscribe':
+                        subscribed.discard(request.get('symbol'))
+                    print(f"{request.get('type')} {request.get('symbol')} ({len(subscribed)} subscribed)")
+                    if remaining <= 0:
+                        break
+                if trade['s'] in subscribed:
+                    conn.send(json.dumps({'type': 'trade', 'data': [dict(trade, t=int(time.time() * 1000))]}))
+            if not loop:
+                return
+    return handler
+
+def run_server(path, host, port, speed, loop):
+    trades = load_trades(path)
+    symbols = sorted({t['s'] for _, t in trades})
+    print(f"Replaying {len(trades)} trades for {', '.join(symbols)} on ws://{host}:{port} at {speed}x")
+    with serve(make_handler(trades, speed, loop), host, port) as server:
+        server.serve_forever()
+
+def record(path, symbols, minutes, api_key):
+    deadline = time.time() + minutes * 60
+    count = 0
+    with connect(f"wss://ws.finnhub.io?token={api_key}") as conn, open(path, 'w', encoding='utf-8') as out:
+        for symbol in symbols:
+            conn.send(json.dumps({'type': 'subscribe', 'symbol': symbol}))
+        while time.time() < deadline:
+            try:
+                raw = conn.recv(timeout=max(deadline - time.time(), 0))
+            except TimeoutError:
+                break
+            if json.loads(raw).get('type') == 'trade':
+                out.write(raw.strip() + '\n')
+                count += 1
+    print(f"Recorded {count} trade messages to {path}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Finnhub trade websocket stand-in')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve_cmd = commands.add_parser('serve')
+    serve_cmd.add_argument('--recording', default=DEFAULT_RECORDING)
+    serve_cmd.add_argument('--host', default='localhost')
+    serve_cmd.add_argument('--port', type=int, default=8765)
+    serve_cmd.add_argument('--speed', type=float, default=1.0)
+    serve_cmd.add_argument('--once', action='store_true', help='stop after one pass instead of looping')
+
+    record_cmd = commands.add_parser('record')
+    record_cmd.add_argument('--recording', default=DEFAULT_RECORDING)
+    record_cmd.add_argument('--symbols', required=True)
+    record_cmd.add_argument('--minutes', type=float, default=5)
+
+    args = parser.parse_args()
+    if args.command == 'serve':
+        run_server(args.recording, args.host, args.port, args.speed, not args.once)
+    else:
+        api_key = os.environ.get('FINNHUB_API_KEY')
+        if not api_key:
+            sys.exit("FINNHUB_API_KEY is required to record")
+        record(args.recording, [s.strip().upper() for s in args.symbols.split(',') if s.strip()], args.minutes, api_key)
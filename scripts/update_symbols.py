@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Symbol Listing Update Script
+Downloads the full US exchange listing from Finnhub into app/data/symbols.csv,
+which the local symbol index loads at startup
+"""
+
+import csv
+import os
+import sys
+
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.symbols import SYMBOLS_FILE
+
+# Finnhub security types mapped onto the labels the search results already use
+TYPE_LABELS = {
+    'Common Stock': 'Stock',
+    'ADR': 'Stock',
+    'REIT': 'Real Estate',
+    'ETP': 'ETF',
+    'Closed-End Fund': 'Mutual Fund',
+    'Open-End Fund': 'Mutual Fund'
+}
+
+def update_symbols(exchange='US'):
+    finnhub_key = os.environ.get('FINNHUB_API_KEY')
+    if not finnhub_key:
+        print("FINNHUB_API_KEY is not set")
+        return
+
+    url = f"https://finnhub.io/api/v1/stock/symbol?exchange={exchange}&token={finnhub_key}"
+    response = requests.get(url, timeout=60)
+    response.raise_for_status()
+
+    rows = {}
+    for item in response.json():
+        symbol = (item.get('symbol') or '').upper()
+        name = item.get('description') or ''
+        if not symbol or not name:
+            continue
+        rows[symbol] = (name.title() if name.isupper() else name, TYPE_LABELS.get(item.get('type'), 'Other'), exchange)
+
+    tmp_path = SYMBOLS_FILE + '.tmp'
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['symbol', 'name', 'type', 'region'])
+        for symbol in sorted(rows):
+            writer.writerow([symbol, *rows[symbol]])
+    os.replace(tmp_path, SYMBOLS_FILE)
+
+    print(f"Wrote {len(rows)} symbols to {SYMBOLS_FILE}")
+
+if __name__ == '__main__':
+    update_symbols(sys.argv[1] if len(sys.argv) > 1 else 'US')
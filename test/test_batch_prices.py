@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+import time
+
+from app import operations
+from app.cache import MemoryBackend
+
+def fake_fetch(symbol, finnhub_key, lane='interactive'):
+    """Stand-in for the Finnhub quote call"""
+    fake_fetch.calls.append(symbol)
+    if symbol == 'SLOW':
+        time.sleep(0.5)
+    return {'current_price': 100.0, 'symbol': symbol}
+
+def test_get_stock_prices_dedupes_and_respects_deadline():
+    """Test that duplicate symbols are fetched once and slow symbols are dropped"""
+    original_fetch = operations._fetch_stock_price
+    original_backend = operations.quote_cache.backend
+    operations._fetch_stock_price = fake_fetch
+    operations.quote_cache.backend = MemoryBackend()
+    fake_fetch.calls = []
+    try:
+        prices = operations.get_stock_prices(['AAPL', 'AAPL', 'MSFT', 'SLOW'], 'test-key', timeout=0.2)
+
+        assert set(prices) == {'AAPL', 'MSFT'}
+        assert fake_fetch.calls.count('AAPL') == 1
+
+        # A second batch is answered entirely from the cache
+        fake_fetch.calls = []
+        prices = operations.get_stock_prices(['AAPL', 'MSFT'], 'test-key')
+        assert set(prices) == {'AAPL', 'MSFT'}
+        assert fake_fetch.calls == []
+    finally:
+        operations._fetch_stock_price = original_fetch
+        operations.quote_cache.backend = original_backend
+
+def test_cached_prices_never_wait_on_upstream():
+    """Test that search results only get prices that are already cached"""
+    original_fetch = operations._fetch_stock_price
+    original_backend = operations.quote_cache.backend
+    operations._fetch_stock_price = fake_fetch
+    operations.quote_cache.backend = MemoryBackend()
+    fake_fetch.calls = []
+    try:
+        operations.quote_cache.set('AAPL', {'current_price': 190.0})
+        started = time.time()
+        prices = operations.get_cached_stock_prices(['AAPL', 'SLOW', 'MSFT', 'AAPL'], 'test-key')
+
+        assert set(prices) == {'AAPL'}
+        assert fake_fetch.calls == []
+        assert time.time() - started < 0.1
+    finally:
+        operations._fetch_stock_price = original_fetch
+        operations.quote_cache.backend = original_backend
+
+if __name__ == "__main__":
+    test_get_stock_prices_dedupes_and_respects_deadline()
+    test_cached_prices_never_wait_on_upstream()
+    print("Batch price tests passed!")
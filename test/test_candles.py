@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+
+from datetime import date, datetime, timedelta, timezone
+
+from app.candles import CandleStore
+from app.refresher import PriceRefresher
+
+class FakeCursor(list):
+    def sort(self, key, direction):
+        return FakeCursor(sorted(self, key=lambda d: d[key], reverse=direction < 0))
+
+class FakeCandleCollection:
+    """In-memory stand-in for the Candle time-series collection"""
+    def __init__(self):
+        self.docs = []
+
+    def find_one(self, query, projection=None, sort=None):
+        docs = [d for d in self.docs if d['symbol'] == query['symbol']]
+        return max(docs, key=lambda d: d['date']) if docs else None
+
+    def insert_many(self, docs, ordered=True):
+        self.docs.extend(dict(d) for d in docs)
+
+    def find(self, query, projection=None):
+        return FakeCursor(
+            d for d in self.docs
+            if d['symbol'] == query['symbol'] and query['date']['$gte'] <= d['date'] <= query['date']['$lte']
+        )
+
+class FakeProviders:
+    """Serves a synthetic daily series and records each requested range"""
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.requests = []
+
+    def candles(self, symbol, start, end, lane='background'):
+        self.requests.append((symbol, start, end, lane))
+        if self.fail:
+            return None
+        days = []
+        day = start
+        while day <= end:
+            if day.weekday() < 5:
+                days.append({'date': day, 'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': 1.5, 'volume': 100})
+            day += timedelta(days=1)
+        return days
+
+def test_backfill_then_incremental_append():
+    """Test that the first sync loads history and later syncs only fetch the missing days"""
+    providers = FakeProviders()
+    store = CandleStore(FakeCandleCollection(), providers, history_days=30)
+
+    first = store.sync('aapl', end=date(2024, 3, 1))
+    assert providers.requests[0] == ('AAPL', date(2024, 1, 31), date(2024, 3, 1), 'background')
+    assert first == 23
+
+    assert store.sync('AAPL', end=date(2024, 3, 1)) == 0
+    assert len(providers.requests) == 1
+
+    assert store.sync('AAPL', end=date(2024, 3, 5)) == 2
+    assert providers.requests[1][1:3] == (date(2024, 3, 2), date(2024, 3, 5))
+
+def test_range_reads_come_from_the_store():
+    """Test that range reads are ordered, bounded and never call the providers"""
+    providers = FakeProviders()
+    store = CandleStore(FakeCandleCollection(), providers, history_days=30)
+    store.sync('MSFT', end=date(2024, 3, 1))
+    calls = len(providers.requests)
+
+    candles = store.get_candles('msft', date(2024, 2, 26), date(2024, 2, 28))
+    assert [c['date'] for c in candles] == ['2024-02-26', '2024-02-27', '2024-02-28']
+    assert candles[0]['close'] == 1.5
+    assert len(providers.requests) == calls
+    assert store.get_candles('NVDA', date(2024, 2, 1), date(2024, 2, 28)) == []
+
+def test_duplicate_days_are_collapsed_on_read():
+    """Test that a day written twice by racing appends is returned once"""
+    collection = FakeCandleCollection()
+    store = CandleStore(collection, FakeProviders())
+    candle = {'date': date(2024, 2, 26), 'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': 1.5, 'volume': 100}
+    store.append('VOO', [candle])
+    store.append('VOO', [dict(candle, close=1.6)])
+
+    candles = store.get_candles('VOO', date(2024, 2, 26), date(2024, 2, 26))
+    assert len(candles) == 1
+    assert candles[0]['close'] == 1.6
+
+def test_backfill_reports_unreachable_symbols():
+    """Test that an upstream failure is reported instead of recorded as no data"""
+    store = CandleStore(FakeCandleCollection(), FakeProviders(fail=True), history_days=10)
+    result = store.backfill(['AAPL', 'MSFT'], end=date(2024, 3, 1))
+    assert result == {'symbols': 2, 'candles': 0, 'failed': ['AAPL', 'MSFT']}
+
+def test_after_close_job_runs_once_per_session():
+    """Test that the refresher appends candles once for each closed session, off the refresh thread"""
+    runs = []
+    refresher = PriceRefresher(after_close=lambda symbols, day, should_continue: runs.append((tuple(symbols), day)))
+    friday_evening = datetime(2024, 3, 1, 22, 0, tzinfo=timezone.utc)
+
+    assert refresher.run_after_close(['AAPL'], friday_evening)
+    refresher._after_close_thread.join(5)
+    assert not refresher.run_after_close(['AAPL'], friday_evening + timedelta(hours=30))
+    assert refresher.run_after_close(['AAPL'], datetime(2024, 3, 4, 22, 0, tzinfo=timezone.utc))
+    refresher._after_close_thread.join(5)
+    assert runs == [(('AAPL',), date(2024, 3, 1)), (('AAPL',), date(2024, 3, 4))]
+
+class FakeLease:
+    def __init__(self, held):
+        self.held = held
+        self.acquires = 0
+
+    def acquire(self):
+        self.acquires += 1
+        return self.held
+
+    def release(self):
+        self.held = False
+
+def test_after_close_job_needs_its_own_lease():
+    """Test that an instance without the append lease skips the job and tries again next cycle"""
+    runs = []
+    refresher = PriceRefresher(after_close=lambda symbols, day, should_continue: runs.append(day))
+    refresher.after_close_lease = FakeLease(held=False)
+    friday_evening = datetime(2024, 3, 1, 22, 0, tzinfo=timezone.utc)
+
+    assert refresher.run_after_close(['AAPL'], friday_evening)
+    refresher._after_close_thread.join(5)
+    assert runs == []
+
+    refresher.after_close_lease.held = True
+    assert refresher.run_after_close(['AAPL'], friday_evening)
+    refresher._after_close_thread.join(5)
+    assert runs == [date(2024, 3, 1)]
+
+def test_daily_append_leaves_long_gaps_to_the_backfill_script():
+    """Test that the after-close append only fetches short gaps and never a full history"""
+    providers = FakeProviders()
+    store = CandleStore(FakeCandleCollection(), providers, history_days=30, max_gap_days=7)
+    store.sync('AAPL', end=date(2024, 2, 1))
+    store.sync('MSFT', end=date(2024, 2, 28))
+    providers.requests.clear()
+
+    result = store.append_closed_day(['aapl', 'msft', 'nvda'], date(2024, 3, 1))
+    assert providers.requests == [('MSFT', date(2024, 2, 29), date(2024, 3, 1), 'background')]
+    assert result == {'symbols': 3, 'candles': 2, 'failed': [], 'needs_backfill': ['AAPL', 'NVDA']}
+
+def test_daily_append_stops_when_the_lease_is_lost():
+    """Test that the append checks between symbols whether it may keep going"""
+    providers = FakeProviders()
+    store = CandleStore(FakeCandleCollection(), providers, history_days=30)
+    for symbol in ('AAPL', 'MSFT'):
+        store.sync(symbol, end=date(2024, 2, 28))
+    providers.requests.clear()
+
+    checks = iter([True, False])
+    result = store.append_closed_day(['AAPL', 'MSFT'], date(2024, 3, 1), lambda: next(checks))
+    assert [r[0] for r in providers.requests] == ['AAPL']
+    assert result['candles'] == 2
+
+if __name__ == "__main__":
+    test_backfill_then_incremental_append()
+    test_range_reads_come_from_the_store()
+    test_duplicate_days_are_collapsed_on_read()
+    test_backfill_reports_unreachable_symbols()
+    test_after_close_job_runs_once_per_session()
+    test_after_close_job_needs_its_own_lease()
+    test_daily_append_leaves_long_gaps_to_the_backfill_script()
+    test_daily_append_stops_when_the_lease_is_lost()
+    print("Candle store tests passed!")
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+
+import time
+
+from app import operations
+from app.breaker import CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+from app.cache import MemoryBackend, QuoteCache
+from app.providers import NotAttempted, ProviderChain, QuoteProvider
+
+class FlakyProvider(QuoteProvider):
+    def __init__(self, name, fail=True):
+        super().__init__()
+        self.name = name
+        self.fail = fail
+        self.quote_calls = 0
+
+    def fetch_quote(self, symbol, lane='interactive'):
+        self.quote_calls += 1
+        if self.fail:
+            raise IOError("timed out")
+        return {'current_price': 1.0}
+
+def test_breaker_trips_and_half_opens():
+    """Test closed -> open after the threshold, then a single half-open probe"""
+    breaker = CircuitBreaker('test', failure_threshold=2, reset_timeout=0.1)
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.15)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    # A failed probe re-opens straight away; a successful one closes the breaker
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    time.sleep(0.15)
+    assert breaker.call(lambda: 'ok') == 'ok'
+    assert breaker.state == CLOSED
+
+def test_open_breaker_fails_fast():
+    """Test that calls through an open breaker are rejected without running"""
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    try:
+        breaker.call(lambda: 'never')
+        assert False, "expected CircuitOpenError"
+    except CircuitOpenError:
+        pass
+    assert breaker.stats()['rejected'] == 1
+
+def test_chain_skips_provider_with_open_breaker():
+    """Test that a tripped provider is skipped and the next one answers"""
+    primary = FlakyProvider('primary')
+    primary.breaker.failure_threshold = 2
+    chain = ProviderChain([primary, FlakyProvider('secondary', fail=False)], hedge=False)
+
+    for _ in range(3):
+        assert chain.quote('AAPL') == {'current_price': 1.0}
+    assert primary.quote_calls == 2
+
+class ThrottledProvider(QuoteProvider):
+    """Declines every call locally, like Finnhub when the rate limiter has no token"""
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+
+    def fetch_quote(self, symbol, lane='interactive'):
+        raise NotAttempted("no token")
+
+def test_throttled_probe_does_not_close_breaker():
+    """Test that a half-open probe refused by the rate limiter leaves the breaker half-open for a real probe"""
+    provider = ThrottledProvider('throttled')
+    provider.breaker = CircuitBreaker('throttled', failure_threshold=1, reset_timeout=0.05)
+    provider.breaker.record_failure()
+    time.sleep(0.06)
+    chain = ProviderChain([provider], hedge=False)
+
+    assert chain.quote('AAPL') is None
+    assert provider.breaker.state == HALF_OPEN
+    assert provider.calls == 0 and provider.failures == 0
+    # The probe slot was handed back, so the next real call may still go out
+    assert provider.breaker.allow()
+
+def test_throttling_does_not_trip_breaker():
+    """Test that local throttling never counts as an upstream failure"""
+    provider = ThrottledProvider('throttled-closed')
+    provider.breaker = CircuitBreaker('throttled-closed', failure_threshold=1)
+    chain = ProviderChain([provider], hedge=False)
+    for _ in range(3):
+        assert chain.quote('AAPL') is None
+    assert provider.breaker.state == CLOSED
+
+class RefusingLimiter:
+    def acquire(self, lane='interactive', max_wait=None):
+        return False
+
+def test_throttled_search_releases_probe():
+    """Test that a symbol search refused by the rate limiter hands the half-open probe back"""
+    breaker = CircuitBreaker('finnhub-search', failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    original = (operations.breakers['finnhub'], operations.finnhub_limiter)
+    operations.breakers['finnhub'], operations.finnhub_limiter = breaker, RefusingLimiter()
+    try:
+        assert operations._search_finnhub('SNOW', 'key') == []
+    finally:
+        operations.breakers['finnhub'], operations.finnhub_limiter = original
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+def test_expired_quote_served_stale_and_revalidated():
+    """Test that an expired quote is returned flagged stale while a refresh runs in the background"""
+    cache = QuoteCache(MemoryBackend(), ttl=0.05, stale_ttl=60)
+    original_cache = operations.quote_cache
+    original_fetch = operations._fetch_stock_price
+    operations.quote_cache = cache
+    operations._fetch_stock_price = lambda symbol, key, lane='interactive': {'current_price': 2.0}
+    try:
+        cache.set('AAPL', {'current_price': 1.0})
+        time.sleep(0.1)
+        assert cache.get('AAPL') is None
+
+        quote = operations.get_stock_price('AAPL', 'test-key')
+        assert quote == {'current_price': 1.0, 'stale': True}
+
+        deadline = time.time() + 2
+        while cache.get('AAPL') is None and time.time() < deadline:
+            time.sleep(0.02)
+        assert cache.get('AAPL') == {'current_price': 2.0}
+    finally:
+        operations.quote_cache = original_cache
+        operations._fetch_stock_price = original_fetch
+
+if __name__ == "__main__":
+    test_breaker_trips_and_half_opens()
+    test_open_breaker_fails_fast()
+    test_chain_skips_provider_with_open_breaker()
+    test_throttled_probe_does_not_close_breaker()
+    test_throttling_does_not_trip_breaker()
+    test_throttled_search_releases_probe()
+    test_expired_quote_served_stale_and_revalidated()
+    print("Circuit breaker tests passed!")
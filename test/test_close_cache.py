@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+import math
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.closecache import ClosePriceCache
+
+class FakeCandleStore:
+    """Yields (symbol, date, close) rows the way CandleStore.closes streams them"""
+    def __init__(self, rows):
+        self.rows = rows
+
+    def closes(self, start, end, symbols=None):
+        for symbol, day, close in self.rows:
+            if start <= day <= end and (not symbols or symbol in symbols):
+                yield symbol, day, close
+
+def weekdays(start, count):
+    days = []
+    day = start
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+def test_series_are_zero_copy_views_with_gaps_as_nan():
+    """Test that reads return read-only views onto the mapped file and missing days are NaN"""
+    days = weekdays(date(2024, 1, 1), 5)
+    rows = [('AAPL', d, 100.0 + i) for i, d in enumerate(days)] + [('MSFT', days[1], 400.0)]
+    cache = ClosePriceCache(tempfile.mkdtemp(), FakeCandleStore(rows), check_interval=0)
+    cache.build(end=days[-1])
+
+    dates, closes = cache.series('aapl')
+    assert list(closes) == [100.0, 101.0, 102.0, 103.0, 104.0]
+    assert str(dates[0]) == '2024-01-01'
+    assert isinstance(closes.base, np.memmap) or isinstance(closes, np.memmap)
+    assert not closes.flags.writeable
+
+    _, window = cache.window(['MSFT', 'NVDA'], start=days[1], end=days[2])
+    assert list(window) == ['MSFT']
+    assert window['MSFT'][0] == 400.0 and math.isnan(window['MSFT'][1])
+    assert cache.series('NVDA') is None
+
+def test_rebuild_is_swapped_in_atomically():
+    """Test that readers keep their generation until the new one is fully written, then pick it up"""
+    days = weekdays(date(2024, 1, 1), 3)
+    store = FakeCandleStore([('AAPL', d, 1.0) for d in days[:2]])
+    cache = ClosePriceCache(tempfile.mkdtemp(), store, check_interval=0)
+    cache.build(end=days[1])
+    old_dates, old_closes = cache.series('AAPL')
+
+    store.rows.append(('AAPL', days[2], 2.0))
+    cache.build(end=days[2])
+
+    assert len(old_closes) == 2
+    assert list(cache.series('AAPL')[1]) == [1.0, 1.0, 2.0]
+    assert cache.snapshot().end == days[2]
+
+def test_ten_years_of_500_symbols_loads_in_milliseconds():
+    """Test that opening a 500 symbol x 10 year cache and slicing every symbol is fast"""
+    days = weekdays(date(2014, 1, 1), 2520)
+    rows = [(f"S{n:03d}", d, float(n)) for n in range(500) for d in days]
+    directory = tempfile.mkdtemp()
+    ClosePriceCache(directory, FakeCandleStore(rows)).build(end=days[-1])
+
+    reader = ClosePriceCache(directory, FakeCandleStore([]))
+    started = time.time()
+    dates, closes = reader.snapshot().window([f"S{n:03d}" for n in range(500)])
+    total = sum(float(series[-1]) for series in closes.values())
+    elapsed = time.time() - started
+
+    assert len(dates) == 2520 and len(closes) == 500
+    assert total == sum(range(500))
+    assert elapsed < 0.1
+
+if __name__ == "__main__":
+    test_series_are_zero_copy_views_with_gaps_as_nan()
+    test_rebuild_is_swapped_in_atomically()
+    test_ten_years_of_500_symbols_loads_in_milliseconds()
+    print("Close price cache tests passed!")
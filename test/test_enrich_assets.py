@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+
+from app import operations
+from app.profiles import profile_store
+
+PROFILES = {
+    'AAPL': {'symbol': 'AAPL', 'name': 'Apple Inc', 'industry': 'Technology', 'sector': 'technology', 'beta': 1.2, 'volatility': 0.25},
+    'TSLA': {'symbol': 'TSLA', 'name': 'Tesla Inc', 'industry': 'Automobiles', 'sector': 'consumer cyclical', 'beta': 2.1, 'volatility': 0.5},
+    'SPY': {'symbol': 'SPY', 'name': 'SPDR S&P 500 ETF Trust', 'industry': '', 'sector': '', 'beta': 1.0, 'volatility': 0.15},
+    'O': {'symbol': 'O', 'name': 'Realty Income', 'industry': 'Real Estate', 'sector': 'real estate', 'beta': 0.7, 'volatility': 0.1}
+}
+
+def test_batch_matches_single_symbol_answers_with_one_fetch_per_symbol():
+    """Test that a 40 asset allocation fetches each distinct profile once and matches the per-symbol helpers"""
+    calls = []
+    lock = threading.Lock()
+
+    def fake_fetch(symbol, finnhub_key, lane):
+        with lock:
+            calls.append((symbol, lane))
+        time.sleep(0.05)
+        return PROFILES.get(symbol)
+
+    original = operations._fetch_company_profile
+    operations._fetch_company_profile = fake_fetch
+    profile_store.memory.clear()
+    try:
+        symbols = ['AAPL', 'tsla', 'SPY', 'O', 'ZZZZ']
+        assets = [{'symbol': symbols[i % 5], 'asset_type': 'Stock'} for i in range(38)]
+        assets += [{'symbol': '', 'asset_type': 'Bond'}, {'asset_type': 'Commodity'}]
+
+        started = time.time()
+        results = operations.enrich_assets(assets, 'key')
+        elapsed = time.time() - started
+
+        assert sorted(s for s, _ in calls) == ['AAPL', 'O', 'SPY', 'TSLA', 'ZZZZ']
+        assert {lane for _, lane in calls} == {'enrichment'}
+        # Five loads on a four-worker pool take two rounds, not five
+        assert elapsed < 0.2
+        assert len(results) == 40
+
+        by_symbol = {r['symbol'].upper(): r for r in results[:5]}
+        for symbol in ['AAPL', 'TSLA', 'SPY', 'O', 'ZZZZ']:
+            assert by_symbol[symbol]['expected_return'] == operations.get_enhanced_expected_return(symbol, 'key')
+            assert by_symbol[symbol]['risk_level'] == operations.get_enhanced_risk_level(symbol, 'key')
+        assert by_symbol['SPY']['asset_type'] == 'ETF'
+        assert by_symbol['O']['asset_type'] == 'Real Estate'
+        assert by_symbol['ZZZZ']['asset_type'] == 'Stock'
+        assert results[38] == {'expected_return': 4.5, 'risk_level': 'Low', 'asset_type': 'Bond', 'symbol': '', 'source': 'curated'}
+        assert results[39]['source'] == 'curated'
+    finally:
+        operations._fetch_company_profile = original
+        profile_store.memory.clear()
+
+def test_missing_profile_is_reported_as_curated():
+    """Test that a symbol with no Finnhub profile is labelled with the curated source it fell back to"""
+    original = operations._fetch_company_profile
+    operations._fetch_company_profile = lambda symbol, finnhub_key, lane: PROFILES.get(symbol)
+    profile_store.memory.clear()
+    try:
+        aapl, unknown = operations.enrich_assets([{'symbol': 'AAPL', 'asset_type': 'Stock'}, {'symbol': 'ZZZZ', 'asset_type': 'Stock'}], 'key')
+        assert aapl['source'] == 'finnhub'
+        assert unknown['source'] == 'curated'
+        assert unknown['asset_type'] == 'Stock'
+    finally:
+        operations._fetch_company_profile = original
+        profile_store.memory.clear()
+
+if __name__ == "__main__":
+    test_batch_matches_single_symbol_answers_with_one_fetch_per_symbol()
+    test_missing_profile_is_reported_as_curated()
+    print("Batch enrichment tests passed!")
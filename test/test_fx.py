@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+
+import importlib.util
+import os
+import time
+from datetime import date, timedelta
+
+from app.fx import FxService, HistoricalFxStore
+
+USD_TABLE = {'USD': 1.0, 'EUR': 0.9, 'GBP': 0.8, 'INR': 83.0}
+
+class StubFxService(FxService):
+    """FxService with the exchangerate-api call replaced by a counter"""
+    def __init__(self, fail=False, **kwargs):
+        super().__init__(api_key='test-key', **kwargs)
+        self.fail = fail
+        self.fetches = 0
+
+    def _fetch_table(self, base):
+        self.fetches += 1
+        if self.fail:
+            raise ValueError("upstream down")
+        return dict(USD_TABLE), time.time() + self.ttl
+
+def test_pairs_triangulated_from_one_table():
+    """Test that every pair is derived from a single fetched pivot table"""
+    fx = StubFxService()
+
+    assert fx.rate('EUR', 'USD') == 1 / 0.9
+    assert abs(fx.rate('EUR', 'GBP') - 0.8 / 0.9) < 1e-12
+    assert fx.rate('INR', 'INR') == 1.0
+    assert fx.fetches == 1
+
+def test_failures_only_negative_cached_briefly():
+    """Test that a failed fetch falls back to 1.0 and is retried after the negative TTL"""
+    fx = StubFxService(fail=True, negative_ttl=0.1)
+
+    assert fx.rate('EUR', 'USD') == 1.0
+    assert fx.rate('EUR', 'USD') == 1.0
+    assert fx.fetches == 1
+
+    time.sleep(0.15)
+    fx.fail = False
+    assert fx.rate('EUR', 'USD') == 1 / 0.9
+    assert fx.fetches == 2
+
+def test_expired_table_served_while_refreshing():
+    """Test that an expired table is served immediately and refreshed in the background"""
+    fx = StubFxService(ttl=0.05)
+    fx.rate('EUR', 'USD')
+    time.sleep(0.1)
+
+    start = time.time()
+    assert fx.rate('EUR', 'USD') == 1 / 0.9
+    assert time.time() - start < 0.05
+
+    time.sleep(0.1)
+    assert fx.fetches == 2
+
+class FakeDailyCollection:
+    """Just enough of a Mongo collection for HistoricalFxStore"""
+    def __init__(self):
+        self.docs = {}
+
+    def replace_one(self, query, doc, upsert=False):
+        self.docs[query['_id']] = dict(doc, _id=query['_id'])
+
+    def find_one(self, query, sort=None):
+        if '_id' in query:
+            return self.docs.get(query['_id'])
+        earlier = [d for d in self.docs.values() if d['date'] <= query['date']['$lte']]
+        return max(earlier, key=lambda d: d['date']) if earlier else None
+
+class StubHistoricalFxStore(HistoricalFxStore):
+    def __init__(self, fx, collection, history):
+        super().__init__(fx, collection)
+        self.history = history
+        self.history_calls = 0
+
+    def _fetch_history(self, day):
+        self.history_calls += 1
+        if day not in self.history:
+            raise ValueError("no data")
+        return self.history[day]
+
+def test_historical_rate_uses_expense_day():
+    """Test that past days read their own table and are persisted after one history call"""
+    day = date.today() - timedelta(days=90)
+    collection = FakeDailyCollection()
+    store = StubHistoricalFxStore(StubFxService(), collection, {day: {'USD': 1.0, 'EUR': 0.8}})
+
+    assert store.rate_on('EUR', 'USD', day) == 1 / 0.8
+    assert store.rate_on('EUR', 'USD', day) == 1 / 0.8
+    assert store.history_calls == 1
+    assert f"USD:{day.isoformat()}" in collection.docs
+
+    # A fresh process finds the stored day without calling the history API
+    restarted = StubHistoricalFxStore(StubFxService(), collection, {})
+    assert restarted.rate_on('EUR', 'USD', day) == 1 / 0.8
+    assert restarted.history_calls == 0
+
+def test_historical_rate_falls_back_to_nearest_earlier_day():
+    """Test that a missing day uses the closest stored earlier day, then the live table"""
+    stored = date.today() - timedelta(days=10)
+    collection = FakeDailyCollection()
+    store = StubHistoricalFxStore(StubFxService(), collection, {stored: {'USD': 1.0, 'EUR': 0.5}})
+    store.rates_on(stored)
+
+    assert store.rate_on('EUR', 'USD', stored + timedelta(days=2)) == 2.0
+    assert store.rate_on('EUR', 'USD', stored - timedelta(days=2)) == 1 / 0.9
+    assert store.rate_on('EUR', 'USD', date.today()) == 1 / 0.9
+
+def test_failed_history_days_are_negative_cached_and_flagged():
+    """Test that a day the history API cannot answer is asked once per negative TTL and reported as not exact"""
+    missing = date.today() - timedelta(days=30)
+    store = StubHistoricalFxStore(StubFxService(), FakeDailyCollection(), {})
+    store.negative_ttl = 0.1
+
+    rates, exact = store.rates_on(missing)
+    assert rates == USD_TABLE and not exact
+    assert store.rates_on(missing) == (USD_TABLE, False)
+    assert store.history_calls == 1
+
+    time.sleep(0.15)
+    store.history[missing] = {'USD': 1.0, 'EUR': 0.7}
+    assert store.rates_on(missing) == ({'USD': 1.0, 'EUR': 0.7}, True)
+    assert store.history_calls == 2
+
+class FakeExpenses:
+    def __init__(self, days):
+        self.days = days
+
+    def aggregate(self, pipeline):
+        return [{'_id': day.isoformat()} for day in self.days]
+
+def test_backfill_skips_days_without_their_own_rates():
+    """Test that the backfill reports days with no historical table instead of converting at another day's rate"""
+    path = os.path.join(os.path.dirname(__file__), '..', 'scripts', 'backfill_expense_fx.py')
+    spec = importlib.util.spec_from_file_location('backfill_expense_fx', path)
+    backfill = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(backfill)
+
+    known = date.today() - timedelta(days=20)
+    missing = date.today() - timedelta(days=10)
+    original = backfill.fx_history
+    backfill.fx_history = StubHistoricalFxStore(StubFxService(), FakeDailyCollection(), {known: {'USD': 1.0, 'EUR': 0.8}})
+    try:
+        tables, missing_days = backfill.load_day_tables(FakeExpenses([known, missing]))
+    finally:
+        backfill.fx_history = original
+    assert tables == {known.isoformat(): {'USD': 1.0, 'EUR': 0.8}}
+    assert missing_days == [missing.isoformat()]
+
+if __name__ == "__main__":
+    test_pairs_triangulated_from_one_table()
+    test_failures_only_negative_cached_briefly()
+    test_expired_table_served_while_refreshing()
+    test_historical_rate_uses_expense_day()
+    test_historical_rate_falls_back_to_nearest_earlier_day()
+    test_failed_history_days_are_negative_cached_and_flagged()
+    test_backfill_skips_days_without_their_own_rates()
+    print("FX service tests passed!")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.httpclient import HttpClient
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+    failures_left = 0
+    posts = 0
+
+    def setup(self):
+        super().setup()
+        Handler.connections += 1
+
+    def _reply(self, status):
+        body = b'{"ok": true}'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if Handler.failures_left > 0:
+            Handler.failures_left -= 1
+            self._reply(503)
+        else:
+            self._reply(200)
+
+    def do_POST(self):
+        Handler.posts += 1
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self._reply(503)
+
+    def log_message(self, *args):
+        pass
+
+def start_server():
+    Handler.connections = Handler.failures_left = Handler.posts = 0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def test_connections_are_reused():
+    """Test that repeated calls to one host share a single keep-alive connection"""
+    server, base = start_server()
+    try:
+        client = HttpClient()
+        for _ in range(5):
+            assert client.get(f"{base}/quote").json() == {'ok': True}
+        assert Handler.connections == 1
+        stats = client.stats()['127.0.0.1']
+        assert stats['requests'] == 5 and stats['status'] == {'2xx': 5}
+        assert sum(stats['latency_histogram'].values()) == 5
+    finally:
+        server.shutdown()
+
+def test_idempotent_calls_retry_and_posts_do_not():
+    """Test that GETs retry through 5xx responses while POSTs are sent exactly once"""
+    server, base = start_server()
+    try:
+        client = HttpClient(backoff_factor=0.01, backoff_jitter=0.01)
+        Handler.failures_left = 2
+        assert client.get(f"{base}/quote").status_code == 200
+        assert client.stats()['127.0.0.1']['retries'] == 2
+
+        assert client.post(f"{base}/generate", json={'prompt': 'hi'}).status_code == 503
+        assert Handler.posts == 1
+        assert client.stats()['127.0.0.1']['errors'] == 1
+    finally:
+        server.shutdown()
+
+def test_fail_fast_calls_are_not_retried():
+    """Test that retry=False makes a single attempt even for idempotent calls"""
+    server, url = start_server()
+    try:
+        client = HttpClient(retries=2, backoff_factor=0)
+        Handler.failures_left = 1
+        response = client.get(url + '/quote', retry=False)
+        assert response.status_code == 503
+        assert client.stats()['127.0.0.1']['retries'] == 0
+
+        assert client.get(url + '/quote', retry=False).status_code == 200
+    finally:
+        server.shutdown()
+        Handler.failures_left = 0
+
+if __name__ == "__main__":
+    test_connections_are_reused()
+    test_idempotent_calls_retry_and_posts_do_not()
+    test_fail_fast_calls_are_not_retried()
+    print("HTTP client tests passed!")
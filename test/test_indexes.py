@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+from pymongo.errors import OperationFailure
+
+from app.indexes import IndexManager, declared_indexes
+
+class FakeCollection:
+    def __init__(self, indexes=None, usage=None, fail=None):
+        self.indexes = {'_id_': {'key': [('_id', 1)]}}
+        self.indexes.update(indexes or {})
+        self.usage = usage or {}
+        self.fail = fail
+
+    def create_indexes(self, models):
+        if self.fail:
+            raise OperationFailure(self.fail)
+        names = []
+        for model in models:
+            doc = model.document
+            self.indexes.setdefault(doc['name'], {'key': list(doc['key'].items())})
+            names.append(doc['name'])
+        return names
+
+    def index_information(self):
+        return self.indexes
+
+    def aggregate(self, pipeline):
+        return [{'name': name, 'accesses': {'ops': self.usage.get(name, 0)}} for name in self.indexes]
+
+class FakeDatabase:
+    def __init__(self, collections):
+        self.collections = collections
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, FakeCollection())
+
+    def list_collection_names(self):
+        return list(self.collections)
+
+def test_declares_the_indexes_the_queries_need():
+    """Test the compound and unique indexes the per-user and login queries rely on"""
+    declared = {name: [m.document for m in models] for name, models in declared_indexes().items()}
+
+    assert [list(d['key'].items()) for d in declared['Expense']] == [[('user_id', 1), ('date', -1)]]
+    assert [list(d['key'].items()) for d in declared['Budget']] == [[('user_id', 1), ('year', 1), ('month', 1)]]
+    assert all(d['unique'] for d in declared['User'])
+    assert {tuple(d['key']) for d in declared['User']} == {('username',), ('email',)}
+    for name in ['Investment', 'Goal', 'Asset', 'RetirementPlan', 'UserProfile']:
+        assert list(declared[name][0]['key']) == ['user_id']
+    assert declared_indexes({'COMPANY_PROFILE_TTL_DAYS': 1})['CompanyProfile'][0].document['expireAfterSeconds'] == 86400
+
+def test_ensure_is_idempotent_and_reports_failures():
+    """Test that a second run changes nothing, Candle waits for its time-series collection and errors are returned"""
+    database = FakeDatabase({'User': FakeCollection(fail='E11000 duplicate key'), 'Expense': FakeCollection()})
+    manager = IndexManager(database, declared_indexes())
+
+    first = manager.ensure()
+    assert first['Expense'] == {'indexes': ['user_date']}
+    assert 'duplicate key' in first['User']['error']
+    assert 'skipped' in first['Candle']
+    snapshot = {name: dict(c.indexes) for name, c in database.collections.items()}
+
+    manager.ensure()
+    assert {name: dict(c.indexes) for name, c in database.collections.items() if name in snapshot} == snapshot
+
+def test_report_lists_missing_undeclared_and_unused():
+    """Test the index audit against what the server reports"""
+    database = FakeDatabase({
+        'Expense': FakeCollection(
+            indexes={'user_date': {'key': [('user_id', 1), ('date', -1.0)]}, 'category_1': {'key': [('category', 1)]}},
+            usage={'user_date': 12}
+        ),
+        'Goal': FakeCollection()
+    })
+    report = IndexManager(database, declared_indexes()).report()
+
+    assert report['Expense']['missing'] == []
+    assert report['Expense']['undeclared'] == ['category_1']
+    assert report['Expense']['unused'] == ['category_1']
+    assert report['Goal']['missing'] == ['user']
+    assert report['User']['missing'] == ['username_unique', 'email_unique']
+
+if __name__ == "__main__":
+    test_declares_the_indexes_the_queries_need()
+    test_ensure_is_idempotent_and_reports_failures()
+    test_report_lists_missing_undeclared_and_unused()
+    print("Index manager tests passed!")
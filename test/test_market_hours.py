@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+from datetime import date, datetime, timedelta
+
+from app.markethours import MarketCalendar, EXCHANGE_TZ, nyse_holidays, nyse_early_closes
+
+calendar = MarketCalendar()
+
+def et(*args):
+    return datetime(*args, tzinfo=EXCHANGE_TZ)
+
+def test_nyse_holiday_calendar():
+    """Test the 2025 NYSE holidays and early closes, including Good Friday"""
+    assert nyse_holidays(2025) == {
+        date(2025, 1, 1), date(2025, 1, 20), date(2025, 2, 17), date(2025, 4, 18), date(2025, 5, 26),
+        date(2025, 6, 19), date(2025, 7, 4), date(2025, 9, 1), date(2025, 11, 27), date(2025, 12, 25)
+    }
+    assert nyse_early_closes(2025) == {date(2025, 7, 3), date(2025, 11, 28), date(2025, 12, 24)}
+    # New Year's Day 2022 fell on a Saturday and was not observed on Friday
+    assert date(2021, 12, 31) not in nyse_holidays(2021)
+
+def test_session_boundaries():
+    """Test regular, early-close and closed days"""
+    assert calendar.is_open(et(2025, 3, 12, 9, 30))
+    assert not calendar.is_open(et(2025, 3, 12, 16, 0))
+    assert not calendar.is_open(et(2025, 11, 28, 13, 30))
+    assert not calendar.is_open(et(2025, 4, 18, 11, 0))
+    assert calendar.next_open(et(2025, 4, 17, 17, 0)) == et(2025, 4, 21, 9, 30)
+
+def test_last_closed_day():
+    """Test that the last closed session skips the one still trading and non-trading days"""
+    assert calendar.last_closed_day(et(2025, 3, 12, 12, 0)) == date(2025, 3, 11)
+    assert calendar.last_closed_day(et(2025, 3, 12, 16, 0)) == date(2025, 3, 12)
+    assert calendar.last_closed_day(et(2025, 4, 21, 8, 0)) == date(2025, 4, 17)
+
+def test_quote_ttl_policy():
+    """Test short TTLs in session and until the next open once the close has settled"""
+    friday_close = et(2025, 3, 14, 15, 59, 59).timestamp()
+
+    assert calendar.quote_ttl(friday_close, 60, now=et(2025, 3, 14, 11, 0)) == 60
+    assert calendar.quote_ttl(friday_close, 60, now=et(2025, 3, 14, 16, 5)) == 60
+
+    # Friday 20:00 to Monday 09:30 is 61.5 hours
+    assert calendar.quote_ttl(friday_close, 60, now=et(2025, 3, 14, 20, 0)) == int(61.5 * 3600)
+
+    # A quote stamped before the latest session is not final and is retried periodically
+    thursday = et(2025, 3, 13, 15, 0).timestamp()
+    assert calendar.quote_ttl(thursday, 60, now=et(2025, 3, 14, 20, 0)) == 15 * 60
+
+def test_ttl_spans_dst_change():
+    """Test that the weekend TTL is computed in real seconds across the spring-forward change"""
+    friday_close = et(2025, 3, 7, 15, 59).timestamp()
+    ttl = calendar.quote_ttl(friday_close, 60, now=et(2025, 3, 7, 20, 0))
+    assert ttl == int(60.5 * 3600)
+
+def test_off_hours_fetches_cut_by_over_90_percent():
+    """Test simulated page views every minute for a week against a fixed 60s TTL"""
+    start = et(2025, 3, 10, 0, 0)
+    expires_at = None
+    off_hours_fetches = 0
+    off_hours_views = 0
+    for minute in range(7 * 24 * 60):
+        now = start + timedelta(minutes=minute)
+        if calendar.is_open(now):
+            continue
+        off_hours_views += 1
+        if expires_at is None or now >= expires_at:
+            off_hours_fetches += 1
+            # Finnhub stamps the quote with the latest trade, i.e. the last session's close
+            session_close = calendar.last_session(now)[1]
+            stamped = min(now, session_close - timedelta(seconds=1))
+            expires_at = now + timedelta(seconds=calendar.quote_ttl(stamped.timestamp(), 60, now=now))
+
+    assert off_hours_fetches < off_hours_views * 0.1
+
+if __name__ == "__main__":
+    test_nyse_holiday_calendar()
+    test_session_boundaries()
+    test_last_closed_day()
+    test_quote_ttl_policy()
+    test_ttl_spans_dst_change()
+    test_off_hours_fetches_cut_by_over_90_percent()
+    print("Market hours tests passed!")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+from datetime import datetime
+
+from bson.objectid import ObjectId
+
+from app.mongoModels import Expense, Goal, Investment, RetirementPlan, User
+from app.operations import deserializeDoc
+
+def test_defaults_are_fresh_per_instance():
+    """Each new model gets its own _id and timestamp rather than one evaluated at import"""
+    first = Goal(ObjectId(), 'House', 1000, 0, datetime(2030, 1, 1))
+    second = Goal(ObjectId(), 'Car', 500, 0, datetime(2028, 1, 1))
+    assert first._id != second._id
+    assert isinstance(first._id, ObjectId)
+    assert isinstance(first.created_at, datetime)
+    assert User()._id != User()._id
+
+def test_models_have_no_instance_dict():
+    """Slotted models keep no per-instance __dict__"""
+    expense = Expense(ObjectId(), 10.0, 'Food', 'Lunch', datetime(2025, 1, 2), 'USD', 10.0)
+    assert not hasattr(expense, '__dict__')
+    try:
+        expense.unknown = 1
+        assert False, "slotted model accepted an undeclared attribute"
+    except AttributeError:
+        pass
+
+def test_to_doc_round_trips_through_from_doc():
+    """to_doc includes _id and every field, and from_doc restores them exactly"""
+    investment = Investment(ObjectId(), 'AAPL', 3, 150.0, datetime(2024, 6, 1))
+    doc = investment.to_doc()
+    assert set(doc) == set(Investment.FIELDS)
+    assert doc['_id'] == investment._id
+    restored = Investment.from_doc(doc)
+    assert restored.to_doc() == doc
+    assert restored.getid() == str(investment._id)
+
+def test_from_doc_tolerates_missing_fields():
+    """Fields absent from a stored document decode as None, as doc.get did before"""
+    expense = Expense.from_doc({'_id': ObjectId(), 'amount': 5})
+    assert expense.amount == 5
+    assert expense.currency is None
+
+def test_deserialize_doc_uses_stored_keys():
+    """Attribute names match stored keys, so years_to_retirement is read back"""
+    doc = RetirementPlan(ObjectId(), 'Plan', 1000000, 7, 1200, 900000, ytr=25).to_doc()
+    plan = deserializeDoc.retirement_plan(doc)
+    assert plan.years_to_retirement == 25
+    assert plan._id == doc['_id']
+    assert deserializeDoc.retirement_plan(None) is None
+    assert deserializeDoc.expense({}) is None
+
+def test_user_keeps_login_behaviour():
+    """User still works with Flask-Login and password hashing"""
+    user = deserializeDoc.user({'_id': ObjectId(), 'username': 'sam', 'email': 'sam@example.com'})
+    user.set_password('secret')
+    assert user.check_password('secret')
+    assert user.get_id() == str(user._id)
+    assert user.is_authenticated
+
+if __name__ == "__main__":
+    test_defaults_are_fresh_per_instance()
+    test_models_have_no_instance_dict()
+    test_to_doc_round_trips_through_from_doc()
+    test_from_doc_tolerates_missing_fields()
+    test_deserialize_doc_uses_stored_keys()
+    test_user_keeps_login_behaviour()
+    print("All model tests passed!")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+import json
+
+from app import pricestream
+from app.cache import MemoryBackend, QuoteCache
+
+def quote(price):
+    return {'current_price': price, 'change': 1.0, 'change_percent': 0.5, 'timestamp': 1700000000, 'high': price}
+
+def parse_prices(frame):
+    lines = frame.strip().split('\n')
+    assert lines[0] == 'event: prices'
+    return json.loads(lines[1][len('data: '):])
+
+def run_stream(cache, ticks, updates=None, **kwargs):
+    """Drive price_events with a fake clock, applying cache updates between polls"""
+    original = pricestream.quote_cache
+    pricestream.quote_cache = cache
+    clock = {'now': 0.0, 'tick': 0}
+
+    def sleep(seconds):
+        clock['now'] += seconds
+        clock['tick'] += 1
+        for symbol, price in (updates or {}).get(clock['tick'], {}).items():
+            cache.set(symbol, quote(price))
+
+    try:
+        frames = []
+        for frame in pricestream.price_events(['AAPL', 'msft', 'AAPL'], sleep=sleep, clock=lambda: clock['now'], **kwargs):
+            frames.append(frame)
+            if clock['tick'] >= ticks:
+                break
+        return frames
+    finally:
+        pricestream.quote_cache = original
+
+def test_stream_sends_only_changed_quotes():
+    """Test that the first frame carries cached quotes and later frames only the changes"""
+    cache = QuoteCache(MemoryBackend(), ttl=600)
+    cache.set('AAPL', quote(190.0))
+
+    frames = run_stream(cache, ticks=3, updates={1: {'MSFT': 410.0}, 2: {'AAPL': 191.0}}, poll_interval=1, heartbeat=60)
+
+    assert frames[0] == 'retry: 1000\n\n'
+    events = [parse_prices(f) for f in frames[1:] if f.startswith('event:')]
+    assert events[0] == {'AAPL': {'current_price': 190.0, 'change': 1.0, 'change_percent': 0.5, 'timestamp': 1700000000}}
+    assert set(events[1]) == {'MSFT'}
+    assert events[2]['AAPL']['current_price'] == 191.0
+
+def test_idle_stream_sends_heartbeats_and_ends():
+    """Test that an idle stream sends keep-alive comments and closes after max_duration"""
+    cache = QuoteCache(MemoryBackend(), ttl=600)
+
+    frames = run_stream(cache, ticks=100, poll_interval=5, heartbeat=15, max_duration=60)
+
+    assert frames.count(': keep-alive\n\n') == 4
+    assert not any(f.startswith('event:') for f in frames)
+
+def test_stream_slots_cap_and_release():
+    """Test that streams past the cap are refused and a released slot can be taken again"""
+    slots = pricestream.StreamSlots(limit=2)
+    assert slots.try_acquire() and slots.try_acquire()
+    assert not slots.try_acquire()
+
+    slots.release()
+    assert slots.stats() == {'active': 1, 'limit': 2, 'rejected': 1}
+    assert slots.try_acquire()
+
+def test_price_snapshot_reads_cached_fields():
+    """Test that the polling snapshot carries the same fields as the stream and skips uncached symbols"""
+    cache = QuoteCache(MemoryBackend(), ttl=600)
+    cache.set('AAPL', quote(190.0))
+    original = pricestream.quote_cache
+    pricestream.quote_cache = cache
+    try:
+        snapshot = pricestream.price_snapshot(['aapl', 'MSFT'])
+    finally:
+        pricestream.quote_cache = original
+    assert snapshot == {'AAPL': {'current_price': 190.0, 'change': 1.0, 'change_percent': 0.5, 'timestamp': 1700000000}}
+
+if __name__ == "__main__":
+    test_stream_sends_only_changed_quotes()
+    test_idle_stream_sends_heartbeats_and_ends()
+    test_stream_slots_cap_and_release()
+    test_price_snapshot_reads_cached_fields()
+    print("Price stream tests passed!")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+from datetime import datetime, timedelta
+
+from flask import Flask
+
+from app.profiles import ProfileStore
+
+PROFILE = {
+    'symbol': 'AAPL', 'name': 'Apple Inc', 'industry': 'Technology', 'sector': '',
+    'country': 'US', 'currency': 'USD', 'market_cap': 3000000, 'beta': 1.2, 'volatility': 0.25,
+    'logo': 'https://example.com/aapl.png'
+}
+
+def test_profile_fetched_once_and_trimmed():
+    """Test that repeat lookups are served from the store and unused fields are dropped"""
+    store = ProfileStore()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return dict(PROFILE)
+
+    first = store.get('aapl', loader)
+    second = store.get('AAPL', loader)
+
+    assert len(calls) == 1
+    assert first == second
+    assert 'logo' not in first
+
+def test_request_memo_remembers_misses():
+    """Test that a failed lookup is not retried within one request"""
+    store = ProfileStore()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return None
+
+    with Flask(__name__).app_context():
+        assert store.get('NOPE', loader) is None
+        assert store.get('NOPE', loader) is None
+
+    assert len(calls) == 1
+
+class FakeProfileCollection:
+    """Records reads so batch lookups can be checked for a single round trip"""
+    def __init__(self, docs):
+        self.docs = docs
+        self.finds = []
+
+    def find(self, query):
+        self.finds.append(query)
+        return [dict(self.docs[key], _id=key) for key in query['_id']['$in'] if key in self.docs]
+
+    def find_one(self, query):
+        doc = self.docs.get(query['_id'])
+        return dict(doc, _id=query['_id']) if doc else None
+
+    def replace_one(self, query, doc, upsert=False):
+        self.docs[query['_id']] = doc
+
+def test_get_many_reads_mongo_once_and_loads_each_symbol_once():
+    """Test that a batch dedupes symbols, reads persisted profiles in one query and loads only the rest"""
+    store = ProfileStore()
+    store.collection = FakeProfileCollection({'MSFT': dict(PROFILE, symbol='MSFT')})
+    store.memory.set('NVDA', dict(PROFILE, symbol='NVDA'), 60)
+    loaded = []
+
+    def loader(symbol):
+        loaded.append(symbol)
+        return dict(PROFILE, symbol=symbol)
+
+    profiles = store.get_many(['aapl', 'AAPL', 'MSFT', 'nvda', 'AAPL '], loader)
+
+    assert sorted(profiles) == ['AAPL', 'MSFT', 'NVDA']
+    assert loaded == ['AAPL']
+    assert store.collection.finds == [{'_id': {'$in': ['AAPL', 'MSFT']}}]
+    assert 'AAPL' in store.collection.docs
+    assert store.get('AAPL', loader)['symbol'] == 'AAPL' and loaded == ['AAPL']
+
+def test_missing_profiles_are_cached_in_both_tiers():
+    """Test that a symbol with no profile is not refetched by later requests or other workers"""
+    store = ProfileStore()
+    store.collection = FakeProfileCollection({})
+    calls = []
+
+    def loader(symbol='SPY'):
+        calls.append(symbol)
+        return None
+
+    with Flask(__name__).app_context():
+        assert store.get('SPY', loader) is None
+    with Flask(__name__).app_context():
+        assert store.get('SPY', loader) is None
+        assert store.get_many(['SPY'], loader) == {'SPY': None}
+    assert calls == ['SPY']
+    assert store.collection.docs['SPY']['missing']
+
+    # Another worker with a cold process cache reads the miss from Mongo
+    other = ProfileStore()
+    other.collection = store.collection
+    assert other.get('SPY', loader) is None
+    assert other.get_many(['SPY'], loader) == {'SPY': None}
+    assert calls == ['SPY']
+
+def test_stored_misses_expire_after_miss_ttl():
+    """Test that a miss older than miss_ttl is looked up again"""
+    store = ProfileStore(miss_ttl=3600)
+    store.collection = FakeProfileCollection({'SPY': {'missing': True, 'fetched_at': datetime.utcnow() - timedelta(hours=2)}})
+    profile = store.get('SPY', lambda: dict(PROFILE, symbol='SPY'))
+    assert profile['symbol'] == 'SPY'
+    assert not store.collection.docs['SPY'].get('missing')
+
+if __name__ == "__main__":
+    test_profile_fetched_once_and_trimmed()
+    test_request_memo_remembers_misses()
+    test_get_many_reads_mongo_once_and_loads_each_symbol_once()
+    test_missing_profiles_are_cached_in_both_tiers()
+    test_stored_misses_expire_after_miss_ttl()
+    print("Profile store tests passed!")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+import time
+
+import pytest
+
+from app.cache import MemoryBackend, RedisBackend, QuoteCache, build_backend
+
+QUOTE = {'current_price': 190.5, 'change': 1.2, 'change_percent': 0.63}
+
+def test_memory_cache_hits_and_misses():
+    """Test hit/miss counters on the in-process backend"""
+    cache = QuoteCache(MemoryBackend(maxsize=10), ttl=60)
+
+    assert cache.get('AAPL') is None
+    cache.set('aapl', QUOTE)
+    assert cache.get('AAPL') == QUOTE
+
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['size'] == 1
+
+def test_memory_cache_ttl_expiry():
+    """Test that entries expire after their TTL"""
+    cache = QuoteCache(MemoryBackend(maxsize=10), ttl=0.05)
+    cache.set('MSFT', QUOTE)
+    time.sleep(0.1)
+
+    assert cache.get('MSFT') is None
+
+def test_memory_cache_lru_eviction():
+    """Test that the least recently used symbol is evicted first"""
+    cache = QuoteCache(MemoryBackend(maxsize=2), ttl=60)
+    cache.set('AAPL', QUOTE)
+    cache.set('MSFT', QUOTE)
+    cache.get('AAPL')
+    cache.set('NVDA', QUOTE)
+
+    assert cache.get('MSFT') is None
+    assert cache.get('AAPL') == QUOTE
+    assert cache.stats()['evictions'] == 1
+
+def test_redis_cache_lru_eviction():
+    """Test the Redis-protocol backend against fakeredis"""
+    fakeredis = pytest.importorskip("fakeredis")
+
+    cache = QuoteCache(RedisBackend(client=fakeredis.FakeRedis(), maxsize=2), ttl=60)
+    cache.set('AAPL', QUOTE)
+    cache.set('MSFT', QUOTE)
+    cache.get('AAPL')
+    cache.set('NVDA', QUOTE)
+
+    assert cache.get('MSFT') is None
+    assert cache.get('AAPL') == QUOTE
+
+    stats = cache.stats()
+    assert stats['evictions'] == 1
+    assert stats['size'] == 2
+
+class BrokenBackend:
+    """Stands in for a Redis server that has gone away"""
+    def get(self, key):
+        raise ConnectionError("connection refused")
+
+    def set(self, key, value, ttl=None):
+        raise ConnectionError("connection refused")
+
+    def delete(self, key):
+        raise ConnectionError("connection refused")
+
+    def get_stats(self):
+        raise ConnectionError("connection refused")
+
+def test_backend_errors_are_misses():
+    """Test that a failing backend reads as a miss and writes are skipped instead of raising"""
+    cache = QuoteCache(BrokenBackend(), ttl=60)
+    assert cache.get('AAPL') is None
+    assert cache.get_stale('AAPL') is None
+    cache.set('AAPL', QUOTE)
+    cache.delete('AAPL')
+    stats = cache.stats()
+    assert stats['backend_errors'] == 5
+    assert stats['hit_rate'] == 0
+
+def test_unreachable_redis_falls_back_to_memory():
+    """Test that an unreachable REDIS_URL is detected at startup rather than on the first lookup"""
+    backend = build_backend({'REDIS_URL': 'redis://127.0.0.1:1/0'})
+    assert isinstance(backend, MemoryBackend)
+
+if __name__ == "__main__":
+    test_memory_cache_hits_and_misses()
+    test_memory_cache_ttl_expiry()
+    test_memory_cache_lru_eviction()
+    test_redis_cache_lru_eviction()
+    test_backend_errors_are_misses()
+    test_unreachable_redis_falls_back_to_memory()
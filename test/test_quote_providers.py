@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+import time
+
+from app import providers
+from app.providers import ProviderChain, QuoteProvider, LatencyTracker
+
+class FakeProvider(QuoteProvider):
+    def __init__(self, name, price=None, delay=0.0, fail=False, profile=None):
+        super().__init__()
+        self.name = name
+        self.price = price
+        self.delay = delay
+        self.fail = fail
+        self.profile = profile
+        self.quote_calls = 0
+
+    def fetch_quote(self, symbol, lane='interactive'):
+        self.quote_calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise IOError("upstream error")
+        return {'current_price': self.price} if self.price is not None else None
+
+    def fetch_profile(self, symbol, lane='enrichment'):
+        return self.profile
+
+def test_failover_in_order():
+    """Test that a failing or empty provider falls through to the next one"""
+    chain = ProviderChain([FakeProvider('a', fail=True), FakeProvider('b'), FakeProvider('c', price=3.0)], hedge=False)
+
+    assert chain.quote('AAPL') == {'current_price': 3.0}
+    assert chain.providers[0].failures == 1
+    assert chain.profile('AAPL') is None
+
+    chain.providers[1].profile = {'symbol': 'AAPL'}
+    assert chain.profile('AAPL') == {'symbol': 'AAPL'}
+
+def test_slow_primary_is_hedged():
+    """Test that a primary slower than its p95 races the secondary and the first answer wins"""
+    primary = FakeProvider('primary', price=1.0, delay=0.5)
+    secondary = FakeProvider('secondary', price=2.0, delay=0.01)
+    chain = ProviderChain([primary, secondary], default_hedge_delay=0.05)
+
+    start = time.time()
+    assert chain.quote('AAPL') == {'current_price': 2.0}
+    assert time.time() - start < 0.3
+    assert chain.hedges_fired == 1 and chain.hedges_won == 1
+
+def test_fast_primary_is_not_hedged():
+    """Test that a primary answering within the hedge delay never calls the secondary"""
+    primary = FakeProvider('primary', price=1.0)
+    secondary = FakeProvider('secondary', price=2.0)
+    chain = ProviderChain([primary, secondary], default_hedge_delay=0.2)
+
+    assert chain.quote('AAPL') == {'current_price': 1.0}
+    assert secondary.quote_calls == 0
+    assert chain.hedges_fired == 0
+
+def test_background_lane_never_hedges():
+    """Test that background quotes wait for the primary instead of doubling upstream load"""
+    primary = FakeProvider('primary', price=1.0, delay=0.1)
+    secondary = FakeProvider('secondary', price=2.0)
+    chain = ProviderChain([primary, secondary], default_hedge_delay=0.01)
+
+    assert chain.quote('AAPL', lane='background') == {'current_price': 1.0}
+    assert secondary.quote_calls == 0
+
+def test_hedge_delay_follows_observed_p95():
+    """Test that the hedge delay is the p95 of recent primary latencies once enough are recorded"""
+    tracker = LatencyTracker(min_samples=20)
+    assert tracker.percentile(95, 1.0) == 1.0
+    for ms in range(1, 101):
+        tracker.record(ms / 1000.0)
+    assert tracker.percentile(95) == 0.096
+
+def test_secondary_providers_are_opt_in():
+    """Test that the default chain is Finnhub alone and an uninstalled provider is left out"""
+    original_providers, original_yf = list(providers.quote_providers.providers), providers.yf
+    providers.yf = None
+    try:
+        chain = providers.configure_quote_providers({'FINNHUB_API_KEY': 'key'})
+        assert [p.name for p in chain.providers] == ['finnhub']
+        chain = providers.configure_quote_providers({'FINNHUB_API_KEY': 'key', 'QUOTE_PROVIDERS': 'finnhub,yfinance'})
+        assert [p['name'] for p in chain.stats()['providers']] == ['finnhub']
+    finally:
+        providers.quote_providers.providers = original_providers
+        providers.yf = original_yf
+
+if __name__ == "__main__":
+    test_failover_in_order()
+    test_slow_primary_is_hedged()
+    test_fast_primary_is_not_hedged()
+    test_background_lane_never_hedges()
+    test_hedge_delay_follows_observed_p95()
+    test_secondary_providers_are_opt_in()
+    print("Quote provider tests passed!")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+import time
+
+from app.ratelimit import MemoryBucketStore, MongoBucketStore, RateLimiter, configure_rate_limiter
+
+def test_burst_then_reject():
+    """Test that the bucket allows a burst and then makes callers fall back"""
+    limiter = RateLimiter(MemoryBucketStore(), 'test', rate_per_minute=60, burst=3)
+
+    assert all(limiter.acquire('interactive', max_wait=0) for _ in range(3))
+    assert not limiter.acquire('interactive', max_wait=0)
+    assert limiter.stats()['rejected']['interactive'] == 1
+
+def test_background_lane_leaves_reserve_for_interactive():
+    """Test that background callers cannot drain the interactive reserve"""
+    limiter = RateLimiter(MemoryBucketStore(), 'test', rate_per_minute=60, burst=4)
+
+    granted = 0
+    while limiter.acquire('background', max_wait=0):
+        granted += 1
+
+    assert granted == 2
+    assert limiter.acquire('interactive', max_wait=0)
+    assert limiter.acquire('interactive', max_wait=0)
+
+def test_bounded_wait():
+    """Test that a queued caller gets a token once the bucket refills"""
+    limiter = RateLimiter(MemoryBucketStore(), 'test', rate_per_minute=600, burst=1)
+    assert limiter.acquire('interactive', max_wait=0)
+
+    start = time.time()
+    assert limiter.acquire('interactive', max_wait=1)
+    assert time.time() - start < 1
+
+class BrokenStore:
+    """Stands in for a shared store whose server has gone away"""
+    def take(self, key, capacity, rate, reserve):
+        raise ConnectionError("connection refused")
+
+def test_store_errors_keep_limiting_in_process():
+    """Test that a failing shared store falls back to a local bucket rather than letting every call through"""
+    limiter = RateLimiter(BrokenStore(), 'test', rate_per_minute=60, burst=2)
+
+    assert limiter.acquire('interactive', max_wait=0)
+    assert limiter.acquire('interactive', max_wait=0)
+    assert not limiter.acquire('interactive', max_wait=0)
+    assert limiter.stats()['store_errors'] == 3
+
+class FakeMongoClient:
+    def getCollectionEndpoint(self, name):
+        return name
+
+def test_unreachable_redis_uses_mongo():
+    """Test that an unreachable REDIS_URL is detected at startup and the bucket moves to Mongo"""
+    limiter = configure_rate_limiter({'REDIS_URL': 'redis://127.0.0.1:1/0'}, FakeMongoClient())
+    try:
+        assert isinstance(limiter.store, MongoBucketStore)
+        assert limiter.store.collection == 'RateLimit'
+    finally:
+        limiter.store = MemoryBucketStore()
+
+if __name__ == "__main__":
+    test_burst_then_reject()
+    test_background_lane_leaves_reserve_for_interactive()
+    test_bounded_wait()
+    test_store_errors_keep_limiting_in_process()
+    test_unreachable_redis_uses_mongo()
+    print("Rate limit tests passed!")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+from datetime import datetime
+
+from pymongo.errors import DuplicateKeyError
+
+from app.refresher import LeaderLease, PriceRefresher
+
+class FakeHoldings:
+    """Returns a fixed distinct-symbol aggregation result"""
+    def __init__(self, symbols):
+        self.symbols = symbols
+
+    def aggregate(self, pipeline):
+        return [{'_id': s} for s in self.symbols]
+
+class FakeLeaseCollection:
+    """Single-document stand-in for the Lease collection's conditional upsert"""
+    def __init__(self):
+        self.doc = None
+
+    def find_one_and_update(self, query, update, upsert=False, return_document=None):
+        owner_clause, expiry_clause = query['$or']
+        if self.doc is not None:
+            matches = self.doc['owner'] == owner_clause['owner'] or self.doc['expires_at'] < expiry_clause['expires_at']['$lt']
+            if not matches:
+                raise DuplicateKeyError("lease held")
+        self.doc = dict(update['$set'], _id=query['_id'])
+        return self.doc
+
+    def delete_one(self, query):
+        if self.doc is not None and self.doc['owner'] == query['owner']:
+            self.doc = None
+
+def test_only_one_instance_holds_the_lease():
+    """Test that a second instance cannot take an unexpired lease until it is released"""
+    collection = FakeLeaseCollection()
+    first = LeaderLease(collection, 'price-refresher', ttl=60, owner='a')
+    second = LeaderLease(collection, 'price-refresher', ttl=60, owner='b')
+
+    assert first.acquire()
+    assert first.acquire()
+    assert not second.acquire()
+
+    first.release()
+    assert second.acquire()
+
+def test_expired_lease_is_taken_over():
+    """Test that a lease left behind by a dead instance can be claimed"""
+    collection = FakeLeaseCollection()
+    collection.doc = {'_id': 'price-refresher', 'owner': 'dead', 'expires_at': datetime(2000, 1, 1)}
+
+    assert LeaderLease(collection, 'price-refresher', owner='b').acquire()
+
+def test_refresh_cycle_covers_all_held_symbols_in_batches():
+    """Test that every held symbol is refreshed and the lease is renewed per batch"""
+    refreshed = []
+    lease = LeaderLease(FakeLeaseCollection(), 'price-refresher', owner='a')
+    renewals = []
+    original_acquire = lease.acquire
+    lease.acquire = lambda: renewals.append(1) or original_acquire()
+
+    refresher = PriceRefresher(
+        investments=FakeHoldings(['AAPL', 'MSFT', 'NVDA', 'VOO', 'TSLA']),
+        lease=lease,
+        refresh=lambda symbol: refreshed.append(symbol) or {'current_price': 1.0},
+        batch_size=2
+    )
+
+    assert refresher.refresh_once() == 5
+    assert refreshed == ['AAPL', 'MSFT', 'NVDA', 'VOO', 'TSLA']
+    assert len(renewals) == 3
+    assert refresher.stats()['symbols'] == 5
+
+def test_follower_does_not_refresh():
+    """Test that an instance without the lease skips the cycle"""
+    collection = FakeLeaseCollection()
+    LeaderLease(collection, 'price-refresher', owner='leader').acquire()
+    refreshed = []
+    refresher = PriceRefresher(
+        investments=FakeHoldings(['AAPL']),
+        lease=LeaderLease(collection, 'price-refresher', owner='follower'),
+        refresh=lambda symbol: refreshed.append(symbol)
+    )
+
+    assert refresher.refresh_once() == 0
+    assert refreshed == []
+    assert refresher.stats()['skipped_not_leader'] == 1
+
+def test_cycle_stops_when_a_whole_batch_fails():
+    """Test that a rate-limited batch ends the cycle instead of queueing every symbol"""
+    calls = []
+    refresher = PriceRefresher(
+        investments=FakeHoldings(['AAPL', 'MSFT', 'NVDA', 'VOO']),
+        refresh=lambda symbol: calls.append(symbol),
+        batch_size=2
+    )
+
+    assert refresher.refresh_once() == 0
+    assert calls == ['AAPL', 'MSFT']
+
+if __name__ == "__main__":
+    test_only_one_instance_holds_the_lease()
+    test_expired_lease_is_taken_over()
+    test_refresh_cycle_covers_all_held_symbols_in_batches()
+    test_follower_does_not_refresh()
+    test_cycle_stops_when_a_whole_batch_fails()
+    print("Price refresher tests passed!")
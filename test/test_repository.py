@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+from datetime import datetime
+
+import bson
+from bson.codec_options import DEFAULT_CODEC_OPTIONS
+from bson.objectid import ObjectId
+from bson.raw_bson import RawBSONDocument
+
+from app.operations import deserializeDoc
+from app.repository import Repository, projection
+
+USER = ObjectId()
+EXPENSES = [
+    {'_id': ObjectId(), 'user_id': USER, 'amount': 12.5, 'category': 'Food', 'description': 'x' * 500,
+     'date': datetime(2025, 3, 1), 'currency': 'USD', 'converted_amount_usd': 12.5, 'created_at': datetime(2025, 3, 1)},
+    {'_id': ObjectId(), 'user_id': USER, 'amount': 40.0, 'category': 'Travel', 'description': 'y' * 500,
+     'date': datetime(2025, 3, 2), 'currency': 'EUR', 'converted_amount_usd': 43.2, 'created_at': datetime(2025, 3, 2)},
+    {'_id': ObjectId(), 'user_id': ObjectId(), 'amount': 1.0, 'category': 'Other', 'description': '',
+     'date': datetime(2025, 3, 3), 'currency': 'USD', 'converted_amount_usd': 1.0, 'created_at': datetime(2025, 3, 3)}
+]
+
+class FakeCursor(list):
+    """Sorts on the stored documents, since the server sorts before projecting"""
+    def __init__(self, pairs):
+        super().__init__(raw for _, raw in pairs)
+        self.pairs = pairs
+
+    def sort(self, spec):
+        field, direction = spec[0]
+        return FakeCursor(sorted(self.pairs, key=lambda p: p[0][field], reverse=direction < 0))
+
+class FakeRawCollection:
+    """Applies the query and projection server-side and returns documents as raw BSON, like the driver"""
+    def __init__(self, docs, codec_options):
+        self.docs = docs
+        self.codec_options = codec_options
+        self.calls = []
+
+    def _project(self, doc, spec):
+        if spec is None:
+            return dict(doc)
+        return {k: v for k, v in doc.items() if spec.get(k, 1 if k == '_id' else 0)}
+
+    def find(self, query, spec=None, limit=0):
+        self.calls.append(spec)
+        matches = [d for d in self.docs if all(d.get(k) == v for k, v in query.items())]
+        return FakeCursor([
+            (d, self.codec_options.document_class(bson.encode(self._project(d, spec)), self.codec_options))
+            for d in matches
+        ])
+
+    def find_one(self, query, spec=None):
+        found = self.find(query, spec)
+        return found[0] if found else None
+
+class FakeCollection:
+    codec_options = DEFAULT_CODEC_OPTIONS
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.raw = None
+
+    def with_options(self, codec_options):
+        self.raw = FakeRawCollection(self.docs, codec_options)
+        return self.raw
+
+def test_projection_spec():
+    """Test that only named fields are requested and _id is dropped unless asked for"""
+    assert projection(None) is None
+    assert projection(['category']) == {'category': 1, '_id': 0}
+    assert projection(['_id', 'weight']) == {'_id': 1, 'weight': 1}
+
+def test_fields_are_pushed_down_and_documents_stay_raw():
+    """Test that a narrow read sends a projection and returns small undecoded documents"""
+    collection = FakeCollection(EXPENSES)
+    repository = Repository(collection, deserializeDoc.expense)
+
+    docs = repository.for_user(USER, ['category', 'converted_amount_usd'], sort=[('date', -1)])
+
+    assert collection.raw.calls == [{'category': 1, 'converted_amount_usd': 1, '_id': 0}]
+    assert all(isinstance(doc, RawBSONDocument) for doc in docs)
+    assert [doc['category'] for doc in docs] == ['Travel', 'Food']
+    assert 'description' not in docs[0]
+    assert len(docs[0].raw) < len(bson.encode(EXPENSES[1])) / 5
+
+def test_values_and_full_models():
+    """Test single-field reads and full model decoding for callers that need every field"""
+    repository = Repository(FakeCollection(EXPENSES), deserializeDoc.expense)
+
+    assert repository.values({'user_id': USER}, 'category') == ['Food', 'Travel']
+    models = repository.models_for_user(USER)
+    assert [m.converted_amount_usd for m in models] == [12.5, 43.2]
+    assert models[0].date == datetime(2025, 3, 1)
+
+if __name__ == "__main__":
+    test_projection_spec()
+    test_fields_are_pushed_down_and_documents_stay_raw()
+    test_values_and_full_models()
+    print("Repository tests passed!")
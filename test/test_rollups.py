@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+from datetime import datetime
+
+from bson.objectid import ObjectId
+
+from app.rollups import expense_rollup, expense_rollup_pipeline
+
+USER = ObjectId()
+OTHER = ObjectId()
+
+def expense(user, day, category, amount):
+    return {'_id': ObjectId(), 'user_id': user, 'category': category, 'amount': amount, 'description': f"{category} {day}",
+            'date': datetime(2025, 3, day), 'currency': 'USD', 'converted_amount_usd': amount, 'created_at': datetime(2025, 3, day)}
+
+EXPENSES = [
+    expense(USER, 2, 'Food', 10.0), expense(USER, 9, 'Food', 20.0), expense(USER, 15, 'Travel', 100.0),
+    expense(USER, 23, 'Food', 5.0), expense(USER, 30, 'Rent', 900.0), expense(USER, 1, 'Travel', 50.0),
+    expense(OTHER, 3, 'Food', 999.0)
+]
+
+def evaluate(expr, doc):
+    """Just enough of the aggregation expression language to run the rollup pipeline"""
+    if isinstance(expr, str) and expr.startswith('$'):
+        return doc.get(expr[1:])
+    if not isinstance(expr, dict):
+        return expr
+    (op, args), = expr.items()
+    if op == '$dayOfMonth':
+        return evaluate(args, doc).day
+    values = [evaluate(a, doc) for a in args] if isinstance(args, list) else evaluate(args, doc)
+    return {
+        '$min': lambda: min(values), '$subtract': lambda: values[0] - values[1],
+        '$divide': lambda: values[0] / values[1], '$floor': lambda: float(int(values))
+    }[op]()
+
+def run_stages(stages, docs):
+    for stage in stages:
+        (op, spec), = stage.items()
+        if op == '$group':
+            groups = {}
+            for doc in docs:
+                key = evaluate(spec['_id'], doc)
+                row = groups.setdefault(key, {'_id': key, **{f: 0 for f in spec if f != '_id'}})
+                for field, acc in spec.items():
+                    if field != '_id':
+                        row[field] += evaluate(acc['$sum'], doc)
+            docs = list(groups.values())
+        elif op == '$sort':
+            for field, direction in reversed(list(spec.items())):
+                docs = sorted(docs, key=lambda d: d[field], reverse=direction < 0)
+        elif op == '$limit':
+            docs = docs[:spec]
+        elif op == '$match':
+            docs = [d for d in docs if all(d.get(k) == v for k, v in spec.items())]
+        elif op == '$facet':
+            docs = [{name: run_stages(sub, docs) for name, sub in spec.items()}]
+    return docs
+
+class FakeUnitOfWork:
+    def __init__(self, docs):
+        self.docs = docs
+        self.pipelines = []
+
+    def aggregate(self, name, pipeline):
+        self.pipelines.append((name, pipeline))
+        return run_stages(pipeline, self.docs)
+
+def test_pipeline_matches_on_the_indexed_user_field_first():
+    """The user filter comes before the facet so the (user_id, date) index narrows the input"""
+    pipeline = expense_rollup_pipeline(USER)
+    assert pipeline[0] == {'$match': {'user_id': USER}}
+    assert set(pipeline[1]['$facet']) == {'totals', 'by_category', 'weekly', 'recent'}
+
+def test_rollup_matches_the_python_loops_it_replaces():
+    """Totals, per-category spend and weekly buckets agree with summing the user's expenses in Python"""
+    uow = FakeUnitOfWork(EXPENSES)
+    rollup = expense_rollup(uow, USER)
+    mine = [e for e in EXPENSES if e['user_id'] == USER]
+
+    assert len(uow.pipelines) == 1 and uow.pipelines[0][0] == 'Expense'
+    assert rollup['count'] == len(mine)
+    assert rollup['total_spent'] == sum(e['converted_amount_usd'] for e in mine)
+    for category in ('Food', 'Travel', 'Rent'):
+        assert rollup['by_category'][category] == sum(e['converted_amount_usd'] for e in mine if e['category'] == category)
+    weekly = [0, 0, 0, 0]
+    for e in mine:
+        weekly[min(3, int((e['date'].day - 1) / 7))] += e['converted_amount_usd']
+    assert rollup['weekly'] == weekly
+
+def test_recent_expenses_are_the_latest_oldest_first():
+    """The five most recent expenses come back as models in date order"""
+    rollup = expense_rollup(FakeUnitOfWork(EXPENSES), USER)
+    assert [e.date.day for e in rollup['recent']] == [2, 9, 15, 23, 30]
+    assert rollup['recent'][-1].category == 'Rent'
+
+def test_rollup_of_no_expenses():
+    """A user with no expenses gets zeros rather than a missing facet"""
+    rollup = expense_rollup(FakeUnitOfWork([]), USER)
+    assert rollup == {'total_spent': 0, 'count': 0, 'by_category': {}, 'weekly': [0, 0, 0, 0], 'recent': []}
+
+if __name__ == "__main__":
+    test_pipeline_matches_on_the_indexed_user_field_first()
+    test_rollup_matches_the_python_loops_it_replaces()
+    test_recent_expenses_are_the_latest_oldest_first()
+    test_rollup_of_no_expenses()
+    print("All rollup tests passed!")
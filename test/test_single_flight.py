@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+
+from app.singleflight import SingleFlight
+
+def test_concurrent_callers_share_one_call():
+    """Test that concurrent callers for one key wait on a single in-flight call"""
+    flight = SingleFlight('test')
+    calls = []
+
+    def slow_fetch(symbol):
+        calls.append(symbol)
+        time.sleep(0.2)
+        return {'symbol': symbol, 'current_price': 100.0}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do('AAPL', slow_fetch, 'AAPL'))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert len(results) == 5
+    assert all(r == results[0] for r in results)
+
+    stats = flight.stats()
+    assert stats['executed'] == 1
+    assert stats['coalesced'] == 4
+    assert stats['in_flight'] == 0
+
+def test_errors_reach_waiting_callers():
+    """Test that a failed call raises for the leader and every waiter"""
+    flight = SingleFlight('test')
+    errors = []
+
+    def failing_fetch():
+        time.sleep(0.1)
+        raise ValueError("upstream down")
+
+    def call():
+        try:
+            flight.do('MSFT', failing_fetch)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(errors) == 3
+
+if __name__ == "__main__":
+    test_concurrent_callers_share_one_call()
+    test_errors_reach_waiting_callers()
+    print("Single-flight tests passed!")
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+import time
+
+from app import operations
+from app.fuzzy import bounded_distance
+from app.symbols import SymbolIndex, get_symbol_index
+
+def test_exact_ticker_ranks_first():
+    """Test that an exact ticker beats prefix and name matches"""
+    results = get_symbol_index().search('MA')
+
+    assert results[0]['symbol'] == 'MA'
+    assert len(results) <= 5
+
+def test_company_name_search():
+    """Test matching on company-name tokens and multi-word queries"""
+    index = get_symbol_index()
+
+    assert index.search('microsoft')[0]['symbol'] == 'MSFT'
+    assert index.search('total bond')[0]['symbol'] == 'BND'
+    assert index.search('zzzzqqq') == []
+
+def test_popular_symbols_boosted():
+    """Test that popular tickers win ties on a shared prefix"""
+    index = SymbolIndex([
+        {'symbol': 'AAPB', 'name': 'Leveraged Apple ETF', 'type': 'ETF', 'region': 'US'},
+        {'symbol': 'AAPL', 'name': 'Apple Inc.', 'type': 'Stock', 'region': 'US'},
+    ])
+
+    assert index.search('AAP')[0]['symbol'] == 'AAPL'
+
+def test_search_latency():
+    """Test that a typeahead query is answered well under a millisecond"""
+    index = get_symbol_index()
+    queries = ['A', 'AP', 'APPLE', 'micro', 'vanguard', 'S', 'NV', 'bank of']
+
+    start = time.perf_counter()
+    for _ in range(100):
+        for q in queries:
+            index.search(q)
+    per_query = (time.perf_counter() - start) / (100 * len(queries))
+
+    print(f"Average search latency: {per_query * 1e6:.1f} us")
+    assert per_query < 0.001
+
+def test_bounded_distance():
+    """Test edit distance with swaps and the early cut-off"""
+    assert bounded_distance('mircosoft', 'microsoft', 2) == 1
+    assert bounded_distance('nvida', 'nvidia', 2) == 1
+    assert bounded_distance('kitten', 'sitting', 3) == 3
+    assert bounded_distance('apple', 'zebra', 1) == 2
+
+def test_fuzzy_search_handles_typos():
+    """Test that misspelled company names and tickers still find the right symbol"""
+    index = get_symbol_index()
+
+    assert index.search('mircosoft') == []
+    assert index.fuzzy_search('mircosoft')[0]['symbol'] == 'MSFT'
+    assert index.fuzzy_search('nvida')[0]['symbol'] == 'NVDA'
+    assert index.fuzzy_search('berkshir hathway')[0]['symbol'] == 'BRK.A'
+    assert 'AAPL' in [r['symbol'] for r in index.fuzzy_search('APPL')]
+
+def test_only_ticker_hits_are_authoritative():
+    """Test that name-only matches for a ticker-shaped query do not count as an answer"""
+    index = get_symbol_index()
+
+    assert index.search('MA')[0]['symbol'] == 'MA' and index.is_authoritative('MA')
+    assert index.search('NET') and not index.is_authoritative('NET')
+    assert index.search('ARM') and not index.is_authoritative('ARM')
+    assert index.is_authoritative('microsoft')
+
+class FakeSearchClient:
+    """Answers Finnhub /search with canned results and records the queries"""
+    def __init__(self, results):
+        self.results = results
+        self.queries = []
+
+    def get(self, url, timeout=None, retry=True):
+        query = url.split('q=')[1].split('&')[0]
+        self.queries.append(query)
+        results = self.results.get(query, [])
+        return type('Response', (), {'json': lambda self: {'count': len(results), 'result': results}})()
+
+def search_with(client, query):
+    original = operations.http_client
+    operations.http_client = client
+    try:
+        return operations.search_stock_api(query, 'key')
+    finally:
+        operations.http_client = original
+
+def test_name_only_hits_still_ask_finnhub():
+    """Test that NET reaches the upstream search and its answer ranks above local name matches"""
+    client = FakeSearchClient({'NET': [{'symbol': 'NET', 'description': 'CLOUDFLARE INC - A', 'type': 'Common Stock'}]})
+    results = search_with(client, 'net')
+
+    assert client.queries == ['NET']
+    assert results[0]['symbol'] == 'NET'
+    assert len(results) == 5 and 'NFLX' in [r['symbol'] for r in results]
+
+    assert search_with(client, 'MA')[0]['symbol'] == 'MA'
+    assert client.queries == ['NET']
+
+def test_unindexed_ticker_reaches_finnhub_before_fuzzy_matching():
+    """Test that real tickers missing from the listing are looked up rather than swapped for a near neighbour"""
+    client = FakeSearchClient({
+        'SNOW': [{'symbol': 'SNOW', 'description': 'SNOWFLAKE INC-CLASS A', 'type': 'Common Stock'}],
+        'DKNG': [{'symbol': 'DKNG', 'description': 'DRAFTKINGS INC-CL A', 'type': 'Common Stock'}]
+    })
+    assert search_with(client, 'SNOW')[0]['symbol'] == 'SNOW'
+    assert search_with(client, 'DKNG')[0]['symbol'] == 'DKNG'
+    assert client.queries == ['SNOW', 'DKNG']
+
+    # With nothing upstream either, typo matching still gets its turn
+    assert 'MSFT' in [r['symbol'] for r in search_with(client, 'mircosoft')]
+    assert client.queries[-1] == 'MIRCOSOFT'
+
+if __name__ == "__main__":
+    test_exact_ticker_ranks_first()
+    test_company_name_search()
+    test_popular_symbols_boosted()
+    test_search_latency()
+    test_bounded_distance()
+    test_fuzzy_search_handles_typos()
+    test_only_ticker_hits_are_authoritative()
+    test_name_only_hits_still_ask_finnhub()
+    test_unindexed_ticker_reaches_finnhub_before_fuzzy_matching()
+    print("Symbol index tests passed!")
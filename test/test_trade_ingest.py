@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+import importlib.util
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from app import ingest
+from app.cache import MemoryBackend, QuoteCache
+from app.ingest import TradeConflater, TradeIngestor
+from app.markethours import EXCHANGE_TZ
+
+def ms(*args):
+    return int(datetime(*args, tzinfo=EXCHANGE_TZ).timestamp() * 1000)
+
+class FakeHoldings:
+    def __init__(self, symbols):
+        self.symbols = symbols
+
+    def aggregate(self, pipeline):
+        return [{'_id': s} for s in self.symbols]
+
+class FakeConnection:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, message):
+        self.sent.append(json.loads(message))
+
+def test_ticks_conflate_into_one_quote():
+    """Test that many ticks become a single quote with day change against the seeded close"""
+    conflater = TradeConflater()
+    conflater.seed('AAPL', {'current_price': 100.0, 'previous_close': 100.0, 'timestamp': ms(2025, 3, 12, 9, 0) // 1000})
+    conflater.add_trades([
+        {'s': 'AAPL', 'p': 101.0, 't': ms(2025, 3, 12, 9, 30)},
+        {'s': 'AAPL', 'p': 103.0, 't': ms(2025, 3, 12, 9, 31)},
+        {'s': 'AAPL', 'p': 99.0, 't': ms(2025, 3, 12, 9, 30, 30)},  # late tick, dropped
+        {'s': 'AAPL', 'p': 102.0, 't': ms(2025, 3, 12, 9, 32)},
+        {'s': 'MSFT', 'p': 400.0, 't': ms(2025, 3, 12, 9, 32)},    # not subscribed
+    ])
+
+    quotes = conflater.drain()
+    assert list(quotes) == ['AAPL']
+    quote = quotes['AAPL']
+    assert quote['current_price'] == 102.0
+    assert quote['change'] == 2.0 and quote['change_percent'] == 2.0
+    assert (quote['open'], quote['high'], quote['low']) == (101.0, 103.0, 101.0)
+    assert quote['source'] == 'stream'
+    assert conflater.drain() == {}
+
+def test_new_session_rolls_previous_close():
+    """Test that the first trade of a new day uses the prior day's last trade as previous close"""
+    conflater = TradeConflater()
+    conflater.seed('AAPL', {'current_price': 100.0, 'previous_close': 98.0, 'timestamp': ms(2025, 3, 12, 15, 59) // 1000})
+    conflater.add_trades([{'s': 'AAPL', 'p': 105.0, 't': ms(2025, 3, 13, 9, 30)}])
+
+    quote = conflater.drain()['AAPL']
+    assert quote['previous_close'] == 100.0
+    assert quote['change'] == 5.0
+    assert quote['open'] == 105.0
+
+def test_subscriptions_follow_holdings():
+    """Test that holdings changes drive subscribe and unsubscribe messages"""
+    holdings = FakeHoldings(['AAPL', 'MSFT'])
+    seeded = []
+    ingestor = TradeIngestor(investments=holdings, seed=lambda s: seeded.append(s) or {'current_price': 1.0})
+    conn = FakeConnection()
+
+    ingestor.sync_subscriptions(conn)
+    holdings.symbols = ['MSFT', 'NVDA']
+    ingestor.sync_subscriptions(conn)
+
+    assert conn.sent == [
+        {'type': 'subscribe', 'symbol': 'AAPL'},
+        {'type': 'subscribe', 'symbol': 'MSFT'},
+        {'type': 'subscribe', 'symbol': 'NVDA'},
+        {'type': 'unsubscribe', 'symbol': 'AAPL'},
+    ]
+    assert ingestor.subscribed == {'MSFT', 'NVDA'}
+    assert seeded == ['AAPL', 'MSFT', 'NVDA']
+
+def test_replayed_ticks_reach_quote_cache():
+    """Test the ingestor end to end against the replay stand-in server"""
+    pytest.importorskip("websockets")
+    from websockets.sync.server import serve
+
+    path = os.path.join(os.path.dirname(__file__), '..', 'scripts', 'replay_trades_server.py')
+    spec = importlib.util.spec_from_file_location('replay_trades_server', path)
+    replay = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(replay)
+    trades = replay.load_trades(replay.DEFAULT_RECORDING)
+
+    original_cache = ingest.quote_cache
+    ingest.quote_cache = QuoteCache(MemoryBackend(), ttl=60)
+    server = serve(replay.make_handler(trades, speed=50, loop=False), 'localhost', 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.socket.getsockname()[1]
+
+    ingestor = TradeIngestor(
+        url=f"ws://localhost:{port}",
+        investments=FakeHoldings(['AAPL', 'NVDA']),
+        seed=lambda s: {'current_price': 100.0, 'previous_close': 100.0},
+        flush_interval=0.1
+    )
+    try:
+        worker = threading.Thread(target=ingestor._session, daemon=True)
+        worker.start()
+        deadline = time.time() + 10
+        while time.time() < deadline and not (ingest.quote_cache.get('AAPL') and ingest.quote_cache.get('NVDA')):
+            time.sleep(0.1)
+        ingestor._stop.set()
+        worker.join(timeout=5)
+
+        assert ingest.quote_cache.get('AAPL')['source'] == 'stream'
+        assert ingest.quote_cache.get('NVDA') is not None
+        assert ingest.quote_cache.get('TSLA') is None
+        stats = ingestor.stats()
+        assert stats['trades'] > stats['quotes_written'] > 0
+    finally:
+        server.shutdown()
+        ingest.quote_cache = original_cache
+
+if __name__ == "__main__":
+    test_ticks_conflate_into_one_quote()
+    test_new_session_rolls_previous_close()
+    test_subscriptions_follow_holdings()
+    test_replayed_ticks_reach_quote_cache()
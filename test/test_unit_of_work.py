@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+from bson.objectid import ObjectId
+from flask import Flask, g
+from pymongo import DeleteOne, InsertOne, UpdateOne
+
+from app.operations import deserializeDoc
+from app.unitofwork import UnitOfWork, close_unit_of_work, unit_of_work
+
+USER = ObjectId()
+BUDGETS = [
+    {'_id': ObjectId(), 'user_id': USER, 'category': 'Food', 'limit_amount': 300.0, 'month': 'March', 'year': 2025},
+    {'_id': ObjectId(), 'user_id': USER, 'category': 'Travel', 'limit_amount': 200.0, 'month': 'March', 'year': 2025}
+]
+
+class FakeRepository:
+    """Counts reads per query, returning plain dicts in place of raw BSON"""
+    def __init__(self, collection, deserialize):
+        self.collection = collection
+        self.deserialize = deserialize
+
+    def _match(self, query):
+        return [d for d in self.collection.docs if all(d.get(k) == v for k, v in query.items())]
+
+    def find(self, query, fields=None, sort=None):
+        self.collection.reads.append(query)
+        return self._match(query)
+
+    def find_one(self, query, fields=None):
+        self.collection.reads.append(query)
+        docs = self._match(query)
+        return docs[0] if docs else None
+
+    def values(self, query, field):
+        return [d[field] for d in self.find(query, [field])]
+
+class FakeCollection:
+    """Applies bulk writes to an in-memory list and records each batch"""
+    def __init__(self, docs):
+        self.docs = [dict(d) for d in docs]
+        self.reads = []
+        self.batches = []
+
+    def bulk_write(self, ops, ordered=True):
+        self.batches.append(ops)
+        for op in ops:
+            if isinstance(op, InsertOne):
+                self.docs.append(dict(op._doc))
+            elif isinstance(op, UpdateOne):
+                for doc in self.docs:
+                    if all(doc.get(k) == v for k, v in op._filter.items()):
+                        doc.update(op._doc['$set'])
+                        break
+            elif isinstance(op, DeleteOne):
+                self.docs = [d for d in self.docs if not all(d.get(k) == v for k, v in op._filter.items())]
+
+class FakeClient:
+    def __init__(self):
+        self.collections = {'Budget': FakeCollection(BUDGETS)}
+
+    def getCollectionEndpoint(self, name):
+        return self.collections[name]
+
+    def getRepository(self, name):
+        return FakeRepository(self.collections[name], deserializeDoc.budget)
+
+def test_repeat_reads_hit_the_identity_map():
+    """The same query made twice in a request is read from Mongo once and returns the same instances"""
+    client = FakeClient()
+    uow = UnitOfWork(client)
+    first = uow.models('Budget', {'user_id': USER})
+    second = uow.models('Budget', {'user_id': USER})
+    assert first is second
+    assert [b.category for b in first] == ['Food', 'Travel']
+    assert uow.values('Budget', {'user_id': USER}, 'category') == ['Food', 'Travel']
+    assert uow.values('Budget', {'user_id': USER}, 'category') == ['Food', 'Travel']
+    assert len(client.collections['Budget'].reads) == 2
+    assert uow.hits == 2 and uow.misses == 2
+
+def test_writes_are_batched_and_invalidate_reads():
+    """Queued writes go out as one bulk_write and the next read sees them"""
+    client = FakeClient()
+    uow = UnitOfWork(client)
+    assert len(uow.models('Budget', {'user_id': USER})) == 2
+    uow.insert('Budget', {'_id': ObjectId(), 'user_id': USER, 'category': 'Rent', 'limit_amount': 900.0})
+    uow.insert('Budget', {'_id': ObjectId(), 'user_id': USER, 'category': 'Gym', 'limit_amount': 40.0})
+    uow.update('Budget', {'category': 'Food'}, {'$set': {'limit_amount': 350.0}})
+    assert client.collections['Budget'].batches == []
+
+    budgets = uow.models('Budget', {'user_id': USER})
+    assert len(client.collections['Budget'].batches) == 1
+    assert len(client.collections['Budget'].batches[0]) == 3
+    assert sorted(b.category for b in budgets) == ['Food', 'Gym', 'Rent', 'Travel']
+    assert [b.limit_amount for b in budgets if b.category == 'Food'] == [350.0]
+    assert uow.commit() == 0
+
+def test_delete_after_ownership_check():
+    """The read-check-delete a route does sends one batch, and the deleted model is not served from the map"""
+    client = FakeClient()
+    uow = UnitOfWork(client)
+    budget_id = BUDGETS[0]['_id']
+    budget = uow.model('Budget', {'_id': budget_id})
+    assert budget.user_id == USER
+    uow.delete('Budget', {'_id': budget_id})
+    assert uow.commit() == 1
+    assert uow.model('Budget', {'_id': budget_id}) is None
+    assert [b.category for b in uow.models('Budget', {'user_id': USER})] == ['Travel']
+
+def test_unit_of_work_is_request_scoped():
+    """Each request gets its own unit of work, and uncommitted writes flush at teardown"""
+    app = Flask(__name__)
+    client = FakeClient()
+    with app.app_context():
+        uow = unit_of_work(client)
+        assert unit_of_work() is uow
+        uow.insert('Budget', {'_id': ObjectId(), 'user_id': USER, 'category': 'Misc', 'limit_amount': 10.0})
+        close_unit_of_work()
+        assert '_unit_of_work' not in g
+    assert len(client.collections['Budget'].batches) == 1
+    with app.app_context():
+        assert unit_of_work(client) is not uow
+
+def test_failed_request_discards_queued_writes():
+    """Writes queued by a request that raised are not flushed"""
+    app = Flask(__name__)
+    client = FakeClient()
+    with app.app_context():
+        unit_of_work(client).insert('Budget', {'_id': ObjectId(), 'user_id': USER, 'category': 'Misc'})
+        close_unit_of_work(RuntimeError('boom'))
+    assert client.collections['Budget'].batches == []
+
+if __name__ == "__main__":
+    test_repeat_reads_hit_the_identity_map()
+    test_writes_are_batched_and_invalidate_reads()
+    test_delete_after_ownership_check()
+    test_unit_of_work_is_request_scoped()
+    test_failed_request_discards_queued_writes()
+    print("All unit of work tests passed!")